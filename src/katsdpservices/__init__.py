@@ -16,6 +16,8 @@
 
 """katsdpservices library."""
 
+from . import tracing as _tracing
+
 # BEGIN VERSION CHECK
 # Get package version when locally imported from repo or via -e develop install
 try:
@@ -28,8 +30,23 @@ else:
 # END VERSION CHECK
 
 
-from .logging import setup_logging                                   # noqa: F401
+from .logging import setup_logging, add_log_sampling                 # noqa: F401
+from .logforward import start_log_forwarding                         # noqa: F401
 from .restart import setup_restart, restart_process                  # noqa: F401
+from .restart import setup_restart_async                             # noqa: F401
+from .restart import add_drain_hook, remove_drain_hook               # noqa: F401
 from .argparse import ArgumentParser                                 # noqa: F401
 from .interfaces import get_interface_address                        # noqa: F401
+from .interfaces import create_receive_socket                        # noqa: F401
 from .aiomonitor import start_aiomonitor, add_aiomonitor_arguments   # noqa: F401
+from .loopmonitor import LoopMonitor, get_loop_monitor               # noqa: F401
+from .profiler import setup_profiler, toggle_profiler                # noqa: F401
+from .metrics import start_metrics_server, add_metrics_arguments     # noqa: F401
+from .affinity import apply_affinity, add_affinity_arguments         # noqa: F401
+from .memory import apply_memory_options, add_memory_arguments       # noqa: F401
+from .gcmonitor import apply_gc_options, add_gc_arguments            # noqa: F401
+from .memtrace import setup_memory_trace, memory_snapshot            # noqa: F401
+from .taskdump import setup_task_dump                                # noqa: F401
+from .eventloop import setup_event_loop, add_event_loop_arguments    # noqa: F401
+
+_tracing._end_import()
@@ -0,0 +1,257 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""CPU affinity and NUMA placement.
+
+:func:`add_affinity_arguments` adds standard command-line options to select
+the CPUs a service runs on, either explicitly, by NUMA node, or by the NUMA
+node closest to a network interface. :func:`apply_affinity` applies them at
+startup. The helpers :func:`pin_thread` and :func:`make_thread_pinner` can be
+used to pin individual worker threads.
+
+This is Linux-specific. Setting the memory policy uses libnuma (loaded with
+:mod:`ctypes`) if it is available; otherwise only the CPU affinity is set.
+"""
+
+import ctypes
+import ctypes.util
+import itertools
+import logging
+import os
+import threading
+
+
+_SYS_ROOT = '/sys'
+_logger = logging.getLogger(__name__)
+
+
+def parse_cpu_list(text):
+    """Parse a CPU list in the format used by Linux (e.g. ``0-3,8,10-11``).
+
+    Returns
+    -------
+    cpus : list of int
+        Sorted list of CPU numbers
+
+    Raises
+    ------
+    ValueError
+        if `text` is not a valid CPU list
+    """
+    cpus = set()
+    text = text.strip()
+    if not text:
+        return []
+    for part in text.split(','):
+        try:
+            if '-' in part:
+                first, last = part.split('-', 1)
+                first = int(first)
+                last = int(last)
+                if first > last or first < 0:
+                    raise ValueError
+                cpus.update(range(first, last + 1))
+            else:
+                cpu = int(part)
+                if cpu < 0:
+                    raise ValueError
+                cpus.add(cpu)
+        except ValueError:
+            raise ValueError('Invalid CPU list {!r}'.format(text)) from None
+    return sorted(cpus)
+
+
+def numa_node_cpus(node):
+    """Get the CPUs belonging to a NUMA node.
+
+    Raises
+    ------
+    ValueError
+        if the NUMA node does not exist
+    """
+    path = os.path.join(_SYS_ROOT, 'devices', 'system', 'node', 'node{}'.format(node), 'cpulist')
+    try:
+        with open(path) as f:
+            return parse_cpu_list(f.read())
+    except FileNotFoundError:
+        raise ValueError('NUMA node {} does not exist'.format(node)) from None
+
+
+def interface_numa_node(interface):
+    """Get the NUMA node closest to a network interface.
+
+    Returns ``None`` if the system does not report a NUMA node for the
+    interface (for example, for virtual interfaces or on non-NUMA systems).
+
+    Raises
+    ------
+    ValueError
+        if the interface does not exist
+    """
+    if not os.path.exists(os.path.join(_SYS_ROOT, 'class', 'net', interface)):
+        raise ValueError('Network interface {} does not exist'.format(interface))
+    path = os.path.join(_SYS_ROOT, 'class', 'net', interface, 'device', 'numa_node')
+    try:
+        with open(path) as f:
+            node = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return node if node >= 0 else None
+
+
+def _thread_ids():
+    """Get the kernel thread IDs of all threads in this process."""
+    try:
+        return [int(tid) for tid in os.listdir('/proc/self/task')]
+    except OSError:
+        return [0]
+
+
+def _set_preferred_node(node):
+    """Set the memory policy of the calling thread to prefer `node`.
+
+    Returns True on success. Failure is logged but not raised.
+    """
+    name = ctypes.util.find_library('numa')
+    if name is None:
+        _logger.warning('libnuma not found, so memory policy was not set')
+        return False
+    try:
+        libnuma = ctypes.CDLL(name)
+    except OSError as exc:
+        _logger.warning('Could not load %s (%s), so memory policy was not set', name, exc)
+        return False
+    if libnuma.numa_available() < 0:
+        _logger.warning('NUMA is not available, so memory policy was not set')
+        return False
+    libnuma.numa_set_preferred(node)
+    return True
+
+
+def pin_thread(cpus):
+    """Restrict the calling thread to a set of CPUs.
+
+    Parameters
+    ----------
+    cpus : int or iterable of int
+        CPU or CPUs on which the thread may run
+    """
+    if isinstance(cpus, int):
+        cpus = [cpus]
+    os.sched_setaffinity(0, cpus)
+
+
+def make_thread_pinner(cpus):
+    """Create a function that pins each calling thread to the next CPU in `cpus`.
+
+    This is intended to be passed as the `initializer` of a
+    :class:`concurrent.futures.ThreadPoolExecutor`, so that each worker
+    thread is pinned to its own CPU (cycling through `cpus` if there are
+    more workers than CPUs).
+
+    Parameters
+    ----------
+    cpus : iterable of int
+        CPUs to assign to threads, in order
+    """
+    cpus = list(cpus)
+    if not cpus:
+        raise ValueError('At least one CPU is required')
+    cycle = itertools.cycle(cpus)
+    lock = threading.Lock()
+
+    def pin():
+        with lock:
+            cpu = next(cycle)
+        pin_thread(cpu)
+
+    return pin
+
+
+def add_affinity_arguments(parser):
+    """Add a set of arguments for controlling CPU affinity and NUMA placement.
+
+    See :func:`.apply_affinity` for details.
+
+    Parameters
+    ----------
+    parser : :class:`argparse.ArgumentParser`
+        Parser to which arguments will be added.
+    """
+    parser.add_argument(
+        '--cpus', type=parse_cpu_list, metavar='CPU-LIST',
+        help='CPUs on which to run (e.g. 0-3,8) [all]')
+    parser.add_argument(
+        '--numa-node', type=int, metavar='NODE',
+        help='NUMA node on which to run and allocate memory [any]')
+    parser.add_argument(
+        '--numa-interface', type=str, metavar='INTERFACE',
+        help='run on the NUMA node closest to this network interface [any]')
+
+
+def apply_affinity(args):
+    """Apply the CPU affinity and NUMA placement given on the command line.
+
+    The CPU affinity is applied to all threads that exist at the time of the
+    call, and is inherited by threads created later. If both CPUs and a NUMA
+    node are given, the intersection is used. If a NUMA node is given (or
+    derived from ``--numa-interface``), the memory policy of the calling
+    thread (which is also inherited by new threads) is set to prefer that
+    node. This should thus be called early in startup.
+
+    Parameters
+    ----------
+    args : :class:`argparse.Namespace`
+        Command-line arguments from a parser passed to :func:`add_affinity_arguments`
+
+    Returns
+    -------
+    cpus : set of int
+        The CPUs the process is now allowed to run on, or ``None`` if no
+        affinity options were given
+
+    Raises
+    ------
+    ValueError
+        if the options select no CPUs, or refer to a non-existent NUMA node
+        or interface
+    """
+    node = args.numa_node
+    if node is None and args.numa_interface is not None:
+        node = interface_numa_node(args.numa_interface)
+        if node is None:
+            _logger.warning('No NUMA node reported for interface %s, not restricting placement',
+                            args.numa_interface)
+    cpus = None
+    if args.cpus is not None:
+        cpus = set(args.cpus)
+    if node is not None:
+        node_cpus = set(numa_node_cpus(node))
+        cpus = node_cpus if cpus is None else cpus & node_cpus
+    if cpus is None:
+        return None
+    if not cpus:
+        raise ValueError('The CPU affinity options do not select any CPUs')
+    for tid in _thread_ids():
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except ProcessLookupError:
+            pass     # Thread exited in the meantime
+    if node is not None:
+        _set_preferred_node(node)
+    cpus = os.sched_getaffinity(0)
+    _logger.info('Running on CPUs %s', ','.join(str(cpu) for cpu in sorted(cpus)))
+    return cpus
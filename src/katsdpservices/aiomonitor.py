@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, 2024, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2024, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -16,8 +16,55 @@
 
 """Utilities to simplify starting aiomonitor"""
 
+import contextlib
 import inspect
 
+from . import tracing
+from .loopmonitor import start_loop_monitor
+
+
+_monitor_commands = {}
+"""Commands registered with :func:`register_monitor_command`, indexed by name."""
+
+
+def register_monitor_command(name, callback, help):
+    """Register a command to add to the aiomonitor terminal UI.
+
+    The command is added by :func:`start_aiomonitor`. It is only supported
+    with aiomonitor 0.5 or later; with older versions it is silently ignored.
+
+    Parameters
+    ----------
+    name : str
+        Name of the command
+    callback : callable
+        Function called (in the aiomonitor thread) with no arguments when the
+        command is run. It returns a string to display to the user.
+    help : str
+        Short description of the command for the help listing
+    """
+    _monitor_commands[name] = (callback, help)
+
+
+def _install_monitor_commands():
+    try:
+        import click
+        from aiomonitor.termui.commands import (
+            monitor_cli, custom_help_option, auto_command_done)
+    except ImportError:
+        return     # aiomonitor is too old to support custom commands
+
+    def make_command(name, callback, help):
+        @monitor_cli.command(name=name, help=help)
+        @custom_help_option
+        @auto_command_done
+        def command(ctx):
+            click.echo(callback())
+
+    for name, (callback, help) in _monitor_commands.items():
+        if name not in monitor_cli.commands:
+            make_command(name, callback, help)
+
 
 class _DummyContext:
     """Context manager that does nothing"""
@@ -37,7 +84,11 @@ def start_aiomonitor(loop, args, locals):
             loop.run_until_complete(main())
 
     If ``--aiomonitor`` is not passed on the command line, it does not start
-    aiomonitor, although the package must still be present.
+    aiomonitor, although the package must still be present. Similarly, if
+    ``--loop-monitor`` is passed, a :class:`~.LoopMonitor` is started (which
+    does not require ``--aiomonitor``), and can be retrieved with
+    :func:`~.get_loop_monitor`. Commands registered with
+    :func:`register_monitor_command` are added to the terminal UI.
 
     Parameters
     ----------
@@ -51,20 +102,33 @@ def start_aiomonitor(loop, args, locals):
     """
     import aiomonitor
 
-    if not args.aiomonitor:
+    contexts = []
+    # If anything fails to start, stop whatever was already started
+    with tracing.span('start_aiomonitor'), contextlib.ExitStack() as stack:
+        if getattr(args, 'loop_monitor', False):
+            contexts.append(start_loop_monitor(loop, args))
+            stack.enter_context(contexts[-1])
+        if args.aiomonitor:
+            # Add this only if aiomonitor is new enough to support it
+            kwargs = {}
+            if 'webui_port' in inspect.signature(aiomonitor.start_monitor).parameters:
+                kwargs['webui_port'] = args.aiomonitor_webui_port
+            _install_monitor_commands()
+            contexts.append(aiomonitor.start_monitor(
+                loop=loop,
+                host=args.aiomonitor_host,
+                port=args.aiomonitor_port,
+                console_port=args.aioconsole_port,
+                locals=locals,
+                **kwargs))
+            stack.enter_context(contexts[-1])
+        started = stack.pop_all()
+    if not contexts:
         return _DummyContext()
+    elif len(contexts) == 1:
+        return contexts[0]
     else:
-        # Add this only if aiomonitor is new enough to support it
-        kwargs = {}
-        if 'webui_port' in inspect.signature(aiomonitor.start_monitor).parameters:
-            kwargs['webui_port'] = args.aiomonitor_webui_port
-        return aiomonitor.start_monitor(
-            loop=loop,
-            host=args.aiomonitor_host,
-            port=args.aiomonitor_port,
-            console_port=args.aioconsole_port,
-            locals=locals,
-            **kwargs)
+        return started
 
 
 def add_aiomonitor_arguments(parser):
@@ -75,6 +139,9 @@ def add_aiomonitor_arguments(parser):
     The :option:`--aiomonitor-webui-port` option is added unconditionally,
     but ignored if aiomonitor is older than 0.6.0.
 
+    Options for the event loop monitor (see :class:`~.LoopMonitor`) are
+    also added.
+
     Parameters
     ----------
     parser : :class:`argparse.ArgumentParser`
@@ -100,3 +167,15 @@ def add_aiomonitor_arguments(parser):
     parser.add_argument(
         '--aiomonitor-webui-port', type=int, default=default_webui_port,
         help='port for aiomonitor web UI [%(default)s]')
+    parser.add_argument(
+        '--loop-monitor', action='store_true', default=False,
+        help='measure event loop lag and report slow callbacks')
+    parser.add_argument(
+        '--loop-monitor-interval', type=float, default=0.1, metavar='SECONDS',
+        help='interval between event loop lag samples [%(default)s]')
+    parser.add_argument(
+        '--loop-monitor-slow-threshold', type=float, default=0.1, metavar='SECONDS',
+        help='report callbacks that block the event loop for longer than this [%(default)s]')
+    parser.add_argument(
+        '--loop-monitor-log-interval', type=float, default=60.0, metavar='SECONDS',
+        help='interval between event loop summary log messages (0 to disable) [%(default)s]')
@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -25,6 +25,9 @@ try:
 except ImportError:
     pass
 
+from . import tracing
+from .telstatecache import CachingTelescopeState
+
 
 class _HelpAction(argparse.Action):
     """Class modelled on argparse._HelpAction that prints help for the
@@ -83,12 +86,17 @@ class ArgumentParser(argparse.ArgumentParser):
     ----------
     config_key : str, optional
         Name of the config dictionary within the telescope state (default: `config`)
+    telstate_cache_size : int, optional
+        If specified, the telescope state is wrapped in a
+        :class:`~katsdpservices.telstatecache.CachingTelescopeState` that caches
+        up to this many immutable keys (default: no caching)
     """
 
     _SPECIAL_NAMES = ['telstate', 'name']
 
     def __init__(self, *args, **kwargs):
         self.config_key = kwargs.pop('config_key', 'config')
+        self.telstate_cache_size = kwargs.pop('telstate_cache_size', None)
         super().__init__(*args, **kwargs)
         # Create a separate parser that will extract only the special args
         self.config_parser = argparse.ArgumentParser(add_help=False)
@@ -148,11 +156,16 @@ class ArgumentParser(argparse.ArgumentParser):
                 try:
                     namespace.telstate_endpoint = \
                         katsdptelstate.endpoint.endpoint_parser(6379)(config_args.telstate)
-                    namespace.telstate = katsdptelstate.TelescopeState(config_args.telstate)
+                    with tracing.span('telstate connect', endpoint=config_args.telstate):
+                        namespace.telstate = katsdptelstate.TelescopeState(config_args.telstate)
                 except katsdptelstate.ConnectionError as e:
                     self.error(str(e))
+                if self.telstate_cache_size:
+                    namespace.telstate = CachingTelescopeState(namespace.telstate,
+                                                               self.telstate_cache_size)
                 namespace.name = config_args.name
-                self._load_defaults(namespace.telstate, namespace.name)
+                with tracing.span('telstate config fetch', name=namespace.name):
+                    self._load_defaults(namespace.telstate, namespace.name)
             else:
                 namespace.telstate_endpoint = None
         return super().parse_known_args(other, namespace)
@@ -0,0 +1,456 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Compact binary capture of log records, for very high-rate logging.
+
+:class:`BinaryLogHandler` does not format records at all. Each distinct
+logging call site (logger name, source location and format string) is
+written to the file once and assigned a numeric id, and thereafter each
+record is stored as the site id, timestamp, level and the raw arguments.
+This is an order of magnitude cheaper than formatting, and is intended for
+trace-style debug logging, typically on a dedicated logger that does not
+propagate to the normal handlers::
+
+    logger = logging.getLogger('myservice.trace')
+    logger.propagate = False
+    logger.addHandler(BinaryLogHandler('/var/log/myservice/trace.bin'))
+
+Arguments of type :class:`str`, :class:`bytes`, :class:`int` (of any
+size), :class:`float`, :class:`bool` and ``None`` are stored as is. Other
+integers and real numbers (such as numpy scalars) are converted to
+:class:`int` or :class:`float`, so that they can still be formatted with
+``%d`` or ``%f``.
+Other objects are converted with :func:`str` (so ``%r`` will render them
+as ``%s`` would).
+Records whose arguments are a mapping are formatted when they are emitted.
+
+The file is decoded with ``python -m katsdpservices.binlog FILE``, which
+renders records in the same format as :func:`~katsdpservices.setup_logging`
+uses for stderr, or as JSON lines with ``--json``.
+
+File format
+-----------
+The file is a sequence of entries, each starting with a one-byte tag. All
+integers are little-endian.
+
+``H``
+    Start of a session (written each time the file is opened, and in a
+    forked child): 8-byte magic, format version (u32) and process id (u32).
+    Site ids are only valid within a session.
+``P``
+    Process id (u32). It starts every write to the file, so that the
+    entries that follow can be matched to the session of the process that
+    wrote them, even when a forked child is writing to the same file.
+``S``
+    Site definition: site id (u32), line number (u32), then the logger
+    name, path name, function name and format string as strings.
+``R``
+    Record: site id (u32), creation time (f64), level (u16), number of
+    arguments (u8), flags (u8), then the arguments. If flag bit 0 is set,
+    the formatted exception follows as a string.
+
+Strings are a length (u32) followed by UTF-8. Each argument is a one-byte
+type (``n`` for None, ``t``/``f`` for booleans, ``q`` for i64, ``i`` for
+a larger integer, ``d`` for f64, ``s`` for a string, ``y`` for bytes and
+``o`` for the string form of another object) followed by the value. Larger
+integers are stored as a length (u32) followed by that many bytes of
+little-endian two's complement.
+"""
+
+import argparse
+import json
+import logging
+import numbers
+import os
+import struct
+import sys
+import weakref
+
+
+MAGIC = b'KSDPBLOG'
+VERSION = 1
+
+_HEADER = struct.Struct('<c8sII')
+_PROCESS = struct.Struct('<cI')
+_SITE = struct.Struct('<cII')
+_RECORD = struct.Struct('<cIdHBB')
+_LENGTH = struct.Struct('<I')
+_INT = struct.Struct('<cq')
+_FLOAT = struct.Struct('<cd')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+_FLAG_EXC_TEXT = 1
+_MAX_ARGS = 255
+_INT_MIN = -2**63
+_INT_MAX = 2**63 - 1
+#: Open instances of :class:`BinaryLogHandler`, to fix up after a fork
+_handlers = weakref.WeakSet()
+
+
+def _encode_str(text):
+    data = text.encode('utf-8', errors='surrogateescape')
+    return _LENGTH.pack(len(data)) + data
+
+
+class BinaryLogHandler(logging.Handler):
+    """Handler that appends records to a file in a compact binary format.
+
+    Data is buffered in memory and written when the buffer fills, when a
+    record at or above `flush_level` is emitted, and when the handler is
+    flushed (including by :func:`~katsdpservices.restart_process`) or
+    closed.
+
+    A forked child discards the data it inherited in the buffer (which the
+    parent will write) and starts a new session in the same file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file. If it exists, records are appended to it.
+    buffer_size : int, optional
+        Number of bytes to buffer before writing to the file
+    flush_level : int, optional
+        Records at or above this level cause the buffer to be written
+        immediately
+    """
+    def __init__(self, path, buffer_size=65536, flush_level=logging.ERROR):
+        super().__init__()
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        self._sites = {}
+        self._buffer = bytearray()
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        self._start_session()
+        _handlers.add(self)
+
+    def _start_session(self):
+        self._pid = os.getpid()
+        self._sites.clear()
+        self._clear()
+        self._buffer += _HEADER.pack(b'H', MAGIC, VERSION, self._pid)
+
+    def _clear(self):
+        self._buffer.clear()
+        self._buffer += _PROCESS.pack(b'P', self._pid)
+
+    def _site_id(self, record, msg):
+        key = (record.name, record.pathname, record.lineno, msg)
+        site_id = self._sites.get(key)
+        if site_id is None:
+            site_id = len(self._sites)
+            self._sites[key] = site_id
+            self._buffer += _SITE.pack(b'S', site_id, record.lineno)
+            for text in (record.name, record.pathname, record.funcName or '', msg):
+                self._buffer += _encode_str(text)
+        return site_id
+
+    def _encode_args(self, args):
+        buffer = self._buffer
+        for arg in args:
+            cls = type(arg)
+            if cls is str:
+                buffer += b's'
+                buffer += _encode_str(arg)
+            elif cls is int and _INT_MIN <= arg <= _INT_MAX:
+                buffer += _INT.pack(b'q', arg)
+            elif cls is float:
+                buffer += _FLOAT.pack(b'd', arg)
+            elif arg is None:
+                buffer += b'n'
+            elif arg is True:
+                buffer += b't'
+            elif arg is False:
+                buffer += b'f'
+            elif isinstance(arg, (bytes, bytearray)):
+                buffer += b'y'
+                buffer += _LENGTH.pack(len(arg))
+                buffer += arg
+            elif isinstance(arg, numbers.Integral):
+                value = int(arg)
+                if _INT_MIN <= value <= _INT_MAX:
+                    buffer += _INT.pack(b'q', value)
+                else:
+                    data = value.to_bytes(value.bit_length() // 8 + 1, 'little', signed=True)
+                    buffer += b'i'
+                    buffer += _LENGTH.pack(len(data))
+                    buffer += data
+            elif isinstance(arg, numbers.Real) and not isinstance(arg, numbers.Integral):
+                buffer += _FLOAT.pack(b'd', float(arg))
+            else:
+                buffer += b'o'
+                buffer += _encode_str(str(arg))
+
+    def emit(self, record):
+        try:
+            msg = record.msg
+            args = record.args
+            if args is None:
+                args = ()
+            if type(msg) is not str or not isinstance(args, tuple) or len(args) > _MAX_ARGS:
+                # Mapping arguments or a non-string message: format it now
+                args = (record.getMessage(),)
+                msg = '%s'
+            flags = 0
+            exc_text = None
+            if record.exc_info or record.exc_text:
+                exc_text = record.exc_text
+                if not exc_text:
+                    formatter = self.formatter or logging.Formatter()
+                    exc_text = formatter.formatException(record.exc_info)
+                flags |= _FLAG_EXC_TEXT
+            site_id = self._site_id(record, msg)
+            self._buffer += _RECORD.pack(b'R', site_id, record.created, record.levelno,
+                                         len(args), flags)
+            self._encode_args(args)
+            if exc_text is not None:
+                self._buffer += _encode_str(exc_text)
+            if record.levelno >= self.flush_level or len(self._buffer) >= self.buffer_size:
+                self._write()
+        except Exception:
+            self.handleError(record)
+
+    def _write(self):
+        """Write the buffer to the file. The caller must hold the lock."""
+        if len(self._buffer) > _PROCESS.size and self._fd is not None:
+            with memoryview(self._buffer) as view:
+                pos = 0
+                while pos < len(view):
+                    pos += os.write(self._fd, view[pos:])
+            self._clear()
+
+    def flush(self):
+        with self.lock:
+            self._write()
+
+    def close(self):
+        _handlers.discard(self)
+        with self.lock:
+            self._write()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        super().close()
+
+
+def _after_fork_in_child():
+    for handler in list(_handlers):
+        handler._start_session()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class _Opaque:
+    """Stand-in for an argument that was stored as its string form."""
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return self.text
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def unpack(self, st):
+        value = st.unpack_from(self.data, self.pos)
+        self.pos += st.size
+        return value
+
+    def raw(self, size):
+        if self.pos + size > len(self.data):
+            raise struct.error('truncated data')
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def string(self):
+        length, = self.unpack(_LENGTH)
+        return bytes(self.raw(length)).decode('utf-8', errors='surrogateescape')
+
+    def arg(self):
+        kind = bytes(self.raw(1))
+        if kind == b'n':
+            return None
+        elif kind == b't':
+            return True
+        elif kind == b'f':
+            return False
+        elif kind == b'q':
+            return self.unpack(_I64)[0]
+        elif kind == b'i':
+            length, = self.unpack(_LENGTH)
+            return int.from_bytes(self.raw(length), 'little', signed=True)
+        elif kind == b'd':
+            return self.unpack(_F64)[0]
+        elif kind == b's':
+            return self.string()
+        elif kind == b'y':
+            length, = self.unpack(_LENGTH)
+            return bytes(self.raw(length))
+        elif kind == b'o':
+            return _Opaque(self.string())
+        else:
+            raise ValueError('Unknown argument type {!r} at offset {}'.format(kind, self.pos - 1))
+
+
+def read_records(data):
+    """Decode the contents of a file written by :class:`BinaryLogHandler`.
+
+    A truncated final entry (for example, if the process was killed while
+    writing) is ignored.
+
+    Parameters
+    ----------
+    data : bytes-like
+        Contents of the file
+
+    Yields
+    ------
+    record : :class:`logging.LogRecord`
+        Reconstructed records. The message is not formatted until
+        :meth:`~logging.LogRecord.getMessage` is called.
+
+    Raises
+    ------
+    ValueError
+        if the data is not in the expected format
+    """
+    reader = _Reader(data)
+    sessions = {}     # Site definitions for each process
+    sites = {}
+    pid = None
+    while reader.pos < len(data):
+        start = reader.pos
+        try:
+            tag = bytes(reader.raw(1))
+            if tag == b'H':
+                reader.pos = start
+                _, magic, version, pid = reader.unpack(_HEADER)
+                if magic != MAGIC:
+                    raise ValueError('Not a binary log file (bad magic at offset {})'
+                                     .format(start))
+                if version != VERSION:
+                    raise ValueError('Unsupported binary log version {}'.format(version))
+                sites = sessions[pid] = {}
+            elif tag == b'P':
+                reader.pos = start
+                _, pid = reader.unpack(_PROCESS)
+                sites = sessions.setdefault(pid, {})
+            elif tag == b'S':
+                reader.pos = start
+                _, site_id, lineno = reader.unpack(_SITE)
+                name, pathname, func_name, msg = [reader.string() for i in range(4)]
+                sites[site_id] = (name, pathname, lineno, func_name, msg)
+            elif tag == b'R':
+                reader.pos = start
+                _, site_id, created, levelno, nargs, flags = reader.unpack(_RECORD)
+                args = tuple(reader.arg() for i in range(nargs))
+                exc_text = reader.string() if flags & _FLAG_EXC_TEXT else None
+                try:
+                    name, pathname, lineno, func_name, msg = sites[site_id]
+                except KeyError:
+                    raise ValueError('Record at offset {} refers to undefined site {}'
+                                     .format(start, site_id)) from None
+                filename = os.path.basename(pathname)
+                yield logging.makeLogRecord({
+                    'name': name,
+                    'msg': msg,
+                    'args': args,
+                    'levelno': levelno,
+                    'levelname': logging.getLevelName(levelno),
+                    'pathname': pathname,
+                    'filename': filename,
+                    'module': os.path.splitext(filename)[0],
+                    'lineno': lineno,
+                    'funcName': func_name,
+                    'created': created,
+                    'msecs': (created - int(created)) * 1000,
+                    'process': pid,
+                    'exc_text': exc_text
+                })
+            else:
+                raise ValueError('Unknown entry {!r} at offset {}'.format(tag, start))
+        except struct.error:
+            return     # Truncated entry at the end of the file
+
+
+def _get_message(record):
+    try:
+        return record.getMessage()
+    except Exception:
+        # Mismatch between format string and arguments
+        return '{} {!r}'.format(record.msg, record.args)
+
+
+def _to_json(record):
+    data = {
+        'timestamp': record.created,
+        'level': record.levelname,
+        'logger': record.name,
+        'filename': record.filename,
+        'lineno': record.lineno,
+        'funcName': record.funcName,
+        'process': record.process,
+        'message': _get_message(record)
+    }
+    if record.exc_text:
+        data['exc_text'] = record.exc_text
+    return json.dumps(data)
+
+
+def main(argv=None):
+    """Decode binary log files to standard output."""
+    from .logging import _make_formatter
+
+    parser = argparse.ArgumentParser(
+        prog='python -m katsdpservices.binlog',
+        description='Decode log files written by katsdpservices.binlog.BinaryLogHandler')
+    parser.add_argument('files', nargs='+', metavar='FILE', help='binary log file')
+    parser.add_argument('--json', action='store_true',
+                        help='output one JSON object per line')
+    args = parser.parse_args(argv)
+
+    formatter = _make_formatter()
+    out = sys.stdout
+    failed = False
+    for path in args.files:
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            for record in read_records(data):
+                if args.json:
+                    out.write(_to_json(record) + '\n')
+                else:
+                    # Formatter.format calls getMessage, which may fail
+                    record.msg = _get_message(record)
+                    record.args = ()
+                    out.write(formatter.format(record) + '\n')
+        except ValueError as exc:
+            print('{}: {}'.format(path, exc), file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
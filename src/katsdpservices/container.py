@@ -0,0 +1,316 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Introspection of the container (cgroup) in which the process runs.
+
+This reports the container ID and the resource limits imposed by the
+container runtime, so that services can size thread pools, queues and
+buffers according to what they are actually allowed to use, rather than
+what the host has. Both cgroup v1 and v2 are supported. The cgroup
+filesystems are located from ``/proc/self/mountinfo``, falling back to the
+standard locations under ``/sys/fs/cgroup``.
+
+The limits of a container cannot change while it is running (without
+outside intervention), so the results are cached. Call :func:`clear_cache`
+to discard them.
+"""
+
+import functools
+import math
+import os
+import re
+
+from .affinity import parse_cpu_list
+
+
+_ROOT = '/'
+"""Root of the filesystem (overridden by tests to point at a fake tree)."""
+_ID_REGEXES = [
+    re.compile(r'^/docker/([a-f0-9]+)$'),
+    re.compile(r'(?:^|[/\-_:])([a-f0-9]{64})(?:\.scope)?(?:/|$)')
+]
+_MOUNTINFO_ID_REGEX = re.compile(r'/(?:docker/)?containers/([a-f0-9]{64})/')
+_MEMORY_UNLIMITED = 2**60
+"""cgroup v1 reports no memory limit as a huge number rather than 'max'."""
+
+
+def _path(path):
+    return os.path.join(_ROOT, path.lstrip('/'))
+
+
+def _read(path):
+    """Read a file, returning ``None`` if it cannot be read."""
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _cgroups():
+    """Parse ``/proc/self/cgroup``.
+
+    Returns
+    -------
+    cgroups : list of tuple
+        (hierarchy id, list of controllers, path) for each line
+    """
+    text = _read(_path('/proc/self/cgroup')) or ''
+    cgroups = []
+    for line in text.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) == 3:
+            controllers = [c for c in parts[1].split(',') if c]
+            cgroups.append((parts[0], controllers, parts[2]))
+    return cgroups
+
+
+@functools.lru_cache(maxsize=None)
+def _mounts():
+    """Parse ``/proc/self/mountinfo`` for cgroup filesystems.
+
+    Returns
+    -------
+    mounts : list of tuple
+        (root, mount point, filesystem type, super options) for each cgroup
+        mount
+    """
+    text = _read(_path('/proc/self/mountinfo')) or ''
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            sep = fields.index('-')
+            fstype = fields[sep + 1]
+            super_options = fields[sep + 3].split(',') if len(fields) > sep + 3 else []
+        except (ValueError, IndexError):
+            continue
+        if fstype in {'cgroup', 'cgroup2'}:
+            mounts.append((fields[3], fields[4], fstype, super_options))
+    return mounts
+
+
+@functools.lru_cache(maxsize=None)
+def cgroup_version():
+    """Get the cgroup version in use (1 or 2), or ``None`` if cgroups are not available."""
+    cgroups = _cgroups()
+    if not cgroups:
+        return None
+    if any(controllers for _, controllers, _ in cgroups):
+        return 1
+    return 2
+
+
+def _mount_point(controller):
+    """Find (mount root, mount point) of the hierarchy containing `controller`.
+
+    For cgroup v2, `controller` is ignored.
+    """
+    version = cgroup_version()
+    for root, mount_point, fstype, super_options in _mounts():
+        if version == 2 and fstype == 'cgroup2':
+            return root, _path(mount_point)
+        if version == 1 and fstype == 'cgroup' and controller in super_options:
+            return root, _path(mount_point)
+    # Not found in mountinfo: guess the standard location
+    if version == 2:
+        return '/', _path('/sys/fs/cgroup')
+    else:
+        return '/', _path('/sys/fs/cgroup/' + controller)
+
+
+@functools.lru_cache(maxsize=None)
+def _cgroup_dirs(controller):
+    """Find the cgroup directories for `controller`, from innermost to outermost.
+
+    The outermost directory is the root of the visible hierarchy (which, in
+    a container with a private cgroup namespace, is the container's own
+    cgroup). Directories that don't exist are skipped.
+    """
+    version = cgroup_version()
+    path = None
+    for _, controllers, cgroup_path in _cgroups():
+        if (version == 2 and not controllers) or controller in controllers:
+            path = cgroup_path
+            break
+    if path is None:
+        return []
+    root, mount_point = _mount_point(controller)
+    # Make the path relative to the root of the mount. If it lies outside
+    # the mount (e.g. with a private cgroup namespace but the host's mount),
+    # the mount point itself is the best guess.
+    root = root.rstrip('/')
+    if path == root or path.startswith(root + '/'):
+        relative = path[len(root):].strip('/')
+    else:
+        relative = ''
+    parts = relative.split('/') if relative else []
+    dirs = []
+    for i in range(len(parts), -1, -1):
+        directory = os.path.join(mount_point, *parts[:i])
+        if os.path.isdir(directory):
+            dirs.append(directory)
+    return dirs
+
+
+def _read_limits(controller, filename):
+    """Read `filename` from each cgroup directory (innermost first)."""
+    values = []
+    for directory in _cgroup_dirs(controller):
+        text = _read(os.path.join(directory, filename))
+        if text is not None:
+            values.append(text.strip())
+    return values
+
+
+@functools.lru_cache(maxsize=None)
+def container_id():
+    """Find the ID of the current container.
+
+    This recognises the cgroup paths used by Docker, containerd, CRI-O and
+    Podman (with cgroup v1, or v2 without a private cgroup namespace). As a
+    fallback, it looks for Docker's per-container files (such as
+    ``/etc/hostname``) in ``/proc/self/mountinfo``.
+
+    Returns
+    -------
+    container_id : str
+        The ID, or ``None`` if it could not be determined (e.g. if not
+        running in a container)
+    """
+    for _, _, path in _cgroups():
+        for regex in _ID_REGEXES:
+            match = regex.search(path)
+            if match:
+                return match.group(1)
+    text = _read(_path('/proc/self/mountinfo')) or ''
+    match = _MOUNTINFO_ID_REGEX.search(text)
+    if match:
+        return match.group(1)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def cpu_quota():
+    """Get the CPU bandwidth limit of the container.
+
+    If there are limits at several levels of the hierarchy, the most
+    restrictive one is used.
+
+    Returns
+    -------
+    quota : float
+        The number of CPUs' worth of time that may be used (which need not
+        be an integer), or ``None`` if there is no limit
+    """
+    quotas = []
+    if cgroup_version() == 2:
+        for text in _read_limits('cpu', 'cpu.max'):
+            parts = text.split()
+            if len(parts) == 2 and parts[0] != 'max':
+                try:
+                    quotas.append(int(parts[0]) / int(parts[1]))
+                except (ValueError, ZeroDivisionError):
+                    pass
+    else:
+        for directory in _cgroup_dirs('cpu'):
+            quota = _read(os.path.join(directory, 'cpu.cfs_quota_us'))
+            period = _read(os.path.join(directory, 'cpu.cfs_period_us'))
+            try:
+                quota = int(quota)
+                period = int(period)
+            except (TypeError, ValueError):
+                continue
+            if quota > 0 and period > 0:
+                quotas.append(quota / period)
+    return min(quotas) if quotas else None
+
+
+@functools.lru_cache(maxsize=None)
+def memory_limit():
+    """Get the memory limit of the container, in bytes.
+
+    If there are limits at several levels of the hierarchy, the most
+    restrictive one is used. Returns ``None`` if there is no limit.
+    """
+    limits = []
+    if cgroup_version() == 2:
+        texts = _read_limits('memory', 'memory.max')
+    else:
+        texts = _read_limits('memory', 'memory.limit_in_bytes')
+    for text in texts:
+        try:
+            limit = int(text)
+        except ValueError:
+            continue      # 'max' indicates no limit
+        if limit < _MEMORY_UNLIMITED:
+            limits.append(limit)
+    return min(limits) if limits else None
+
+
+@functools.lru_cache(maxsize=None)
+def cpuset():
+    """Get the CPUs that the container may use.
+
+    Returns
+    -------
+    cpus : list of int
+        Sorted list of CPU numbers, or ``None`` if it cannot be determined
+    """
+    if cgroup_version() == 2:
+        filenames = ['cpuset.cpus.effective', 'cpuset.cpus']
+    else:
+        filenames = ['cpuset.effective_cpus', 'cpuset.cpus']
+    for directory in _cgroup_dirs('cpuset'):
+        for filename in filenames:
+            text = _read(os.path.join(directory, filename))
+            if text and text.strip():
+                try:
+                    return parse_cpu_list(text)
+                except ValueError:
+                    pass
+    return None
+
+
+def available_cpus():
+    """Get the number of CPUs that the process can make use of.
+
+    This takes into account the CPU affinity of the process (which may have
+    been changed by :func:`~.apply_affinity`), the container's cpuset, and
+    its CPU quota (rounded up). It is suitable for sizing thread pools.
+
+    Returns
+    -------
+    cpus : int
+        Number of usable CPUs (at least 1)
+    """
+    cpus = os.sched_getaffinity(0)
+    allowed = cpuset()
+    if allowed is not None:
+        cpus = cpus & set(allowed) or cpus
+    n = len(cpus)
+    quota = cpu_quota()
+    if quota is not None:
+        n = min(n, math.ceil(quota))
+    return max(n, 1)
+
+
+def clear_cache():
+    """Discard cached information, so that it will be read again."""
+    for func in [_cgroups, _mounts, cgroup_version, _cgroup_dirs, container_id,
+                 cpu_quota, memory_limit, cpuset]:
+        func.cache_clear()
@@ -0,0 +1,177 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Common setup of the asyncio event loop.
+
+:func:`add_event_loop_arguments` adds command-line options, and
+:func:`setup_event_loop` creates an event loop configured by them: the loop
+implementation (uvloop if available, unless overridden), the size of the
+default executor, and debug settings. :func:`run_event_loop` additionally
+starts aiomonitor (see :func:`~.start_aiomonitor`) and runs a coroutine to
+completion.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+
+from .aiomonitor import _DummyContext, start_aiomonitor
+from . import container
+
+
+EVENT_LOOPS = ('auto', 'asyncio', 'uvloop')
+"""Valid values for the ``--event-loop`` option."""
+
+_logger = logging.getLogger(__name__)
+
+
+def default_executor_threads():
+    """Get the default number of threads for the default executor.
+
+    This uses the same formula as :class:`concurrent.futures.ThreadPoolExecutor`,
+    but counts only the CPUs that the process is allowed to use (see
+    :func:`~.apply_affinity` and :func:`.container.available_cpus`) rather
+    than all the CPUs in the machine.
+    """
+    return min(32, container.available_cpus() + 4)
+
+
+def new_event_loop(kind='auto'):
+    """Create a new event loop of the given kind.
+
+    Parameters
+    ----------
+    kind : {'auto', 'asyncio', 'uvloop'}
+        Event loop implementation. With ``'auto'``, uvloop is used if it is
+        installed, otherwise the standard asyncio event loop.
+
+    Raises
+    ------
+    ValueError
+        if `kind` is not valid
+    ImportError
+        if `kind` is ``'uvloop'`` and uvloop is not installed
+    """
+    if kind not in EVENT_LOOPS:
+        raise ValueError('Unknown event loop {!r}'.format(kind))
+    if kind != 'asyncio':
+        try:
+            import uvloop
+        except ImportError:
+            if kind == 'uvloop':
+                raise
+            _logger.debug('uvloop is not installed, using the asyncio event loop')
+        else:
+            return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def add_event_loop_arguments(parser):
+    """Add a set of arguments for configuring the event loop.
+
+    See :func:`.setup_event_loop` for details.
+
+    Parameters
+    ----------
+    parser : :class:`argparse.ArgumentParser`
+        Parser to which arguments will be added.
+    """
+    parser.add_argument(
+        '--event-loop', choices=EVENT_LOOPS, default='auto',
+        help='event loop implementation (auto uses uvloop if installed) [%(default)s]')
+    parser.add_argument(
+        '--executor-threads', type=int, metavar='N',
+        help='number of threads in the default executor [based on CPU affinity]')
+    parser.add_argument(
+        '--asyncio-debug', action='store_true', default=False,
+        help='enable asyncio debug mode')
+    parser.add_argument(
+        '--slow-callback-duration', type=float, default=0.1, metavar='SECONDS',
+        help='in debug mode, log callbacks that take longer than this [%(default)s]')
+
+
+def setup_event_loop(args):
+    """Create an event loop configured by the command-line options.
+
+    The loop is set as the current event loop, and is given a default
+    executor sized by ``--executor-threads`` or
+    :func:`default_executor_threads`. If CPU affinity is configured with
+    :func:`~.apply_affinity`, it should be applied first.
+
+    The returned loop can be passed to :func:`~.start_aiomonitor`, or use
+    :func:`run_event_loop` to do that as well.
+
+    Parameters
+    ----------
+    args : :class:`argparse.Namespace`
+        Command-line arguments from a parser passed to
+        :func:`add_event_loop_arguments`
+
+    Returns
+    -------
+    loop : :class:`asyncio.AbstractEventLoop`
+    """
+    loop = new_event_loop(args.event_loop)
+    asyncio.set_event_loop(loop)
+    threads = args.executor_threads
+    if threads is None:
+        threads = default_executor_threads()
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(threads))
+    loop.set_debug(args.asyncio_debug)
+    loop.slow_callback_duration = args.slow_callback_duration
+    _logger.debug('Created %s with %d executor threads', type(loop).__name__, threads)
+    return loop
+
+
+def run_event_loop(main, args, locals=None):
+    """Run a coroutine on an event loop configured by the command-line options.
+
+    The loop is created with :func:`setup_event_loop`. If the parser was
+    also passed to :func:`~.add_aiomonitor_arguments`, aiomonitor (and the
+    event loop monitor) are started as configured by :func:`~.start_aiomonitor`.
+    Once `main` completes, the loop is shut down and closed.
+
+    Parameters
+    ----------
+    main : coroutine
+        Coroutine to run
+    args : :class:`argparse.Namespace`
+        Command-line arguments
+    locals : dict, optional
+        Local variables, made available in aioconsole
+
+    Returns
+    -------
+    result
+        The result of `main`
+    """
+    loop = setup_event_loop(args)
+    try:
+        if hasattr(args, 'aiomonitor'):
+            context = start_aiomonitor(loop, args, locals)
+        else:
+            context = _DummyContext()
+        with context:
+            return loop.run_until_complete(main)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            # Only available from Python 3.9
+            if hasattr(loop, 'shutdown_default_executor'):
+                loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
@@ -0,0 +1,215 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Garbage collector tuning and pause instrumentation.
+
+:func:`setup_gc` (or :func:`apply_gc_options`, driven by the command-line
+options added by :func:`add_gc_arguments`) should be called once startup is
+complete, e.g. right after parsing arguments and setting up logging. It can
+
+- freeze the startup heap with :func:`gc.freeze`, so that long-lived objects
+  created during startup are not scanned by later collections;
+- set the collection thresholds;
+- install a :class:`GCMonitor`, which times every collection and records the
+  pauses in a histogram per generation (exported as the
+  ``katsdp_gc_pause_seconds`` metric), and logs unusually slow pauses.
+
+The statistics are also available from the ``gc`` command in aiomonitor.
+"""
+
+import gc
+import logging
+import time
+
+from .aiomonitor import register_monitor_command
+from .metrics import REGISTRY, Histogram
+
+
+PAUSE_BUCKETS = (0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+                 0.1, 0.2, 0.5, 1.0)
+"""Upper bounds (in seconds) of the pause histogram buckets."""
+
+_logger = logging.getLogger(__name__)
+_monitor = None
+"""Monitor installed by :func:`setup_gc`."""
+
+
+class GCMonitor:
+    """Measure garbage collection pauses.
+
+    Parameters
+    ----------
+    slow_pause : float, optional
+        Pauses longer than this (in seconds) are logged as warnings
+    registry : :class:`~.Registry`, optional
+        Registry to which the pause histograms are added (``None`` to not
+        register them)
+    """
+    def __init__(self, slow_pause=0.05, registry=REGISTRY):
+        self.slow_pause = slow_pause
+        self.slow_pauses = 0
+        self.histograms = [
+            Histogram('katsdp_gc_pause_seconds', 'Duration of garbage collection pauses',
+                      labels={'generation': str(generation)}, registry=registry,
+                      buckets=PAUSE_BUCKETS)
+            for generation in range(3)
+        ]
+        self._registry = registry
+        self._start = None
+
+    def _callback(self, phase, info):
+        if phase == 'start':
+            self._start = time.perf_counter()
+        elif self._start is not None:
+            duration = time.perf_counter() - self._start
+            self._start = None
+            generation = info['generation']
+            self.histograms[generation].observe(duration)
+            if duration >= self.slow_pause:
+                self.slow_pauses += 1
+                _logger.warning(
+                    'Garbage collection of generation %d took %.3f s '
+                    '(%d collected, %d uncollectable)',
+                    generation, duration, info['collected'], info['uncollectable'])
+
+    def start(self):
+        """Start timing collections."""
+        if self._callback not in gc.callbacks:
+            gc.callbacks.append(self._callback)
+
+    def close(self):
+        """Stop timing collections and unregister the histograms."""
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+        if self._registry is not None:
+            for histogram in self.histograms:
+                self._registry.unregister(histogram)
+
+    def stats(self):
+        """Get the pause statistics.
+
+        Returns
+        -------
+        stats : list of dict
+            One dictionary per generation, with keys ``count``, ``sum``
+            (total pause time in seconds), ``buckets`` (list of (upper bound,
+            cumulative count) pairs) and ``threshold``
+        """
+        thresholds = gc.get_threshold()
+        return [
+            {
+                'count': histogram.count,
+                'sum': histogram.sum,
+                'buckets': histogram.cumulative_counts(),
+                'threshold': thresholds[generation]
+            }
+            for generation, histogram in enumerate(self.histograms)
+        ]
+
+    def report(self):
+        """Get a human-readable summary of the statistics."""
+        lines = ['Frozen objects: {}'.format(gc.get_freeze_count())]
+        for generation, stats in enumerate(self.stats()):
+            mean = stats['sum'] / stats['count'] if stats['count'] else 0.0
+            lines.append(
+                'Generation {}: threshold {}, {} collections, {:.3f} s total, '
+                '{:.3f} ms mean'.format(generation, stats['threshold'], stats['count'],
+                                        stats['sum'], mean * 1000))
+        lines.append('Slow pauses (>= {:.3f} s): {}'.format(self.slow_pause, self.slow_pauses))
+        return '\n'.join(lines)
+
+
+def get_gc_monitor():
+    """Get the :class:`GCMonitor` installed by :func:`setup_gc`, or ``None``."""
+    return _monitor
+
+
+def setup_gc(freeze=False, thresholds=None, slow_pause=0.05):
+    """Tune the garbage collector and start monitoring pauses.
+
+    This may be called more than once, in which case the previous monitor is
+    replaced.
+
+    Parameters
+    ----------
+    freeze : bool, optional
+        Collect garbage and then move all surviving objects to the permanent
+        generation, so that they are ignored by future collections
+    thresholds : sequence of int, optional
+        Collection thresholds to pass to :func:`gc.set_threshold`
+    slow_pause : float, optional
+        Pauses longer than this (in seconds) are logged as warnings
+
+    Returns
+    -------
+    monitor : :class:`GCMonitor`
+        The installed monitor
+    """
+    global _monitor
+    if thresholds is not None:
+        gc.set_threshold(*thresholds)
+    if freeze:
+        gc.collect()
+        gc.freeze()
+        _logger.info('Froze %d objects in the startup heap', gc.get_freeze_count())
+    if _monitor is not None:
+        _monitor.close()
+    _monitor = GCMonitor(slow_pause)
+    _monitor.start()
+    return _monitor
+
+
+def _parse_thresholds(text):
+    thresholds = [int(part) for part in text.split(',')]
+    if not 1 <= len(thresholds) <= 3:
+        raise ValueError('Between 1 and 3 thresholds must be given')
+    return thresholds
+
+
+def add_gc_arguments(parser):
+    """Add a set of arguments for tuning the garbage collector.
+
+    See :func:`.apply_gc_options` for details.
+
+    Parameters
+    ----------
+    parser : :class:`argparse.ArgumentParser`
+        Parser to which arguments will be added.
+    """
+    parser.add_argument(
+        '--gc-freeze', action='store_true', default=False,
+        help='exclude objects created during startup from garbage collection')
+    parser.add_argument(
+        '--gc-thresholds', type=_parse_thresholds, metavar='T0[,T1[,T2]]',
+        help='garbage collection thresholds [Python defaults]')
+    parser.add_argument(
+        '--gc-slow-pause', type=float, default=0.05, metavar='SECONDS',
+        help='log garbage collection pauses longer than this [%(default)s]')
+
+
+def apply_gc_options(args):
+    """Apply the options added by :func:`add_gc_arguments` with :func:`setup_gc`."""
+    return setup_gc(freeze=args.gc_freeze, thresholds=args.gc_thresholds,
+                    slow_pause=args.gc_slow_pause)
+
+
+def _monitor_command():
+    if _monitor is None:
+        return 'Garbage collection monitoring is not enabled'
+    return _monitor.report()
+
+
+register_monitor_command('gc', _monitor_command, 'Show garbage collection pause statistics')
@@ -0,0 +1,536 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""GELF logging over UDP, with background name resolution and spooling.
+
+:class:`GelfUdpHandler` is installed by :func:`~katsdpservices.setup_logging`
+when ``KATSDP_LOG_GELF_ADDRESS`` is set. It extends the handler from
+:mod:`pygelf` in two ways.
+
+Firstly, the host name of the server is resolved by a background thread, so
+that a slow or broken DNS server does not hold up startup. The constructor
+waits only briefly for the first resolution, and records emitted before it
+completes are held back and sent once it does. The name is resolved again
+periodically and after errors, so that the server can move; a change of
+address is logged.
+
+Secondly, records can be spooled while the server is unreachable. If a
+:class:`SpoolRing` (a bounded ring buffer in a memory-mapped file) is
+provided, the handler sends to a connected UDP socket, so that the ICMP
+"port unreachable" replies sent while the log server is down are reported
+as errors (:exc:`ConnectionRefusedError`) on subsequent sends. Once an
+error has been seen, records are appended to the spool instead of being
+sent, which costs no more than a memory copy. Another thread periodically probes
+the server with the oldest spooled record, and once it is reachable again,
+replays the spool at a limited rate so as not to flood the server. To keep
+records in order, new records are also appended to the spool until it has
+drained, so the replay rate should be higher than the usual logging rate.
+This is enabled by setting ``KATSDP_LOG_GELF_SPOOL``.
+
+Since UDP has no acknowledgements, this cannot detect every outage: the
+record that provoked the first error is lost, as are records sent to a host
+that is down entirely (and hence does not reply at all).
+
+The handler survives :func:`os.fork`: in the child, its locks are replaced
+and the background thread is started again. The spool is left to the parent
+(which keeps replaying it), so the child sends without spooling, and
+records that the parent was holding back are left for the parent to send.
+The background threads block all signals, so that they do not interfere
+with processes that use :func:`signal.sigwait` (such as the supervisor in
+:func:`~katsdpservices.restart.run_with_standby`).
+"""
+
+import collections
+import logging
+import mmap
+import os
+import signal
+import socket
+import struct
+import threading
+import weakref
+
+import pygelf
+import pygelf.gelf
+
+from . import tracing
+
+
+_logger = logging.getLogger(__name__)
+#: Open instances of :class:`GelfUdpHandler`, to fix up after a fork
+_handlers = weakref.WeakSet()
+
+
+def resolve(host, port):
+    """Resolve a host name to an IPv4 address.
+
+    This is the default resolver for :class:`GelfUdpHandler`. It is restricted
+    to IPv4 since it's not clear if pygelf can handle IPv6 (due to
+    https://bugs.python.org/issue14855).
+
+    Returns
+    -------
+    address : tuple
+        IP address and port
+
+    Raises
+    ------
+    OSError
+        if the name could not be resolved
+    """
+    for res in socket.getaddrinfo(host, port, family=socket.AF_INET,
+                                  type=socket.SOCK_DGRAM, proto=socket.IPPROTO_UDP):
+        return res[4][:2]
+    raise OSError('No IPv4 address found for {}'.format(host))
+
+
+class SpoolRing:
+    """Bounded first-in, first-out queue of byte strings, stored in a memory-mapped file.
+
+    When there is not enough space for a new entry, the oldest entries are
+    discarded. The contents survive the process (and are picked up again
+    by the next process to open the file with the same capacity). The
+    methods are thread-safe.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file, which is created if necessary
+    capacity : int
+        Number of bytes available for entries (each entry has an overhead of
+        4 bytes)
+    """
+    MAGIC = b'KSDPSPL1'
+    _HEADER = struct.Struct('<8sQQQQ')     # magic, capacity, head, tail, count
+    _LENGTH = struct.Struct('<I')
+
+    def __init__(self, path, capacity):
+        if capacity <= self._LENGTH.size:
+            raise ValueError('capacity is too small')
+        self.path = path
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        size = self._HEADER.size + capacity
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, old_capacity, head, tail, count = self._HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or old_capacity != capacity or not 0 <= tail - head <= capacity:
+            head = tail = count = 0
+        self._head = head
+        self._tail = tail
+        self._count = count
+        self._update_header()
+
+    def _update_header(self):
+        self._HEADER.pack_into(self._map, 0, self.MAGIC, self.capacity,
+                               self._head, self._tail, self._count)
+
+    def _copy_in(self, pos, data):
+        offset = pos % self.capacity
+        first = min(len(data), self.capacity - offset)
+        start = self._HEADER.size + offset
+        self._map[start:start + first] = data[:first]
+        if first < len(data):
+            rest = len(data) - first
+            self._map[self._HEADER.size:self._HEADER.size + rest] = data[first:]
+
+    def _copy_out(self, pos, size):
+        offset = pos % self.capacity
+        first = min(size, self.capacity - offset)
+        start = self._HEADER.size + offset
+        data = self._map[start:start + first]
+        if first < size:
+            data += self._map[self._HEADER.size:self._HEADER.size + size - first]
+        return data
+
+    def _drop(self):
+        length, = self._LENGTH.unpack(self._copy_out(self._head, self._LENGTH.size))
+        self._head += self._LENGTH.size + length
+        self._count -= 1
+
+    def append(self, data):
+        """Add an entry, discarding old ones if necessary to make space.
+
+        Returns
+        -------
+        discarded : int
+            Number of old entries that were discarded
+
+        Raises
+        ------
+        ValueError
+            if the entry is larger than the capacity
+        """
+        needed = self._LENGTH.size + len(data)
+        if needed > self.capacity:
+            raise ValueError('entry of {} bytes does not fit in the spool'.format(len(data)))
+        discarded = 0
+        with self._lock:
+            while self.capacity - (self._tail - self._head) < needed:
+                self._drop()
+                discarded += 1
+            self._copy_in(self._tail, self._LENGTH.pack(len(data)))
+            self._copy_in(self._tail + self._LENGTH.size, data)
+            self._tail += needed
+            self._count += 1
+            self._update_header()
+        return discarded
+
+    def peek(self):
+        """Get the oldest entry without removing it, or ``None`` if empty."""
+        with self._lock:
+            if not self._count:
+                return None
+            length, = self._LENGTH.unpack(self._copy_out(self._head, self._LENGTH.size))
+            return self._copy_out(self._head + self._LENGTH.size, length)
+
+    def pop(self):
+        """Remove the oldest entry (if any)."""
+        with self._lock:
+            if self._count:
+                self._drop()
+                if not self._count:
+                    # Start again at the beginning, for tidiness
+                    self._head = self._tail = 0
+                self._update_header()
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        with self._lock:
+            if not self._map.closed:
+                self._map.flush()
+                self._map.close()
+
+
+class GelfUdpHandler(pygelf.GelfUdpHandler):
+    """GELF UDP handler that resolves the server address in the background and
+    spools records while the server is unreachable.
+
+    The statistics are available as attributes:
+
+    spooled
+        Number of records that were added to the spool
+    replayed
+        Number of spooled records that were subsequently sent
+    discarded
+        Number of records that could not be sent or spooled, or that were
+        discarded from the spool (or the in-memory buffer used until the
+        address is first resolved) to make space for newer ones
+
+    Parameters
+    ----------
+    host, port
+        Address of the server
+    spool : :class:`SpoolRing`, optional
+        Spool for undeliverable records. If not specified, the socket is not
+        connected, so (as for :class:`pygelf.GelfUdpHandler`) ICMP errors are
+        ignored, and records that cannot be sent are discarded (but
+        counted). The handler takes ownership of the spool.
+    replay_rate : float, optional
+        Maximum rate (in records per second) at which to replay spooled
+        records. Records logged while the spool is being replayed are added
+        to it, so this also limits the rate of logging until it has drained.
+    retry_interval : float, optional
+        Interval (in seconds) between probes while the server is unreachable,
+        and between attempts to resolve `host` while it cannot be resolved. The
+        name is also not re-resolved more often than this after send errors.
+    resolver : callable, optional
+        Function that takes `host` and `port` and returns the address to send
+        to, or raises :exc:`OSError`. It defaults to :func:`resolve`.
+    resolve_timeout : float, optional
+        Time (in seconds) for which the constructor waits for `host` to be
+        resolved
+    resolve_interval : float, optional
+        Interval (in seconds) at which to resolve `host` again
+    pending_size : int, optional
+        Maximum number of records to hold in memory until `host` is first
+        resolved (only used if there is no spool)
+    **kwargs
+        Passed to :class:`pygelf.GelfUdpHandler`
+    """
+    def __init__(self, host, port, spool=None, replay_rate=100.0, retry_interval=5.0,
+                 resolver=resolve, resolve_timeout=1.0, resolve_interval=60.0,
+                 pending_size=1000, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = None      # Not resolved yet
+        self.spool = spool
+        self.replay_rate = replay_rate
+        self.retry_interval = retry_interval
+        self.resolve_interval = resolve_interval
+        self.spooled = 0
+        self.replayed = 0
+        self.discarded = 0
+        self._resolver = resolver
+        self._pending = collections.deque()
+        self._pending_size = pending_size
+        self._first_attempt = threading.Event()
+        self._refresh = False
+        self._down = False
+        self._sock_lock = threading.Lock()
+        self._cond = threading.Condition(threading.Lock())
+        self._closing = False
+        self._threads = []
+        self._start_threads()
+        _handlers.add(self)
+        self._first_attempt.wait(resolve_timeout)
+
+    def _start_threads(self):
+        self._threads = [threading.Thread(target=self._run_resolver, name='gelf-resolver')]
+        if self.spool is not None:
+            self._threads.append(
+                threading.Thread(target=self._run_replayer, name='gelf-replayer'))
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def _after_fork(self):
+        """Make the handler usable in a forked child.
+
+        Only the forking thread exists in the child, so locks held by the
+        other threads would never be released, and the background threads
+        have to be started again.
+        """
+        self._sock_lock = threading.Lock()
+        self._cond = threading.Condition(threading.Lock())
+        self._first_attempt = threading.Event()
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        # The spool is shared with the parent, whose replayer owns it. Merely
+        # drop the reference, since closing it would take its lock.
+        self.spool = None
+        self._down = False
+        self._refresh = False
+        # The parent will send these
+        self._pending.clear()
+        self.spooled = 0
+        self.replayed = 0
+        self.discarded = 0
+        self._start_threads()
+
+    def makeSocket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if self.spool is not None:
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                raise
+        return sock
+
+    def _get_socket(self):
+        with self._sock_lock:
+            if self.sock is None:
+                self.sock = self.makeSocket()
+            return self.sock
+
+    def _send(self, data):
+        sock = self._get_socket()
+        if len(data) <= self.chunk_size:
+            chunks = [data]
+        else:
+            chunks = pygelf.gelf.split(data, self.chunk_size)
+        if self.spool is not None:
+            for chunk in chunks:
+                sock.send(chunk)
+        else:
+            address = self.address
+            for chunk in chunks:
+                sock.sendto(chunk, address)
+
+    def _spool(self, data):
+        if self.spool is None:
+            self.discarded += 1
+            return
+        try:
+            self.discarded += self.spool.append(data)
+        except ValueError:
+            self.discarded += 1
+        else:
+            self.spooled += 1
+            with self._cond:
+                self._cond.notify_all()
+
+    def _send_or_spool(self, data):
+        try:
+            self._send(data)
+        except OSError:
+            # Without a spool, there is nothing to replay, so don't mark the
+            # server as down (the next record may get through).
+            if self.spool is not None:
+                self._down = True
+            self._spool(data)
+            # The server may have moved
+            with self._cond:
+                self._refresh = True
+                self._cond.notify_all()
+
+    def send(self, s):
+        # The caller holds self.lock
+        if self.address is None:
+            if self.spool is not None:
+                self._spool(s)
+            else:
+                if len(self._pending) >= self._pending_size:
+                    self._pending.popleft()
+                    self.discarded += 1
+                self._pending.append(s)
+        elif self._down or (self.spool is not None and len(self.spool)):
+            # Queue behind the records still to be replayed, to keep them in order
+            self._spool(s)
+        else:
+            self._send_or_spool(s)
+
+    def _set_address(self, address):
+        if address == self.address:
+            return
+        with self.lock:
+            old_address = self.address
+            with self._sock_lock:
+                self.address = address
+                if self.sock is not None:
+                    self.sock.close()
+                    self.sock = None
+            self._down = False
+            # Send the records held back until the address was known. This
+            # is done with the lock held so that they precede new records.
+            while self._pending:
+                self._send_or_spool(self._pending.popleft())
+        with self._cond:
+            self._cond.notify_all()
+        if old_address is not None:
+            _logger.info('GELF destination changed from %s:%d to %s:%d',
+                         *old_address, *address)
+
+    def _wait(self, timeout):
+        """Sleep (unless closing). Returns true if the handler is closing."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._closing, timeout)
+
+    def _run_resolver(self):
+        _block_signals()
+        span = tracing.span('gelf resolve', host=self.host)
+        failing = False
+        while True:
+            try:
+                address = tuple(self._resolver(self.host, self.port))
+            except OSError as exc:
+                if not failing:
+                    _logger.warning('Could not resolve GELF host %s (will retry): %s',
+                                    self.host, exc)
+                failing = True
+                interval = min(self.retry_interval, self.resolve_interval)
+            else:
+                failing = False
+                self._set_address(address)
+                interval = self.resolve_interval
+            if span is not None:
+                span.end()
+                span = None
+                self._first_attempt.set()
+            # Don't re-resolve more often than retry_interval, even on errors
+            min_interval = min(self.retry_interval, interval)
+            if self._wait(min_interval):
+                return
+            with self._cond:
+                self._cond.wait_for(lambda: self._closing or self._refresh,
+                                    interval - min_interval)
+                if self._closing:
+                    return
+                self._refresh = False
+
+    def _probe(self, data):
+        """Send `data` and check whether an error is reported for it.
+
+        Returns true if the server appears to be reachable.
+        """
+        # The lock prevents _set_address from replacing the socket meanwhile
+        with self.lock:
+            try:
+                sock = self._get_socket()
+                sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)   # Clear any stale error
+                self._send(data)
+            except OSError:
+                sock = None
+        if sock is None:
+            self._wait(self.retry_interval)
+            return False
+        if self._wait(self.retry_interval):
+            return False
+        with self.lock:
+            if sock is not self.sock:
+                return False    # The address changed, so probe the new one
+            return sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+
+    def _run_replayer(self):
+        _block_signals()
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closing or (len(self.spool) and self.address is not None))
+                if self._closing:
+                    return
+            data = self.spool.peek()
+            if self._down:
+                if self._probe(data):
+                    self.spool.pop()
+                    self.replayed += 1
+                    self._down = False
+                continue
+            with self.lock:
+                try:
+                    self._send(data)
+                except OSError:
+                    self._down = True
+                    continue
+                self.spool.pop()
+                self.replayed += 1
+            if self._wait(1.0 / self.replay_rate):
+                return
+
+    def close(self):
+        _handlers.discard(self)
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.spool is not None:
+            self.spool.close()
+        self.discarded += len(self._pending)
+        self._pending.clear()
+        super().close()
+
+
+def _block_signals():
+    """Block all signals in the calling thread, so that they go to the main thread."""
+    signal.pthread_sigmask(signal.SIG_BLOCK, signal.valid_signals())
+
+
+def _after_fork_in_child():
+    for handler in list(_handlers):
+        handler._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
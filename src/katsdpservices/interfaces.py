@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -16,12 +16,23 @@
 
 """Simple utility functions to access information about network interfaces.
 
-This is a simple wrapper around :mod:`netifaces`.
+This is mostly a simple wrapper around :mod:`netifaces`, together with a
+helper for creating sockets to receive (multicast) data on an interface.
 """
 
+import logging
+import socket
+
 import netifaces
 
 
+_logger = logging.getLogger(__name__)
+# Linux socket options that the socket module doesn't define
+_SO_RCVBUFFORCE = getattr(socket, 'SO_RCVBUFFORCE', 33)
+_SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46)
+_RMEM_MAX_PATH = '/proc/sys/net/core/rmem_max'
+
+
 def get_interface_address(interface):
     """Obtain the IPv4 address of a network interface.
 
@@ -51,3 +62,102 @@ def get_interface_address(interface):
             return netifaces.ifaddresses(interface)[netifaces.AF_INET][0]['addr']
         except (IndexError, KeyError):
             raise ValueError('No IPv4 address found for interface ' + interface)
+
+
+def _rmem_max():
+    """Get ``net.core.rmem_max``, or ``None`` if it cannot be read."""
+    try:
+        with open(_RMEM_MAX_PATH) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _set_receive_buffer(sock, buffer_size, interface):
+    try:
+        # Not limited by net.core.rmem_max, but requires CAP_NET_ADMIN
+        sock.setsockopt(socket.SOL_SOCKET, _SO_RCVBUFFORCE, buffer_size)
+    except OSError:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)
+    # Linux doubles the value to allow for bookkeeping overhead
+    actual = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) // 2
+    if actual < buffer_size:
+        rmem_max = _rmem_max()
+        _logger.warning(
+            'Receive buffer on %s is only %d bytes (requested %d): increase '
+            'net.core.rmem_max (currently %s) or grant CAP_NET_ADMIN',
+            interface, actual, buffer_size, 'unknown' if rmem_max is None else rmem_max,
+            extra={'buffer_size': buffer_size, 'actual_buffer_size': actual,
+                   'rmem_max': rmem_max})
+    return actual
+
+
+def create_receive_socket(interface, groups=(), port=0, buffer_size=None, busy_poll=None,
+                          sock=None):
+    """Create a UDP socket for receiving data on a network interface.
+
+    Failing to achieve the requested buffer size (typically because
+    ``net.core.rmem_max`` is too small and the process lacks
+    ``CAP_NET_ADMIN``) or to enable busy polling is logged as a warning
+    rather than raising an exception.
+
+    Parameters
+    ----------
+    interface : str
+        Name of the network interface. It may be ``None`` to receive on all
+        interfaces (and join multicast groups on the default interface).
+    groups : sequence of str, optional
+        Multicast groups (dotted-quad IPv4 addresses) to subscribe to
+    port : int, optional
+        UDP port to bind to (ignored if `sock` is given)
+    buffer_size : int, optional
+        Size of the socket receive buffer in bytes. If not specified, the
+        system default is used.
+    busy_poll : int, optional
+        If specified, set ``SO_BUSY_POLL`` to this number of microseconds
+    sock : :class:`socket.socket`, optional
+        Existing (IPv4 UDP) socket to configure instead of creating a new one.
+        It is not bound.
+
+    Returns
+    -------
+    sock : :class:`socket.socket`
+        The new socket, or `sock` if it was given
+
+    Raises
+    ------
+    ValueError
+        if the interface does not exist or does not have an IPv4 address
+    OSError
+        if the socket could not be created, bound or subscribed to the groups
+    """
+    address = get_interface_address(interface)
+    new = sock is None
+    if new:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    try:
+        if buffer_size is not None:
+            _set_receive_buffer(sock, buffer_size, interface)
+        if busy_poll is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, busy_poll)
+            except OSError as exc:
+                _logger.warning('Could not set SO_BUSY_POLL on %s: %s', interface, exc)
+        if address is not None:
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                            socket.inet_aton(address))
+        if new:
+            if groups:
+                # Allow other processes to receive from the same groups
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind(('', port))
+            else:
+                sock.bind((address or '', port))
+        for group in groups:
+            mreq = socket.inet_aton(group) + socket.inet_aton(address or '0.0.0.0')
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+    except BaseException:
+        if new:
+            sock.close()
+        raise
+    return sock
@@ -0,0 +1,258 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Buffered logging to a file, with size-based rotation.
+
+:class:`BufferedFileHandler` is installed by
+:func:`~katsdpservices.setup_logging` when ``KATSDP_LOG_FILE`` is set. Unlike
+:class:`logging.FileHandler`, it does not write each record as it is
+emitted. Formatted records are collected in memory and written with a single
+vectored write (:func:`os.writev`) by a background thread, either
+periodically or once enough data has accumulated. Records at or above a
+given level (ERROR by default) are written immediately, so that they are not
+lost if the process dies.
+
+The file is opened with ``O_APPEND``, so several processes may safely log to
+the same file (although only one of them should rotate it). When the file
+exceeds a size limit, the background thread renames it to a segment with a
+timestamp suffix and opens a new file. Segments are compressed with gzip and
+old segments are deleted by another thread, so that the emitting threads are
+never blocked by rotation.
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+
+_logger = logging.getLogger(__name__)
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+
+
+class BufferedFileHandler(logging.Handler):
+    """Handler that writes to a file through a large in-memory buffer.
+
+    Parameters
+    ----------
+    path : str
+        Path of the log file
+    buffer_size : int, optional
+        Number of bytes to accumulate before waking the background thread to
+        write them
+    flush_interval : float, optional
+        Maximum time (in seconds) that a record is kept in memory
+    flush_level : int, optional
+        Records at or above this level are written immediately, together
+        with anything already buffered
+    max_bytes : int, optional
+        If non-zero, rotate the file once it is at least this large
+    backup_count : int, optional
+        Number of rotated segments to keep (0 to keep all of them)
+    compress : bool, optional
+        If true, compress rotated segments with gzip
+    """
+    def __init__(self, path, buffer_size=1024 * 1024, flush_interval=1.0,
+                 flush_level=logging.ERROR, max_bytes=0, backup_count=10, compress=True):
+        super().__init__()
+        self.path = os.path.abspath(path)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self._pending = []
+        self._pending_bytes = 0
+        # Serialises writes and rotation. The handler's own lock (held by
+        # callers of emit) only protects _pending, so that emitting threads
+        # are not blocked by I/O.
+        self._io_lock = threading.Lock()
+        self._fd = self._open()
+        self._size = os.fstat(self._fd).st_size
+        self._wake = threading.Condition(threading.Lock())
+        self._closing = False
+        self._segments = []
+        self._segments_cond = threading.Condition(threading.Lock())
+        self._flusher = threading.Thread(target=self._run_flusher, name='log-file-flusher')
+        self._flusher.daemon = True
+        self._flusher.start()
+        self._housekeeper = threading.Thread(target=self._run_housekeeper,
+                                             name='log-file-housekeeper')
+        self._housekeeper.daemon = True
+        self._housekeeper.start()
+
+    def _open(self):
+        return os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644)
+
+    def emit(self, record):
+        try:
+            data = (self.format(record) + '\n').encode('utf-8', errors='backslashreplace')
+        except Exception:
+            self.handleError(record)
+            return
+        # The caller holds self.lock
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        if record.levelno >= self.flush_level or self._pending_bytes >= 2 * self.buffer_size:
+            # Either the record is important, or the background thread is not
+            # keeping up and the buffer must not grow without bound.
+            try:
+                self._write(self._take())
+            except OSError:
+                self.handleError(record)
+        elif self._pending_bytes >= self.buffer_size:
+            with self._wake:
+                self._wake.notify()
+
+    def _take(self):
+        """Remove and return the buffered data. The caller must hold self.lock."""
+        pending = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        return pending
+
+    def _write(self, chunks):
+        with self._io_lock:
+            if self._fd is None:
+                return
+            i = 0
+            while i < len(chunks):
+                written = os.writev(self._fd, chunks[i:i + _IOV_MAX])
+                self._size += written
+                # Skip over whatever was written, allowing for partial writes
+                while written > 0:
+                    if written >= len(chunks[i]):
+                        written -= len(chunks[i])
+                        i += 1
+                    else:
+                        chunks[i] = chunks[i][written:]
+                        written = 0
+
+    def flush(self):
+        """Write all buffered records to the file."""
+        with self.lock:
+            chunks = self._take()
+        if chunks:
+            self._write(chunks)
+
+    def _segment_path(self):
+        now = time.time()
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))
+        stamp += '.{:06d}'.format(int(now % 1 * 1000000))
+        path = '{}.{}'.format(self.path, stamp)
+        suffix = 0
+        while os.path.exists(path) or os.path.exists(path + '.gz'):
+            suffix += 1
+            path = '{}.{}-{}'.format(self.path, stamp, suffix)
+        return path
+
+    def rotate(self):
+        """Start a new file, handing the old one to the background thread."""
+        self.flush()
+        with self._io_lock:
+            if self._fd is None:
+                return
+            segment = self._segment_path()
+            os.rename(self.path, segment)
+            old_fd = self._fd
+            self._fd = self._open()
+            self._size = os.fstat(self._fd).st_size
+            os.close(old_fd)
+        with self._segments_cond:
+            self._segments.append(segment)
+            self._segments_cond.notify()
+
+    def _run_flusher(self):
+        while True:
+            with self._wake:
+                if not self._closing:
+                    self._wake.wait(self.flush_interval)
+                closing = self._closing
+            try:
+                self.flush()
+                if self.max_bytes and self._size >= self.max_bytes:
+                    self.rotate()
+            except OSError:
+                _logger.warning('Failed to write log file %s', self.path, exc_info=True)
+            if closing:
+                break
+
+    def _compress(self, segment):
+        with open(segment, 'rb') as f_in, gzip.open(segment + '.gz', 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.unlink(segment)
+
+    def _prune(self):
+        """Delete the oldest segments if there are more than :attr:`backup_count`.
+
+        Segments that are still queued for compression are neither counted
+        nor deleted; they are considered once they have been compressed.
+        """
+        if not self.backup_count:
+            return
+        directory, base = os.path.split(self.path)
+        pattern = re.compile(re.escape(base) + r'\.(\d{8}T\d{6}\.\d{6})(?:-(\d+))?(?:\.gz)?$')
+        with self._segments_cond:
+            queued = {os.path.basename(segment) for segment in self._segments}
+        segments = []
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match and name not in queued:
+                # Sort collision suffixes numerically, after the unsuffixed name
+                segments.append((match.group(1), int(match.group(2) or 0), name))
+        segments.sort()
+        for _, _, name in segments[:-self.backup_count]:
+            os.unlink(os.path.join(directory, name))
+
+    def _run_housekeeper(self):
+        while True:
+            with self._segments_cond:
+                while not self._segments and not self._closing:
+                    self._segments_cond.wait()
+                if not self._segments:
+                    break
+                segment = self._segments.pop(0)
+            try:
+                if self.compress:
+                    self._compress(segment)
+                self._prune()
+            except OSError:
+                _logger.warning('Failed to compress or prune log segment %s', segment,
+                                exc_info=True)
+
+    def close(self):
+        if self._flusher.is_alive():
+            with self._wake:
+                self._closing = True
+                self._wake.notify()
+            self._flusher.join()
+        with self._segments_cond:
+            self._closing = True
+            self._segments_cond.notify()
+        self._housekeeper.join()
+        self.flush()
+        with self._io_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        super().close()
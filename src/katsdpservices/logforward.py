@@ -0,0 +1,382 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Forwarding of log records from child processes to the parent.
+
+A parent process calls :func:`start_log_forwarding` after
+:func:`~katsdpservices.setup_logging`. This starts a
+:class:`LogForwardServer` listening on a Unix socket, and sets the
+``KATSDP_LOG_FORWARD`` environment variable to its path. Child processes
+(which inherit the environment) that call
+:func:`~katsdpservices.setup_logging` then install only a
+:class:`ForwardingHandler`, which sends records to the parent. The parent
+passes them to its own handlers, so only the parent formats records for
+stderr and sends them to Graylog.
+
+The handler queues records in a bounded buffer and sends them in batches from
+a background thread, so that logging never blocks on the socket. If the
+buffer is full, records are dropped and counted. Records from each child
+arrive in the order they were logged.
+
+The environment variable is only meaningful while the server is running.
+:func:`~katsdpservices.restart_process` closes the servers started by the
+process (and hence removes the variable) before re-executing it, and if
+:func:`~katsdpservices.setup_logging` cannot connect to the socket, it logs
+locally instead.
+"""
+
+import atexit
+import collections
+import logging
+import multiprocessing.util
+import os
+import pickle
+import selectors
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+
+_HEADER = struct.Struct('>I')
+_logger = logging.getLogger(__name__)
+_servers = []
+"""Servers started by :func:`start_log_forwarding`."""
+
+
+def _prepare(handler, record):
+    """Convert a record to a picklable dictionary.
+
+    As for :class:`logging.handlers.QueueHandler`, the message is merged with
+    its arguments and exception information is converted to text, since
+    arbitrary objects might not be picklable.
+    """
+    data = dict(record.__dict__)
+    data['msg'] = record.getMessage()
+    data['args'] = None
+    if record.exc_info:
+        if not record.exc_text:
+            formatter = handler.formatter or logging.Formatter()
+            data['exc_text'] = formatter.formatException(record.exc_info)
+        data['exc_info'] = None
+    data.pop('message', None)
+    return data
+
+
+def _pickle_batch(batch):
+    try:
+        return pickle.dumps(batch, pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # Some extra attribute can't be pickled: convert the values in the
+        # offending records to strings
+        safe = []
+        for data in batch:
+            try:
+                pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                data = {key: value if isinstance(value, (str, int, float, type(None)))
+                        else repr(value)
+                        for key, value in data.items()}
+            safe.append(data)
+        return pickle.dumps(safe, pickle.HIGHEST_PROTOCOL)
+
+
+def _connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def check_server(path):
+    """Check that a :class:`LogForwardServer` is listening on `path`.
+
+    Raises
+    ------
+    OSError
+        if it is not possible to connect to the socket
+    """
+    _connect(path).close()
+
+
+class ForwardingHandler(logging.Handler):
+    """Handler that forwards records to a :class:`LogForwardServer`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the server's Unix socket
+    capacity : int, optional
+        Maximum number of records to buffer. Further records are dropped
+        (and counted in :attr:`dropped`) until there is space again.
+    batch_size : int, optional
+        Maximum number of records to send in one message
+    """
+    def __init__(self, path, capacity=10000, batch_size=256):
+        super().__init__()
+        self.path = path
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._in_flight = 0
+        self._closing = False
+        self._sock = None
+        self._thread = threading.Thread(target=self._run, name='log-forwarder')
+        self._thread.daemon = True
+        self._thread.start()
+        # Processes started by multiprocessing exit without running atexit
+        # handlers, but do run finalizers.
+        multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+
+    def emit(self, record):
+        try:
+            data = _prepare(self, record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._cond:
+            if len(self._queue) >= self.capacity:
+                self.dropped += 1
+                return
+            self._queue.append(data)
+            if len(self._queue) == 1:
+                self._cond.notify_all()
+
+    def _connect(self):
+        return _connect(self.path)
+
+    def _send(self, batch):
+        payload = _pickle_batch(batch)
+        message = _HEADER.pack(len(payload)) + payload
+        delay = 0.01
+        while True:
+            try:
+                if self._sock is None:
+                    self._sock = self._connect()
+                self._sock.sendall(message)
+                return True
+            except OSError:
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+                if self._closing:
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                batch = [self._queue.popleft()
+                         for i in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+            sent = self._send(batch)
+            with self._cond:
+                if not sent:
+                    self.dropped += len(batch)
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Wait until all queued records have been sent, or `timeout` expires."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    break
+                self._cond.wait(remaining)
+
+    def close(self):
+        if self._thread.is_alive():
+            self.flush()
+            with self._cond:
+                self._closing = True
+                self._cond.notify_all()
+            self._thread.join()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        super().close()
+
+
+class LogForwardServer:
+    """Receive records from :class:`ForwardingHandler` in other processes.
+
+    Received records are passed to the logger named by the record, and hence
+    to the handlers of this process. The server runs in a daemon thread.
+
+    Records are unpickled, so anything that can connect to the socket can
+    run arbitrary code in this process. The socket is only accessible to the
+    user running the process (mode 0600).
+
+    Parameters
+    ----------
+    path : str, optional
+        Path for the Unix socket. If not specified, a private temporary
+        directory is created to hold it. If specified, it must be in a
+        directory where untrusted users cannot create or replace files.
+    """
+    def __init__(self, path=None):
+        self._tmpdir = None
+        self._closed = False
+        if path is None:
+            self._tmpdir = tempfile.mkdtemp(prefix='katsdp-log-')
+            path = os.path.join(self._tmpdir, 'log.sock')
+        self.path = path
+        self._pid = os.getpid()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(path)
+        # Restrict access before listening, so that nobody else can connect
+        # in the meantime
+        os.chmod(path, 0o600)
+        self._sock.listen()
+        self._sock.setblocking(False)
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._sock, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._thread = threading.Thread(target=self._run, name='log-forward-server')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _handle_batch(self, payload):
+        for data in pickle.loads(payload):
+            record = logging.makeLogRecord(data)
+            if record.name == 'root':
+                logger = logging.root
+            else:
+                logger = logging.getLogger(record.name)
+            logger.handle(record)
+
+    def _receive(self, conn, buffer):
+        data = conn.recv(65536)
+        if not data:
+            self._selector.unregister(conn)
+            conn.close()
+            return
+        buffer += data
+        while len(buffer) >= _HEADER.size:
+            length = _HEADER.unpack_from(buffer)[0]
+            if len(buffer) < _HEADER.size + length:
+                break
+            payload = bytes(buffer[_HEADER.size:_HEADER.size + length])
+            del buffer[:_HEADER.size + length]
+            try:
+                self._handle_batch(payload)
+            except Exception:
+                _logger.exception('Failed to handle forwarded log records')
+
+    def _run(self):
+        while True:
+            for key, events in self._selector.select():
+                if key.fileobj is self._wake_r:
+                    return
+                elif key.fileobj is self._sock:
+                    try:
+                        conn, _ = self._sock.accept()
+                    except BlockingIOError:
+                        continue
+                    conn.setblocking(False)
+                    self._selector.register(conn, selectors.EVENT_READ, bytearray())
+                else:
+                    try:
+                        self._receive(key.fileobj, key.data)
+                    except OSError:
+                        self._selector.unregister(key.fileobj)
+                        key.fileobj.close()
+
+    def close(self):
+        """Stop the server, and remove the socket.
+
+        If ``KATSDP_LOG_FORWARD`` refers to this server, it is removed from
+        the environment.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if os.environ.get('KATSDP_LOG_FORWARD') == self.path:
+            del os.environ['KATSDP_LOG_FORWARD']
+        if self._thread.is_alive():
+            self._wake_w.send(b'\0')
+            self._thread.join()
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()
+        self._selector.close()
+        self._wake_w.close()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+        else:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def start_log_forwarding(path=None):
+    """Start receiving log records from child processes.
+
+    This starts a :class:`LogForwardServer` and sets ``KATSDP_LOG_FORWARD``
+    in the environment, so that child processes started afterwards forward
+    their records to it when they call :func:`~katsdpservices.setup_logging`.
+    The server is closed at exit, or can be closed explicitly.
+
+    Parameters
+    ----------
+    path : str, optional
+        Path for the Unix socket. It must not be reachable by untrusted users
+        (see :class:`LogForwardServer`).
+
+    Returns
+    -------
+    server : :class:`LogForwardServer`
+    """
+    server = LogForwardServer(path)
+    os.environ['KATSDP_LOG_FORWARD'] = server.path
+    atexit.register(server.close)
+    _servers.append(server)
+    return server
+
+
+def _before_exec():
+    """Close the servers started by this process, before it is re-executed.
+
+    atexit handlers do not run on exec, so otherwise ``KATSDP_LOG_FORWARD``
+    would survive into the new process image and refer to a socket that no
+    longer exists. Servers inherited from a parent process (across a fork)
+    are left alone, since they still belong to the parent.
+    """
+    pid = os.getpid()
+    for server in [server for server in _servers if server._pid == pid]:
+        server.close()
+        _servers.remove(server)
@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -23,12 +23,44 @@ KATSDP_LOG_ONELINE: if set (to any value), newlines in log messages are escaped
 KATSDP_LOG_LEVEL: if set, it is used as the name of the log level. Otherwise,
   the log level defaults to INFO.
 KATSDP_LOG_GELF_ADDRESS: if set (to a host:port), logging is sent over UDP
-  to this address in Graylog Extended Logging Format.
+  to this address in Graylog Extended Logging Format. The host name is
+  resolved in the background, and periodically re-resolved (see
+  :mod:`katsdpservices.gelf`).
 KATSDP_LOG_GELF_LOCALNAME: if set, this overrides the local system name used
   in GELF log messages
 KATSDP_LOG_GELF_EXTRA: set to a JSON dictionary (containing only strings and
   numbers, and with keys matching ``^[\w\.\-]*$``) of extra values to pass in
   every log message.
+KATSDP_LOG_GELF_SPOOL: if set, it is the path of a file in which GELF log
+  records are spooled while the server is unreachable, to be replayed once it
+  is reachable again (see :mod:`katsdpservices.gelf`).
+KATSDP_LOG_GELF_SPOOL_SIZE: size of the spool in bytes (default 16 MiB). When
+  it is full, the oldest records are discarded.
+KATSDP_LOG_GELF_SPOOL_RATE: maximum rate (in records per second) at which
+  spooled records are replayed (default 100).
+KATSDP_LOG_FILE: if set, logging is also written to this file, through a
+  large buffer that is flushed periodically and on errors (see
+  :class:`~katsdpservices.logfile.BufferedFileHandler`).
+KATSDP_LOG_FILE_MAX_BYTES: if set (and non-zero), the log file is rotated when
+  it reaches this size. Old segments are renamed with a timestamp suffix and
+  compressed with gzip.
+KATSDP_LOG_FILE_BACKUPS: number of rotated segments to keep (default 10, or 0
+  to keep all of them).
+KATSDP_LOG_RESOURCES_INTERVAL: if set, the resource usage of the process
+  (memory, CPU time, context switches, open file descriptors and threads) is
+  logged at this interval in seconds, with the values as extra fields (see
+  :class:`~katsdpservices.resources.ResourceSampler`).
+KATSDP_LOG_FORWARD: if set, it is the path of a Unix socket on which a parent
+  process receives log records (see :mod:`katsdpservices.logforward`). Records
+  are forwarded there instead of being written to stderr or sent to Graylog,
+  and any handlers inherited from the parent are removed. It is normally set
+  by :func:`~katsdpservices.logforward.start_log_forwarding` in the parent. If
+  the socket cannot be connected to, a warning is logged and logging is
+  configured as if the variable were not set.
+KATSDP_LOG_SAMPLE: set to a JSON dictionary mapping logger names to sampling
+  configurations, which are passed as keyword arguments to
+  :func:`add_log_sampling` (e.g. ``{"spead2": {"every": 100}}`` keeps 1 in
+  100 DEBUG records from the ``spead2`` logger).
 
 A signal handler is installed that toggles debug-level logging when SIGUSR2 is
 received, and exception hooks are installed so that unhandled exceptions are
@@ -38,19 +70,24 @@ logged rather than merely printing to stderr.
 import logging
 import os
 import sys
-import re
 import time
 import signal
-import socket
 import threading
 import json
 import datetime
 
-import pygelf
+from .resources import ResourceSampler
+from .logforward import ForwardingHandler, check_server
+from .logfile import BufferedFileHandler
+from .gelf import GelfUdpHandler, SpoolRing
+from . import container
+from . import tracing
 
 
 _toggle_next_level = logging.DEBUG
 """Log level to set on next call to :func:`toggle_debug`."""
+_resource_sampler = None
+"""Sampler started by :func:`setup_logging`, if any."""
 
 
 class OnelineFormatter(logging.Formatter):
@@ -86,7 +123,114 @@ def _toggle_debug_handler(signum, frame):
     thread.start()
 
 
-def _setup_logging_stderr():
+class SamplingFilter(logging.Filter):
+    """Filter that keeps only a sample of low-severity records.
+
+    Records at or below `level` are either thinned to 1 in every `every`
+    records, or limited to `rate` records per second (with bursts of up to
+    one second's worth). Exactly one of `every` and `rate` must be given.
+    Records above `level` are always kept. The number of records discarded
+    is available as :attr:`suppressed`.
+
+    Filters run before the message is formatted, so discarded records cost
+    little more than creating the record.
+    """
+    def __init__(self, every=None, rate=None, level=logging.DEBUG):
+        super().__init__()
+        if (every is None) == (rate is None):
+            raise ValueError('Exactly one of every and rate must be specified')
+        if every is not None and every < 1:
+            raise ValueError('every must be at least 1')
+        if rate is not None and rate <= 0:
+            raise ValueError('rate must be positive')
+        self.every = every
+        self.rate = rate
+        self.level = level
+        self.suppressed = 0
+        self._seen = 0
+        self._tokens = max(rate, 1.0) if rate is not None else 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.level:
+            return True
+        with self._lock:
+            if self.every is not None:
+                keep = self._seen % self.every == 0
+                self._seen += 1
+            else:
+                now = time.monotonic()
+                self._tokens = min(self._tokens + (now - self._last) * self.rate,
+                                   max(self.rate, 1.0))
+                self._last = now
+                keep = self._tokens >= 1.0
+                if keep:
+                    self._tokens -= 1.0
+            if not keep:
+                self.suppressed += 1
+        return keep
+
+
+def add_log_sampling(name, every=None, rate=None, level=logging.DEBUG):
+    """Sample low-severity records from a logger.
+
+    This attaches a :class:`SamplingFilter` to the named logger, replacing
+    any sampling filter previously attached by this function. As with any
+    logger filter, it applies to records logged directly to that logger, but
+    not to records propagated from its descendants.
+
+    Parameters
+    ----------
+    name : str
+        Name of the logger
+    every, rate, level
+        See :class:`SamplingFilter`
+
+    Returns
+    -------
+    filter : :class:`SamplingFilter`
+    """
+    logger = logging.getLogger(name)
+    for old in list(logger.filters):
+        if isinstance(old, SamplingFilter):
+            logger.removeFilter(old)
+    filter = SamplingFilter(every=every, rate=rate, level=level)
+    logger.addFilter(filter)
+    return filter
+
+
+def log_sampling_stats():
+    """Get the number of records suppressed by sampling.
+
+    Returns
+    -------
+    suppressed : dict
+        Number of suppressed records, indexed by logger name, for all loggers
+        with sampling enabled by :func:`add_log_sampling`
+    """
+    stats = {}
+    for name, logger in list(logging.root.manager.loggerDict.items()):
+        for filter in getattr(logger, 'filters', []):
+            if isinstance(filter, SamplingFilter):
+                stats[name] = filter.suppressed
+    return stats
+
+
+def _setup_logging_sampling():
+    config = json.loads(os.environ['KATSDP_LOG_SAMPLE'])
+    if not isinstance(config, dict):
+        raise ValueError('KATSDP_LOG_SAMPLE must be a JSON dict')
+    for name, kwargs in config.items():
+        if 'level' in kwargs:
+            level = logging.getLevelName(kwargs['level'].upper())
+            if not isinstance(level, int):
+                raise ValueError('Unknown log level {!r}'.format(kwargs['level']))
+            kwargs = dict(kwargs, level=level)
+        add_log_sampling(name, **kwargs)
+
+
+def _make_formatter():
     if 'KATSDP_LOG_ONELINE' in os.environ:
         formatter_class = OnelineFormatter
     else:
@@ -95,26 +239,31 @@ def _setup_logging_stderr():
         "%(asctime)s.%(msecs)03dZ - %(filename)s:%(lineno)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%dT%H:%M:%S")
     formatter.converter = time.gmtime
+    return formatter
+
+
+def _setup_logging_stderr():
     sh = logging.StreamHandler()
-    sh.setFormatter(formatter)
+    sh.setFormatter(_make_formatter())
     logging.root.addHandler(sh)
 
 
+def _setup_logging_file():
+    handler = BufferedFileHandler(
+        os.environ['KATSDP_LOG_FILE'],
+        max_bytes=int(os.environ.get('KATSDP_LOG_FILE_MAX_BYTES', '0')),
+        backup_count=int(os.environ.get('KATSDP_LOG_FILE_BACKUPS', '10')))
+    handler.setFormatter(_make_formatter())
+    logging.root.addHandler(handler)
+
+
 def docker_container_id():
     """Find the container ID of the current container.
 
-    If not running in a container, returns ``None``.
+    If not running in a container, returns ``None``. See
+    :func:`.container.container_id`.
     """
-    regex = re.compile(':/docker/([a-f0-9]+)$')
-    try:
-        with open("/proc/self/cgroup") as f:
-            for line in f:
-                match = regex.search(line)
-                if match:
-                    return match.group(1)
-    except OSError:
-        pass
-    return None
+    return container.container_id()
 
 
 class _TimestampFilter(logging.Filter):
@@ -144,16 +293,6 @@ def _setup_logging_gelf():
     else:
         port = 12201     # Default GELF port
 
-    # Resolve the hostname once up front, to work around
-    # https://github.com/keeprocking/pygelf/issues/51. Restrict to IPv4
-    # since it's not clear if pygelf can handle IPv6 (due to
-    # https://bugs.python.org/issue14855).
-    for res in socket.getaddrinfo(
-            host, port,
-            family=socket.AF_INET, type=socket.SOCK_DGRAM, proto=socket.IPPROTO_UDP):
-        host, port = res[4][:2]
-        break
-
     localname = os.environ.get('KATSDP_LOG_GELF_LOCALNAME')
     extras = os.environ.get('KATSDP_LOG_GELF_EXTRA', '{}')
     extras = json.loads(extras)
@@ -165,15 +304,44 @@ def _setup_logging_gelf():
     if container_id is not None:
         extras['_docker.id'] = container_id
 
-    handler = pygelf.GelfUdpHandler(host, port,
-                                    debug=True, include_extra_fields=True, compress=True,
-                                    static_fields=extras)
+    spool = None
+    spool_path = os.environ.get('KATSDP_LOG_GELF_SPOOL')
+    if spool_path:
+        spool = SpoolRing(spool_path,
+                          int(os.environ.get('KATSDP_LOG_GELF_SPOOL_SIZE', 16 * 1024 * 1024)))
+    replay_rate = float(os.environ.get('KATSDP_LOG_GELF_SPOOL_RATE', '100'))
+
+    # The handler resolves the hostname itself (in the background), which
+    # also works around https://github.com/keeprocking/pygelf/issues/51.
+    handler = GelfUdpHandler(host, int(port), spool=spool, replay_rate=replay_rate,
+                             debug=True, include_extra_fields=True, compress=True,
+                             static_fields=extras)
     handler.addFilter(_TimestampFilter())
     if localname:
         handler.domain = localname
     logging.root.addHandler(handler)
 
 
+def _setup_logging_forward():
+    path = os.environ['KATSDP_LOG_FORWARD']
+    # Raises OSError if the parent is no longer listening, in which case the
+    # existing handlers are left alone.
+    check_server(path)
+    # Handlers inherited from the parent process (when forked) would write to
+    # the parent's destinations directly.
+    for handler in list(logging.root.handlers):
+        logging.root.removeHandler(handler)
+    logging.root.addHandler(ForwardingHandler(path))
+
+
+def _setup_logging_resources():
+    global _resource_sampler
+    if _resource_sampler is not None:
+        _resource_sampler.stop()
+    _resource_sampler = ResourceSampler(float(os.environ['KATSDP_LOG_RESOURCES_INTERVAL']))
+    _resource_sampler.start()
+
+
 def _sys_excepthook(exc_type, exc_value, exc_traceback):
     logging.error("Unhandled exception", exc_info=(exc_type, exc_value, exc_traceback))
 
@@ -195,18 +363,37 @@ def _threading_excepthook(args):
 
 def setup_logging(add_signal_handler=True, add_excepthook=True):
     """Prepare logging. See the module-level documentation for details."""
-    if os.environ.get('KATSDP_LOG_GELF_ADDRESS'):
-        _setup_logging_gelf()
-    _setup_logging_stderr()
-    if 'KATSDP_LOG_LEVEL' in os.environ:
-        logging.root.setLevel(os.environ['KATSDP_LOG_LEVEL'].upper())
-    else:
-        logging.root.setLevel(logging.INFO)
-    logging.captureWarnings(True)
-    if add_signal_handler:
-        signal.signal(signal.SIGUSR2, lambda signum, frame: toggle_debug())
-    if add_excepthook:
-        sys.excepthook = _sys_excepthook
-        # Only supported from Python 3.8
-        if hasattr(threading, 'excepthook'):
-            threading.excepthook = _threading_excepthook
+    with tracing.span('setup_logging'):
+        forward_error = None
+        if os.environ.get('KATSDP_LOG_FORWARD'):
+            try:
+                _setup_logging_forward()
+            except OSError as exc:
+                forward_error = exc
+        if not os.environ.get('KATSDP_LOG_FORWARD') or forward_error is not None:
+            if os.environ.get('KATSDP_LOG_GELF_ADDRESS'):
+                _setup_logging_gelf()
+            if os.environ.get('KATSDP_LOG_FILE'):
+                _setup_logging_file()
+            _setup_logging_stderr()
+        if 'KATSDP_LOG_LEVEL' in os.environ:
+            logging.root.setLevel(os.environ['KATSDP_LOG_LEVEL'].upper())
+        else:
+            logging.root.setLevel(logging.INFO)
+        if forward_error is not None:
+            logging.warning('Could not connect to log forwarding socket %s (%s), so logging '
+                            'locally', os.environ['KATSDP_LOG_FORWARD'], forward_error)
+            # Don't pass it on to our own children
+            del os.environ['KATSDP_LOG_FORWARD']
+        logging.captureWarnings(True)
+        if os.environ.get('KATSDP_LOG_SAMPLE'):
+            _setup_logging_sampling()
+        if os.environ.get('KATSDP_LOG_RESOURCES_INTERVAL'):
+            _setup_logging_resources()
+        if add_signal_handler:
+            signal.signal(signal.SIGUSR2, lambda signum, frame: toggle_debug())
+        if add_excepthook:
+            sys.excepthook = _sys_excepthook
+            # Only supported from Python 3.8
+            if hasattr(threading, 'excepthook'):
+                threading.excepthook = _threading_excepthook
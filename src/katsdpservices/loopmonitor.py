@@ -0,0 +1,289 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Continuous monitoring of event loop responsiveness.
+
+A :class:`LoopMonitor` schedules a timer on the event loop at a fixed
+interval and measures how late it runs (the *lag*). Lag is caused by
+callbacks that hold the loop for a long time, so the lag histogram
+approximates the distribution of callback durations without instrumenting
+every callback. A watchdog thread detects when the loop has been blocked for
+longer than a threshold and captures the stack of the event loop thread, so
+that slow callbacks can be attributed to source locations.
+
+The overhead is one timer callback per interval on the loop, and a watchdog
+thread that wakes up twice per threshold period.
+"""
+
+import bisect
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+
+
+LAG_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+"""Upper bounds (in seconds) of the lag histogram buckets."""
+
+_logger = logging.getLogger(__name__)
+_monitors = weakref.WeakKeyDictionary()
+
+
+SlowCallback = collections.namedtuple(
+    'SlowCallback', ['timestamp', 'duration', 'location', 'stack'])
+SlowCallback.__doc__ = """Report of the event loop being blocked for longer than the threshold.
+
+Attributes
+----------
+timestamp : float
+    Time (as returned by :func:`time.time`) at which the stall was detected
+duration : float
+    Total time for which the loop was blocked, in seconds
+location : str
+    Innermost Python source location in the event loop thread when the stall
+    was detected, in the form ``file:line in function``
+stack : list of str
+    Stack of the event loop thread, outermost first, in the same form
+"""
+
+
+def _format_frame(frame_summary):
+    return '{}:{} in {}'.format(frame_summary.filename, frame_summary.lineno,
+                                frame_summary.name)
+
+
+class LoopMonitor:
+    """Measure event loop lag and detect slow callbacks.
+
+    The monitor is started by :meth:`start` and stopped by :meth:`close`. It
+    can also be used as a context manager (which closes it on exit).
+
+    Parameters
+    ----------
+    loop : :class:`asyncio.AbstractEventLoop`
+        Event loop to monitor
+    interval : float, optional
+        Interval in seconds between lag samples
+    slow_threshold : float, optional
+        Time in seconds for which the loop must be blocked to report a slow
+        callback
+    log_interval : float, optional
+        Interval in seconds between summary log messages. If zero, no summary
+        is logged.
+    max_slow_callbacks : int, optional
+        Number of most recent slow callbacks to retain
+    """
+    def __init__(self, loop, interval=0.1, slow_threshold=0.1, log_interval=60.0,
+                 max_slow_callbacks=100):
+        self.loop = loop
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(LAG_BUCKETS) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._slow_callbacks = collections.deque(maxlen=max_slow_callbacks)
+        self._slow_total = 0
+        # Statistics since the last summary log message
+        self._window_count = 0
+        self._window_sum = 0.0
+        self._window_max = 0.0
+        self._window_slow = 0
+        self._next_log = None
+        # State shared with the watchdog thread
+        self._loop_thread_id = None
+        self._last_tick = None
+        self._tick_count = 0
+        self._pending_slow = None    # (tick_count, timestamp, location, stack)
+        self._handle = None
+        self._stopped = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Start monitoring. This may be called before the loop is running."""
+        self._watchdog = threading.Thread(target=self._watchdog_run, name='loop-monitor')
+        self._watchdog.daemon = True
+        self._watchdog.start()
+        self.loop.call_soon_threadsafe(self._first_tick)
+        _monitors[self.loop] = self
+
+    def close(self):
+        """Stop monitoring."""
+        self._stopped.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._cancel)
+        if _monitors.get(self.loop) is self:
+            del _monitors[self.loop]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _first_tick(self):
+        if self._stopped.is_set():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        if self.log_interval > 0:
+            self._next_log = self._last_tick + self.log_interval
+        expected = self.loop.time() + self.interval
+        self._handle = self.loop.call_at(expected, self._tick, expected)
+
+    def _tick(self, expected):
+        if self._stopped.is_set():
+            return
+        now = self.loop.time()
+        lag = max(now - expected, 0.0)
+        self._last_tick = time.monotonic()
+        self._tick_count += 1
+        slow = self._pending_slow
+        self._pending_slow = None
+        if slow is not None and lag < self.slow_threshold:
+            slow = None     # Watchdog raced with the loop catching up
+        with self._lock:
+            self._bucket_counts[bisect.bisect_left(LAG_BUCKETS, lag)] += 1
+            self._count += 1
+            self._sum += lag
+            self._max = max(self._max, lag)
+            self._window_count += 1
+            self._window_sum += lag
+            self._window_max = max(self._window_max, lag)
+            if slow is not None:
+                report = SlowCallback(slow[1], lag, slow[2], slow[3])
+                self._slow_callbacks.append(report)
+                self._slow_total += 1
+                self._window_slow += 1
+        if slow is not None:
+            _logger.warning('Event loop was blocked for %.3f s at %s',
+                            report.duration, report.location)
+        if self._next_log is not None and self._last_tick >= self._next_log:
+            self._log_summary()
+            self._next_log = self._last_tick + self.log_interval
+        expected = now + self.interval
+        self._handle = self.loop.call_at(expected, self._tick, expected)
+
+    def _log_summary(self):
+        with self._lock:
+            count = self._window_count
+            mean = self._window_sum / count if count else 0.0
+            max_lag = self._window_max
+            slow = self._window_slow
+            self._window_count = 0
+            self._window_sum = 0.0
+            self._window_max = 0.0
+            self._window_slow = 0
+        _logger.info('Event loop lag: mean %.3f ms, max %.3f ms over %d samples, '
+                     '%d slow callbacks',
+                     mean * 1000, max_lag * 1000, count, slow)
+
+    def _watchdog_run(self):
+        period = max(self.slow_threshold / 2, 0.001)
+        while not self._stopped.wait(period):
+            last_tick = self._last_tick
+            tick_count = self._tick_count
+            if last_tick is None or self._pending_slow is not None:
+                continue
+            if time.monotonic() - last_tick - self.interval < self.slow_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = [_format_frame(f) for f in traceback.extract_stack(frame)]
+            del frame
+            # Only record the stall if the loop has not caught up in the meantime
+            if tick_count == self._tick_count:
+                self._pending_slow = (tick_count, time.time(),
+                                      stack[-1] if stack else '<unknown>', stack)
+
+    def stats(self):
+        """Get the statistics gathered since the monitor was started.
+
+        Returns
+        -------
+        stats : dict
+            Dictionary with the following keys:
+
+            lag_count
+                Number of lag samples
+            lag_sum
+                Sum of the lag samples, in seconds
+            lag_max
+                Maximum lag, in seconds
+            lag_buckets
+                List of (upper bound, cumulative count) pairs for the lag
+                histogram, with the final upper bound being infinity
+            slow_callbacks_total
+                Number of slow callbacks detected
+            slow_callbacks
+                List of the most recent :class:`SlowCallback` reports
+        """
+        with self._lock:
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(LAG_BUCKETS + (float('inf'),), self._bucket_counts):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            return {
+                'lag_count': self._count,
+                'lag_sum': self._sum,
+                'lag_max': self._max,
+                'lag_buckets': buckets,
+                'slow_callbacks_total': self._slow_total,
+                'slow_callbacks': list(self._slow_callbacks)
+            }
+
+
+def get_loop_monitor(loop):
+    """Get the running :class:`LoopMonitor` for `loop`, or ``None`` if there isn't one."""
+    return _monitors.get(loop)
+
+
+def start_loop_monitor(loop, args):
+    """Create and start a :class:`LoopMonitor` from command-line arguments.
+
+    Parameters
+    ----------
+    loop : :class:`asyncio.AbstractEventLoop`
+        Event loop to monitor
+    args : :class:`argparse.Namespace`
+        Command-line arguments from a parser passed to
+        :func:`~.add_aiomonitor_arguments`
+
+    Returns
+    -------
+    monitor : :class:`LoopMonitor`
+        The monitor, which should be closed (or used as a context manager)
+    """
+    monitor = LoopMonitor(loop, interval=args.loop_monitor_interval,
+                          slow_threshold=args.loop_monitor_slow_threshold,
+                          log_interval=args.loop_monitor_log_interval)
+    monitor.start()
+    return monitor
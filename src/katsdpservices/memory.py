@@ -0,0 +1,190 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Memory locking and allocation tuning to avoid page faults in hot paths.
+
+:func:`add_memory_arguments` adds command-line options to lock the process
+memory (with ``mlockall``), and to select whether buffers allocated with
+:func:`allocate_buffer` use transparent huge pages and are pre-faulted.
+:func:`apply_memory_options` applies them at startup and logs the achieved
+locked and resident memory.
+
+This is Linux-specific.
+"""
+
+import ctypes
+import errno
+import logging
+import mmap
+import os
+import resource
+
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+_logger = logging.getLogger(__name__)
+_default_hugepages = False
+_default_prefault = False
+
+
+def _format_limit(value):
+    return 'unlimited' if value == resource.RLIM_INFINITY else '{} bytes'.format(value)
+
+
+def lock_memory(future=True):
+    """Lock all pages of the process into RAM.
+
+    Failure (typically because ``RLIMIT_MEMLOCK`` is too small or the process
+    lacks ``CAP_IPC_LOCK``) is logged rather than raised.
+
+    Parameters
+    ----------
+    future : bool, optional
+        If true, also lock pages that are mapped in the future
+
+    Returns
+    -------
+    success : bool
+        True if the memory was locked
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    flags = MCL_CURRENT | (MCL_FUTURE if future else 0)
+    if libc.mlockall(flags) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in {errno.ENOMEM, errno.EPERM}:
+        soft, hard = resource.getrlimit(resource.RLIMIT_MEMLOCK)
+        _logger.warning(
+            'Could not lock memory (%s): RLIMIT_MEMLOCK is %s (hard limit %s). Raise the '
+            'limit (e.g. docker run --ulimit memlock=-1) or grant CAP_IPC_LOCK',
+            os.strerror(err), _format_limit(soft), _format_limit(hard))
+    else:
+        _logger.warning('Could not lock memory: %s', os.strerror(err))
+    return False
+
+
+def memory_status():
+    """Get the locked and resident memory of the process.
+
+    Returns
+    -------
+    status : dict
+        Dictionary with keys ``locked`` and ``resident``, giving sizes in bytes
+    """
+    fields = {'VmLck:': 'locked', 'VmRSS:': 'resident'}
+    status = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] in fields:
+                # Values are reported in kB
+                status[fields[parts[0]]] = int(parts[1]) * 1024
+    return status
+
+
+def prefault_buffer(buffer):
+    """Touch every page of a writable buffer so that it is backed by memory.
+
+    The contents of the buffer are not changed.
+    """
+    view = memoryview(buffer).cast('B')
+    for offset in range(0, len(view), mmap.PAGESIZE):
+        view[offset] = view[offset]
+
+
+def allocate_buffer(size, hugepages=None, prefault=None):
+    """Allocate an anonymous, zero-filled memory buffer.
+
+    Parameters
+    ----------
+    size : int
+        Size of the buffer in bytes
+    hugepages : bool, optional
+        Advise the kernel to back the buffer with transparent huge pages.
+        Defaults to the ``--hugepages`` command-line option.
+    prefault : bool, optional
+        Touch every page so that no page faults occur on first use. Defaults
+        to the ``--prefault`` command-line option.
+
+    Returns
+    -------
+    buffer : :class:`mmap.mmap`
+        The buffer, which supports the buffer protocol (e.g. for
+        :func:`numpy.frombuffer`)
+    """
+    if hugepages is None:
+        hugepages = _default_hugepages
+    if prefault is None:
+        prefault = _default_prefault
+    buffer = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+    if hugepages:
+        try:
+            buffer.madvise(mmap.MADV_HUGEPAGE)
+        except (AttributeError, OSError) as exc:
+            _logger.warning('Could not enable transparent huge pages: %s', exc)
+    if prefault:
+        prefault_buffer(buffer)
+    return buffer
+
+
+def add_memory_arguments(parser):
+    """Add a set of arguments for controlling memory locking and allocation.
+
+    See :func:`.apply_memory_options` for details.
+
+    Parameters
+    ----------
+    parser : :class:`argparse.ArgumentParser`
+        Parser to which arguments will be added.
+    """
+    parser.add_argument(
+        '--mlockall', action='store_true', default=False,
+        help='lock all current and future memory into RAM')
+    parser.add_argument(
+        '--hugepages', action='store_true', default=False,
+        help='use transparent huge pages for large buffers')
+    parser.add_argument(
+        '--prefault', action='store_true', default=False,
+        help='pre-fault large buffers when they are allocated')
+
+
+def apply_memory_options(args):
+    """Apply the memory options given on the command line.
+
+    This locks memory if ``--mlockall`` was given, sets the defaults used by
+    :func:`allocate_buffer`, and logs the locked and resident memory.
+
+    Parameters
+    ----------
+    args : :class:`argparse.Namespace`
+        Command-line arguments from a parser passed to :func:`add_memory_arguments`
+
+    Returns
+    -------
+    locked : bool
+        True if memory locking was requested and succeeded
+    """
+    global _default_hugepages, _default_prefault
+    _default_hugepages = args.hugepages
+    _default_prefault = args.prefault
+    locked = False
+    if args.mlockall:
+        locked = lock_memory()
+    status = memory_status()
+    _logger.info('Memory: %d MiB locked, %d MiB resident',
+                 status.get('locked', 0) // 2**20, status.get('resident', 0) // 2**20)
+    return locked
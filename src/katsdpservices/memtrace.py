@@ -0,0 +1,137 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""On-demand memory allocation tracing with :mod:`tracemalloc`.
+
+The first call to :func:`memory_snapshot` starts :mod:`tracemalloc` and takes
+a baseline snapshot. Each subsequent call takes a new snapshot, and logs the
+top allocation sites and the largest changes since the previous snapshot.
+This makes it possible to track memory growth in a long-running process
+without restarting it. Until the first call, tracing is not enabled and has
+no overhead.
+
+:func:`setup_memory_trace` installs a signal handler that calls
+:func:`memory_snapshot`, and it is also available as the ``memtrace`` command
+in aiomonitor.
+"""
+
+import logging
+import signal
+import threading
+import tracemalloc
+
+from .aiomonitor import register_monitor_command
+
+
+_logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+_previous = None
+"""Previous snapshot taken by :func:`memory_snapshot`."""
+_limit = 10
+_nframes = 1
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+]
+
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+
+def memory_snapshot(limit=None):
+    """Start tracing, or take a snapshot and log a report.
+
+    Parameters
+    ----------
+    limit : int, optional
+        Number of allocation sites to list in each part of the report.
+        Defaults to the value passed to :func:`setup_memory_trace`.
+
+    Returns
+    -------
+    report : str
+        The report (which is also logged)
+    """
+    global _previous
+    if limit is None:
+        limit = _limit
+    with _lock:
+        if not tracemalloc.is_tracing() or _previous is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(_nframes)
+            _previous = _take_snapshot()
+            report = 'Started tracing memory allocations'
+        else:
+            snapshot = _take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines = ['Traced memory: {:.1f} MiB current, {:.1f} MiB peak'.format(
+                current / 2**20, peak / 2**20)]
+            lines.append('Top {} allocation sites:'.format(limit))
+            lines.extend('  {}'.format(stat) for stat in snapshot.statistics('lineno')[:limit])
+            lines.append('Top {} changes since previous snapshot:'.format(limit))
+            lines.extend('  {}'.format(stat)
+                         for stat in snapshot.compare_to(_previous, 'lineno')[:limit])
+            _previous = snapshot
+            report = '\n'.join(lines)
+    _logger.info('%s', report)
+    return report
+
+
+def stop_memory_trace():
+    """Stop tracing and discard the previous snapshot."""
+    global _previous
+    with _lock:
+        tracemalloc.stop()
+        _previous = None
+
+
+def _memory_snapshot_handler(signum, frame):
+    """Signal handler that calls :func:`memory_snapshot` asynchronously.
+
+    Taking a snapshot allocates memory and logs, neither of which is safe in
+    a signal handler, so it is done in a separate thread.
+    """
+    thread = threading.Thread(target=memory_snapshot)
+    thread.daemon = True
+    thread.start()
+
+
+def setup_memory_trace(signum=signal.SIGRTMIN, limit=10, nframes=1):
+    """Install a signal handler that calls :func:`memory_snapshot`.
+
+    Parameters
+    ----------
+    signum : int, optional
+        Signal number for the signal handler to install
+    limit : int, optional
+        Number of allocation sites to list in each report
+    nframes : int, optional
+        Number of frames of traceback to store for each allocation (see
+        :func:`tracemalloc.start`). Reports group allocations by the
+        innermost frame.
+    """
+    global _limit, _nframes
+    _limit = limit
+    _nframes = nframes
+    signal.signal(signum, _memory_snapshot_handler)
+
+
+register_monitor_command(
+    'memtrace', memory_snapshot,
+    'Start tracing memory allocations, or report the top allocation sites and changes')
@@ -0,0 +1,427 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Lightweight metrics for service health counters.
+
+Metrics (:class:`Counter`, :class:`Gauge` and :class:`Histogram`) register
+themselves with a :class:`Registry` (by default :data:`REGISTRY`), which can
+render them in the Prometheus text exposition format. An HTTP endpoint serving
+them can be started with :func:`start_metrics_server`, controlled by the
+command-line options added by :func:`add_metrics_arguments`.
+
+Counters and histograms are updated without taking a lock: each thread
+accumulates into its own cell, and the cells are summed when the metric is
+read. Updates from threads that have exited are folded into a base value the
+next time the metric is read, so that no counts are lost.
+"""
+
+import bisect
+import contextlib
+import http.server
+import logging
+import math
+import re
+import threading
+import weakref
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Default upper bounds for :class:`Histogram` buckets (suitable for latencies in seconds)."""
+
+_NAME_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*$')
+_LABEL_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+_logger = logging.getLogger(__name__)
+
+
+def _format_value(value):
+    if isinstance(value, int):
+        return str(value)
+    elif math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    elif math.isnan(value):
+        return 'NaN'
+    else:
+        return repr(float(value))
+
+
+def _escape_label_value(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(key, _escape_label_value(value))
+                          for key, value in labels.items()) + '}'
+
+
+class Registry:
+    """Collection of metrics that are exported together."""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric to the registry.
+
+        Raises
+        ------
+        ValueError
+            if a metric with the same name and labels is already registered,
+            or one with the same name but a different type
+        """
+        key = (metric.name, tuple(sorted(metric.labels.items())))
+        with self._lock:
+            if key in self._metrics:
+                raise ValueError('Metric {}{} is already registered'.format(
+                    metric.name, _format_labels(metric.labels)))
+            for other in self._metrics.values():
+                if other.name == metric.name and other.type_name != metric.type_name:
+                    raise ValueError('Metric {} is already registered as a {}'.format(
+                        metric.name, other.type_name))
+            self._metrics[key] = metric
+
+    def unregister(self, metric):
+        """Remove a metric from the registry."""
+        key = (metric.name, tuple(sorted(metric.labels.items())))
+        with self._lock:
+            if self._metrics.get(key) is metric:
+                del self._metrics[key]
+
+    def collect(self):
+        """Get a list of the registered metrics, sorted by name."""
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+    def exposition(self):
+        """Render the registered metrics in Prometheus text format."""
+        lines = []
+        last_name = None
+        for metric in self.collect():
+            if metric.name != last_name:
+                help = metric.help.replace('\\', r'\\').replace('\n', r'\n')
+                lines.append('# HELP {} {}'.format(metric.name, help))
+                lines.append('# TYPE {} {}'.format(metric.name, metric.type_name))
+                last_name = metric.name
+            for suffix, labels, value in metric.samples():
+                lines.append('{}{}{} {}'.format(
+                    metric.name, suffix, _format_labels(labels), _format_value(value)))
+        return ''.join(line + '\n' for line in lines)
+
+
+REGISTRY = Registry()
+"""Default registry."""
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, help, labels=None, registry=REGISTRY):
+        if not _NAME_RE.match(name):
+            raise ValueError('Invalid metric name {!r}'.format(name))
+        labels = dict(labels or {})
+        for key in labels:
+            if not _LABEL_RE.match(key) or key.startswith('__'):
+                raise ValueError('Invalid label name {!r}'.format(key))
+        self.name = name
+        self.help = help
+        self.labels = labels
+        if registry is not None:
+            registry.register(self)
+
+    def samples(self):
+        """Get the current value as a list of (name suffix, labels, value) tuples."""
+        raise NotImplementedError
+
+
+class _PerThreadMetric(_Metric):
+    """Metric whose state is a list of numbers, accumulated per thread."""
+    def __init__(self, name, help, labels=None, registry=REGISTRY):
+        self._local = threading.local()
+        self._cells = []       # List of (weakref to thread, cell)
+        self._base = self._new_cell()
+        self._cells_lock = threading.Lock()
+        super().__init__(name, help, labels, registry)
+
+    def _new_cell(self):
+        raise NotImplementedError
+
+    def _add_cell(self):
+        """Create the cell for the current thread."""
+        cell = self._new_cell()
+        self._local.cell = cell
+        with self._cells_lock:
+            self._cells.append((weakref.ref(threading.current_thread()), cell))
+        return cell
+
+    def _total(self):
+        """Sum the cells of all threads."""
+        with self._cells_lock:
+            live = []
+            for thread_ref, cell in self._cells:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    for i, value in enumerate(cell):
+                        self._base[i] += value
+                else:
+                    live.append((thread_ref, cell))
+            self._cells = live
+            total = list(self._base)
+            for thread_ref, cell in live:
+                for i, value in enumerate(cell):
+                    total[i] += value
+        return total
+
+
+class Counter(_PerThreadMetric):
+    """Monotonically increasing count.
+
+    Parameters
+    ----------
+    name : str
+        Metric name. By convention, counters should have the suffix ``_total``.
+    help : str
+        Description of the metric
+    labels : dict, optional
+        Constant labels distinguishing this metric from others with the same name
+    registry : :class:`Registry`, optional
+        Registry to add the metric to (``None`` to not register it)
+    """
+    type_name = 'counter'
+
+    def _new_cell(self):
+        return [0]
+
+    def inc(self, amount=1):
+        """Increment the counter. This does not take any locks."""
+        try:
+            self._local.cell[0] += amount
+        except AttributeError:
+            self._add_cell()[0] += amount
+
+    @property
+    def value(self):
+        return self._total()[0]
+
+    def samples(self):
+        return [('', self.labels, self.value)]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down.
+
+    The value may either be set explicitly, or computed on demand by a
+    function passed to :meth:`set_function`.
+
+    Parameters
+    ----------
+    name, help, labels, registry
+        See :class:`Counter`
+    """
+    type_name = 'gauge'
+
+    def __init__(self, name, help, labels=None, registry=REGISTRY):
+        self._value = 0
+        self._function = None
+        self._lock = threading.Lock()
+        super().__init__(name, help, labels, registry)
+
+    def set(self, value):
+        self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function):
+        """Compute the value by calling `function` whenever it is read."""
+        self._function = function
+
+    @property
+    def value(self):
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+    def samples(self):
+        return [('', self.labels, self.value)]
+
+
+class Histogram(_PerThreadMetric):
+    """Distribution of values, counted in buckets with fixed bounds.
+
+    Parameters
+    ----------
+    name, help, labels, registry
+        See :class:`Counter`
+    buckets : sequence of float, optional
+        Upper bounds of the buckets (inclusive), in increasing order. An
+        additional bucket with an infinite upper bound is always added.
+    """
+    type_name = 'histogram'
+
+    def __init__(self, name, help, labels=None, registry=REGISTRY, buckets=DEFAULT_BUCKETS):
+        buckets = tuple(float(bound) for bound in buckets)
+        if list(buckets) != sorted(set(buckets)):
+            raise ValueError('Buckets must be in strictly increasing order')
+        if not buckets or buckets[-1] != math.inf:
+            buckets += (math.inf,)
+        if 'le' in (labels or {}):
+            raise ValueError('Histogram cannot have a label called "le"')
+        self.buckets = buckets
+        super().__init__(name, help, labels, registry)
+
+    def _new_cell(self):
+        # Count for each bucket, followed by the sum
+        return [0] * len(self.buckets) + [0.0]
+
+    def observe(self, value):
+        """Record a value. This does not take any locks."""
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._add_cell()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @property
+    def count(self):
+        return sum(self._total()[:-1])
+
+    @property
+    def sum(self):
+        return self._total()[-1]
+
+    def cumulative_counts(self):
+        """Get a list of (upper bound, cumulative count) pairs."""
+        total = self._total()
+        result = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, total):
+            cumulative += count
+            result.append((bound, cumulative))
+        return result
+
+    def samples(self):
+        total = self._total()
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, total):
+            cumulative += count
+            labels = dict(self.labels, le=_format_value(bound))
+            samples.append(('_bucket', labels, cumulative))
+        samples.append(('_sum', self.labels, total[-1]))
+        samples.append(('_count', self.labels, cumulative))
+        return samples
+
+
+class _MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in {'/', '/metrics'}:
+            self.send_error(404)
+            return
+        body = self.server.registry.exposition().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        _logger.debug('%s - ' + format, self.address_string(), *args)
+
+
+class MetricsServer:
+    """HTTP server exposing a registry in Prometheus text format.
+
+    The server runs in a daemon thread. It should be closed with
+    :meth:`close`, or used as a context manager.
+
+    Parameters
+    ----------
+    host : str
+        Bind host (empty string for all interfaces)
+    port : int
+        Bind port (0 to pick a free port, which is available as :attr:`port`)
+    registry : :class:`Registry`, optional
+        Registry to expose
+    """
+    def __init__(self, host, port, registry=REGISTRY):
+        self._server = http.server.ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        self._server.daemon_threads = True
+        self._server.registry = registry
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def start_metrics_server(args, registry=REGISTRY):
+    """Optionally start a :class:`MetricsServer`, depending on command-line arguments.
+
+    The return value should be used as a context manager e.g.::
+
+        with start_metrics_server(args):
+            loop.run_until_complete(main())
+
+    If ``--metrics-port`` is not passed on the command line, no server is
+    started.
+
+    Parameters
+    ----------
+    args : :class:`argparse.Namespace`
+        Command-line arguments from a parser passed to :func:`add_metrics_arguments`
+    registry : :class:`Registry`, optional
+        Registry to expose
+    """
+    if args.metrics_port is None:
+        return contextlib.nullcontext()
+    server = MetricsServer(args.metrics_host, args.metrics_port, registry)
+    _logger.info('Serving metrics on port %d', server.port)
+    return server
+
+
+def add_metrics_arguments(parser):
+    """Add a set of arguments for controlling the metrics HTTP server.
+
+    See :func:`.start_metrics_server` for details.
+
+    Parameters
+    ----------
+    parser : :class:`argparse.ArgumentParser`
+        Parser to which arguments will be added.
+    """
+    parser.add_argument(
+        '--metrics-host', type=str, default='',
+        help='bind host for Prometheus metrics HTTP server [all interfaces]')
+    parser.add_argument(
+        '--metrics-port', type=int,
+        help='port for Prometheus metrics HTTP server [disabled]')
@@ -0,0 +1,184 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Built-in sampling profiler that can be toggled at runtime.
+
+The profiler runs a background thread that periodically samples the stacks of
+all other threads with :func:`sys._current_frames`, and counts identical
+stacks. The result is written in the "collapsed stack" format used by
+`FlameGraph <https://github.com/brendangregg/FlameGraph>`_ and
+`speedscope <https://www.speedscope.app/>`_: one line per distinct stack, with
+frames separated by semicolons (outermost first) and followed by the number of
+samples.
+
+:func:`setup_profiler` installs a signal handler (SIGUSR1 by default) that
+starts the profiler on the first signal and writes the profile on the next.
+The same toggle is available as the ``profile`` command in aiomonitor. Until
+the profiler is started, no thread is running and there is no overhead.
+"""
+
+import collections
+import datetime
+import logging
+import os
+import signal
+import sys
+import tempfile
+import threading
+
+from .aiomonitor import register_monitor_command
+
+
+_logger = logging.getLogger(__name__)
+_toggle_lock = threading.Lock()
+_profiler = None
+"""Profiler started by :func:`toggle_profiler`, if it is running."""
+_output_dir = None
+"""Output directory configured by :func:`setup_profiler`."""
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return '{} ({}:{})'.format(code.co_name, code.co_filename, frame.f_lineno)
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling the stacks of all threads.
+
+    Parameters
+    ----------
+    interval : float, optional
+        Time in seconds between samples
+    """
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """Start sampling in a background thread."""
+        if self._thread is not None:
+            raise RuntimeError('Profiler is already running')
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling. The samples collected so far are retained."""
+        if self._thread is None:
+            raise RuntimeError('Profiler is not running')
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, 'thread-{}'.format(ident)))
+                labels.reverse()
+                self._stacks[';'.join(labels)] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Get the profile in collapsed stack format, as a string."""
+        return ''.join('{} {}\n'.format(stack, count)
+                       for stack, count in sorted(self._stacks.items()))
+
+    def write(self, filename):
+        """Write the profile in collapsed stack format to `filename`."""
+        with open(filename, 'w') as f:
+            f.write(self.collapsed())
+
+
+def toggle_profiler(output_dir=None):
+    """Start the profiler if it is not running, otherwise stop it and save the profile.
+
+    Parameters
+    ----------
+    output_dir : str, optional
+        Directory in which to write the profile. Defaults to the directory
+        passed to :func:`setup_profiler`, or the system temporary directory.
+
+    Returns
+    -------
+    message : str
+        Description of the action taken (which is also logged)
+    """
+    global _profiler
+    with _toggle_lock:
+        if _profiler is None:
+            _profiler = SamplingProfiler()
+            _profiler.start()
+            message = 'Started sampling profiler'
+        else:
+            profiler = _profiler
+            _profiler = None
+            profiler.stop()
+            if output_dir is None:
+                output_dir = _output_dir or tempfile.gettempdir()
+            timestamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            filename = os.path.join(
+                output_dir, 'katsdp-profile-{}-{}.folded'.format(os.getpid(), timestamp))
+            profiler.write(filename)
+            message = 'Wrote profile with {} samples to {}'.format(profiler.samples, filename)
+    _logger.info('%s', message)
+    return message
+
+
+def _toggle_profiler_handler(signum, frame):
+    """Signal handler that calls :func:`toggle_profiler` asynchronously.
+
+    This uses a separate thread, since it's not safe to log from a signal handler.
+    """
+    thread = threading.Thread(target=toggle_profiler)
+    thread.daemon = True
+    thread.start()
+
+
+def setup_profiler(signum=signal.SIGUSR1, output_dir=None):
+    """Install a signal handler that toggles the sampling profiler.
+
+    Parameters
+    ----------
+    signum : int, optional
+        Signal number for the signal handler to install
+    output_dir : str, optional
+        Directory in which to write profiles (defaults to the system temporary
+        directory)
+    """
+    global _output_dir
+    _output_dir = output_dir
+    signal.signal(signum, _toggle_profiler_handler)
+
+
+register_monitor_command(
+    'profile', toggle_profiler,
+    'Start the sampling profiler, or stop it and write a collapsed-stack profile')
@@ -0,0 +1,136 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Periodic sampling of process resource usage.
+
+A :class:`ResourceSampler` periodically logs a single record containing the
+resource usage of the process. The values are attached to the record as
+extra attributes, so that the GELF handler installed by
+:func:`~katsdpservices.setup_logging` sends them as separate fields. It is
+normally enabled by setting ``KATSDP_LOG_RESOURCES_INTERVAL``.
+
+Sampling reads ``/proc/self/stat`` and ``/proc/self/fd`` and calls
+:func:`resource.getrusage`, which takes a few tens of microseconds.
+"""
+
+import logging
+import os
+import resource
+import threading
+import time
+
+
+_logger = logging.getLogger(__name__)
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def sample():
+    """Measure the current resource usage of the process.
+
+    Returns
+    -------
+    usage : dict
+        Dictionary with the following keys:
+
+        rss_bytes
+            Resident set size
+        max_rss_bytes
+            Peak resident set size
+        cpu_user_seconds, cpu_system_seconds
+            CPU time used in user and kernel mode
+        voluntary_context_switches, involuntary_context_switches
+            Number of context switches
+        open_fds
+            Number of open file descriptors
+        threads
+            Number of threads
+    """
+    with open('/proc/self/stat', 'rb') as f:
+        stat = f.read()
+    # The command name (field 2) is in parentheses and may contain spaces,
+    # so split after the last closing parenthesis. rest[0] is field 3.
+    rest = stat[stat.rindex(b')') + 2:].split()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        'rss_bytes': int(rest[21]) * _PAGE_SIZE,
+        'max_rss_bytes': usage.ru_maxrss * 1024,
+        'cpu_user_seconds': usage.ru_utime,
+        'cpu_system_seconds': usage.ru_stime,
+        'voluntary_context_switches': usage.ru_nvcsw,
+        'involuntary_context_switches': usage.ru_nivcsw,
+        'open_fds': len(os.listdir('/proc/self/fd')),
+        'threads': int(rest[17])
+    }
+
+
+class ResourceSampler:
+    """Background thread that periodically logs resource usage.
+
+    Each record also has a ``cpu_percent`` field, giving the CPU usage (user
+    plus system, as a percentage of one core) since the previous sample.
+
+    Parameters
+    ----------
+    interval : float
+        Time between samples, in seconds
+    level : int, optional
+        Log level for the records
+    """
+    def __init__(self, interval, level=logging.INFO):
+        if interval <= 0:
+            raise ValueError('interval must be positive')
+        self.interval = interval
+        self.level = level
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_cpu = None
+        self._last_time = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='resource-sampler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def log_sample(self):
+        """Take a sample and log it."""
+        usage = sample()
+        now = time.monotonic()
+        cpu = usage['cpu_user_seconds'] + usage['cpu_system_seconds']
+        if self._last_time is not None and now > self._last_time:
+            usage['cpu_percent'] = 100.0 * (cpu - self._last_cpu) / (now - self._last_time)
+        self._last_cpu = cpu
+        self._last_time = now
+        _logger.log(self.level,
+                    'Resource usage: RSS %.1f MiB, CPU %.2f s user %.2f s system, '
+                    '%d fds, %d threads',
+                    usage['rss_bytes'] / 2**20, usage['cpu_user_seconds'],
+                    usage['cpu_system_seconds'], usage['open_fds'], usage['threads'],
+                    extra=usage)
+
+    def _run(self):
+        while True:
+            try:
+                self.log_sample()
+            except Exception:
+                _logger.exception('Failed to sample resource usage')
+            if self._stop.wait(self.interval):
+                break
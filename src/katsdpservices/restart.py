@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -14,7 +14,17 @@
 # limitations under the License.
 ################################################################################
 
-"""Utility to make the process restart itself on SIGHUP"""
+"""Utility to make the process restart itself on SIGHUP
+
+Before restarting, the process can be drained: hooks registered with
+:func:`add_drain_hook` are run in order (for example, to stop accepting new
+work, flush buffers and close streams), subject to an optional deadline after
+which the restart proceeds regardless.
+
+Alternatively, :func:`run_with_standby` runs the service under a supervisor
+that keeps a pre-forked standby process, so that restarting does not pay the
+cost of starting the interpreter and importing modules.
+"""
 
 import sys
 import os.path
@@ -22,6 +32,14 @@ import fcntl
 import signal
 import logging
 import threading
+import asyncio
+import contextlib
+import inspect
+import time
+import traceback
+
+from . import logforward
+from . import tracing
 
 
 # Latch the absolute path now, in case something changes directory later
@@ -29,6 +47,193 @@ import threading
 _restart_args = list(sys.argv)
 _restart_args[0] = os.path.abspath(sys.argv[0])
 _logger = logging.getLogger(__name__)
+_drain_hooks = []
+"""List of (hook, name) pairs registered with :func:`add_drain_hook`."""
+
+
+def add_drain_hook(hook, name=None):
+    """Register a hook to run before the process is restarted.
+
+    Hooks are run by :func:`drain` in the order they were registered. A hook
+    may be a plain callable or a coroutine function. Coroutine functions are
+    run on the event loop passed to :func:`drain` (or :func:`setup_restart`),
+    or in a temporary event loop if none was given.
+
+    Parameters
+    ----------
+    hook : callable
+        Callable taking no arguments
+    name : str, optional
+        Name used to identify the hook in log messages (defaults to the
+        qualified name of `hook`)
+    """
+    if name is None:
+        name = getattr(hook, '__qualname__', repr(hook))
+    _drain_hooks.append((hook, name))
+
+
+def remove_drain_hook(hook):
+    """Remove a hook previously registered with :func:`add_drain_hook`.
+
+    Raises
+    ------
+    ValueError
+        if `hook` is not registered
+    """
+    for i, (registered, name) in enumerate(_drain_hooks):
+        if registered is hook:
+            del _drain_hooks[i]
+            return
+    raise ValueError('Drain hook {!r} is not registered'.format(hook))
+
+
+@contextlib.contextmanager
+def _timed_hook(name):
+    """Log the time taken by a drain hook, and log rather than propagate
+    exceptions."""
+    start = time.monotonic()
+    try:
+        with tracing.span('drain hook', hook=name):
+            yield
+    except Exception:
+        _logger.exception('Drain hook %s failed after %.3f s', name, time.monotonic() - start)
+    else:
+        _logger.info('Drain hook %s finished in %.3f s', name, time.monotonic() - start)
+
+
+class _Drainer:
+    """Runs a list of drain hooks sequentially in a worker thread."""
+    def __init__(self, hooks, loop):
+        self.hooks = hooks
+        self.loop = loop
+        self.abandoned = False
+        self._future = None
+        self._lock = threading.Lock()
+
+    def _run_hook(self, hook):
+        if not asyncio.iscoroutinefunction(hook):
+            hook()
+        elif self.loop is None:
+            asyncio.run(hook())
+        else:
+            with self._lock:
+                if self.abandoned:
+                    return
+                self._future = asyncio.run_coroutine_threadsafe(hook(), self.loop)
+            try:
+                self._future.result()
+            finally:
+                self._future = None
+
+    def run(self):
+        for hook, name in self.hooks:
+            if self.abandoned:
+                break
+            with _timed_hook(name):
+                self._run_hook(hook)
+
+    def abandon(self):
+        """Stop running further hooks, and cancel a running coroutine hook."""
+        with self._lock:
+            self.abandoned = True
+            if self._future is not None:
+                self._future.cancel()
+
+
+def drain(timeout=None, loop=None):
+    """Run the hooks registered with :func:`add_drain_hook`.
+
+    The hooks are run in a separate thread, so that a hook that hangs cannot
+    prevent the caller from proceeding once `timeout` has expired. An
+    exception raised by one hook is logged and does not prevent the remaining
+    hooks from running.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Maximum time in seconds to wait for the hooks to complete. If
+        ``None``, wait indefinitely.
+    loop : :class:`asyncio.AbstractEventLoop`, optional
+        Running event loop (in another thread) on which to run coroutine
+        hooks. It must not be the loop of the calling thread.
+
+    Returns
+    -------
+    completed : bool
+        True if all hooks completed before the deadline
+    """
+    if not _drain_hooks:
+        return True
+    start = time.monotonic()
+    drainer = _Drainer(list(_drain_hooks), loop)
+    thread = threading.Thread(target=drainer.run, name='drain')
+    thread.daemon = True
+    with tracing.span('drain'):
+        thread.start()
+        thread.join(timeout)
+    if thread.is_alive():
+        drainer.abandon()
+        _logger.warning('Draining did not complete within %.3f s, proceeding anyway', timeout)
+        return False
+    _logger.info('Draining completed in %.3f s', time.monotonic() - start)
+    return True
+
+
+async def drain_async(timeout=None):
+    """Run the hooks registered with :func:`add_drain_hook` on the current event loop.
+
+    This is the asyncio equivalent of :func:`drain`. Coroutine hooks are
+    awaited and other hooks are called directly, so no threads are used.
+    Consequently, a plain callable that blocks also blocks the event loop and
+    cannot be interrupted by the deadline.
+
+    Parameters
+    ----------
+    timeout : float, optional
+        Maximum time in seconds to wait for the hooks to complete. If
+        ``None``, wait indefinitely.
+
+    Returns
+    -------
+    completed : bool
+        True if all hooks completed before the deadline
+    """
+    async def run_hooks():
+        for hook, name in list(_drain_hooks):
+            with _timed_hook(name):
+                if asyncio.iscoroutinefunction(hook):
+                    await hook()
+                else:
+                    hook()
+
+    if not _drain_hooks:
+        return True
+    start = time.monotonic()
+    try:
+        with tracing.span('drain'):
+            await asyncio.wait_for(run_hooks(), timeout)
+    except asyncio.TimeoutError:
+        _logger.warning('Draining did not complete within %.3f s, proceeding anyway', timeout)
+        return False
+    _logger.info('Draining completed in %.3f s', time.monotonic() - start)
+    return True
+
+
+def _flush_logging():
+    """Flush every handler attached to any logger.
+
+    This ensures that records queued by buffering handlers are not lost when
+    the process image is replaced.
+    """
+    loggers = [logging.root]
+    loggers.extend(logger for logger in logging.root.manager.loggerDict.values()
+                   if isinstance(logger, logging.Logger))
+    for logger in loggers:
+        for handler in list(logger.handlers):
+            try:
+                handler.flush()
+            except Exception:
+                pass
 
 
 def restart_process():
@@ -53,16 +258,24 @@ def restart_process():
                         pass
     except OSError:
         logging.warn('Could not read /proc/self/fd')
+    # Stop receiving records from children, and stop advertising the socket
+    logforward._before_exec()
     # Ensure any logging gets properly flushed
+    _flush_logging()
+    tracing.before_exec()
     sys.stdout.flush()
     sys.stderr.flush()
     os.execlp(sys.executable, sys.executable, *_restart_args)
 
 
-def setup_restart(signum=signal.SIGHUP, restart_callback=None):
+def setup_restart(signum=signal.SIGHUP, restart_callback=None, drain_timeout=None, loop=None):
     """Install a signal handler that calls :func:`restart` when :const:`SIGHUP`
     is received.
 
+    The restart proceeds in the following order: `restart_callback` is
+    called, the process is drained (see :func:`drain`), logging handlers are
+    flushed and finally the process is re-executed.
+
     Parameters
     ----------
     signum : int, optional
@@ -72,13 +285,20 @@ def setup_restart(signum=signal.SIGHUP, restart_callback=None):
         to cleanly wind up state. If it returns a true value, the restart is
         not done. This can be used if the callback just schedules cleanup and
         :func:`restart_process` in an asynchronous manner.
+    drain_timeout : float, optional
+        Deadline in seconds for the drain hooks, after which the restart
+        proceeds anyway. If not specified, wait for the hooks indefinitely.
+    loop : :class:`asyncio.AbstractEventLoop`, optional
+        Event loop on which to run coroutine drain hooks
     """
     def restart_thread():
         logger = logging.getLogger(__file__)
         logger.warning("Received signal %d, restarting", signum)
+        tracing.instant('restart signal', signum=signum)
         if restart_callback is not None:
             if restart_callback():
                 return
+        drain(drain_timeout, loop)
         restart_process()
 
     def restart_handler(signum, frame):
@@ -87,4 +307,240 @@ def setup_restart(signum=signal.SIGHUP, restart_callback=None):
         thread = threading.Thread(target=restart_thread)
         thread.daemon = True
         thread.start()
-    signal.signal(signal.SIGHUP, restart_handler)
+    signal.signal(signum, restart_handler)
+
+
+def setup_restart_async(loop=None, signums=(signal.SIGHUP,), restart_callback=None,
+                        drain_timeout=None):
+    """Restart the process when a signal is received, using the event loop.
+
+    This is an asyncio-native alternative to :func:`setup_restart`. The
+    signal handlers are installed with
+    :meth:`asyncio.AbstractEventLoop.add_signal_handler`, and the restart
+    sequence (callback, drain hooks and :func:`restart_process`) runs as a
+    task on the event loop rather than in a new thread. Signals received
+    while a restart is already in progress are ignored.
+
+    Since it uses :meth:`~asyncio.AbstractEventLoop.add_signal_handler`, this
+    must be called from the main thread, and `loop` should run in the main
+    thread.
+
+    Parameters
+    ----------
+    loop : :class:`asyncio.AbstractEventLoop`, optional
+        Event loop on which to handle the signals. Defaults to the running
+        event loop.
+    signums : iterable of int, optional
+        Signal numbers that trigger a restart
+    restart_callback : callable, optional
+        If specified, this is called before draining. It may be a plain
+        function or a coroutine function. If it returns (or its coroutine
+        returns) a true value, the restart is not done.
+    drain_timeout : float, optional
+        Deadline in seconds for the drain hooks (see :func:`drain_async`)
+    """
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    task = None
+
+    async def restart(signum):
+        _logger.warning("Received signal %d, restarting", signum)
+        tracing.instant('restart signal', signum=signum)
+        if restart_callback is not None:
+            result = restart_callback()
+            if inspect.isawaitable(result):
+                result = await result
+            if result:
+                return
+        await drain_async(drain_timeout)
+        restart_process()
+
+    def restart_handler(signum):
+        nonlocal task
+        if task is not None and not task.done():
+            _logger.info("Received signal %d, but restart is already in progress", signum)
+            return
+        task = loop.create_task(restart(signum))
+
+    for signum in signums:
+        loop.add_signal_handler(signum, restart_handler, signum)
+
+
+def _exit_code(status):
+    """Convert a status from :func:`os.waitpid` into an exit code.
+
+    As for :mod:`subprocess`, death by a signal is reported as the negated
+    signal number.
+    """
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    else:
+        return os.WEXITSTATUS(status)
+
+
+class _StandbyChild:
+    """Forked child process that waits to be promoted before running `main`.
+
+    The supervisor holds the write end of a pipe, and the child blocks reading
+    from it. Writing to the pipe promotes the child; closing it without
+    writing (including the supervisor dying) makes the child exit.
+    """
+    def __init__(self, main, sigmask):
+        read_fd, self._write_fd = os.pipe()
+        self.pid = os.fork()
+        if self.pid == 0:
+            os.close(self._write_fd)
+            self._child(main, read_fd, sigmask)
+        os.close(read_fd)
+
+    @staticmethod
+    def _child(main, read_fd, sigmask):
+        code = 1
+        try:
+            signal.pthread_sigmask(signal.SIG_SETMASK, sigmask)
+            if not os.read(read_fd, 1):
+                code = 0     # Supervisor shut down without promoting us
+            else:
+                os.close(read_fd)
+                main()
+                code = 0
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            _flush_logging()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def promote(self):
+        os.write(self._write_fd, b'\x01')
+        os.close(self._write_fd)
+        self._write_fd = None
+
+    def discard(self):
+        """Make an unpromoted standby exit and reap it."""
+        os.close(self._write_fd)
+        self._write_fd = None
+        self.wait()
+
+    def wait(self, timeout=None):
+        """Wait for the child to exit, returning its exit code.
+
+        Returns ``None`` if the child has not exited after `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                pid, status = os.waitpid(self.pid, 0 if deadline is None else os.WNOHANG)
+            except ChildProcessError:
+                return None     # Already reaped
+            if pid != 0:
+                return _exit_code(status)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.001)
+
+    def stop(self, signum, timeout):
+        """Send `signum` to the child and wait for it, killing it after `timeout`."""
+        os.kill(self.pid, signum)
+        code = self.wait(timeout)
+        if code is None:
+            _logger.warning('Process %d did not exit within %.3f s, killing it',
+                            self.pid, timeout)
+            os.kill(self.pid, signal.SIGKILL)
+            code = self.wait()
+        return code
+
+
+def run_with_standby(main, signum=signal.SIGHUP, stop_signal=signal.SIGTERM,
+                     shutdown_timeout=10.0):
+    """Run `main` in a child process, keeping a warm standby to replace it.
+
+    The calling process becomes a supervisor. It forks an active child that
+    runs `main`, and a standby child that waits until it is needed. When the
+    supervisor receives `signum`, it stops the active child (by sending it
+    `stop_signal`), promotes the standby to be the new active child, and forks
+    a fresh standby. Because the children are forked from the supervisor,
+    anything done before calling this function (importing modules, loading
+    configuration, binding listening sockets) is shared by every child and
+    does not need to be repeated on restart. Sockets opened before calling this
+    function are inherited, so that the new active child continues to serve
+    them.
+
+    Note that this restarts the service state but not the code: changes to
+    installed modules are only picked up by restarting the supervisor.
+
+    Since the supervisor forks, it must not have any other threads running
+    nor an event loop when this function is called, so services should
+    create their event loops within `main`. Logging should be set up before
+    calling it, with one exception. The threads that
+    :func:`~katsdpservices.setup_logging` starts for GELF logging
+    (``KATSDP_LOG_GELF_ADDRESS``) block signals, and are restarted in each
+    child, which sends without spooling. The other logging options that
+    start threads (``KATSDP_LOG_FILE``, ``KATSDP_LOG_FORWARD`` and
+    ``KATSDP_LOG_RESOURCES_INTERVAL``) are not fork-safe. If they are
+    needed, set up logging within `main` instead.
+
+    When the supervisor receives :const:`SIGTERM` or :const:`SIGINT`, it is
+    forwarded to the active child, the standby is discarded, and the
+    supervisor returns once the active child has exited. If the active child
+    exits by itself, the supervisor also shuts down.
+
+    Parameters
+    ----------
+    main : callable
+        Function run in the active child. The child exits when it returns.
+    signum : int, optional
+        Signal that triggers a restart
+    stop_signal : int, optional
+        Signal sent to the active child to stop it on restart
+    shutdown_timeout : float, optional
+        Time in seconds to wait for the active child to exit after sending
+        `stop_signal`, before killing it with :const:`SIGKILL`
+
+    Returns
+    -------
+    code : int
+        Exit code of the last active child (negative for death by a signal)
+    """
+    signals = {signum, signal.SIGCHLD, signal.SIGTERM, signal.SIGINT}
+    sigmask = signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+    try:
+        active = _StandbyChild(main, sigmask)
+        active.promote()
+        standby = _StandbyChild(main, sigmask)
+        while True:
+            sig = signal.sigwait(signals)
+            if sig == signum:
+                _logger.warning('Received signal %d, handing over from process %d to %d',
+                                sig, active.pid, standby.pid)
+                start = time.monotonic()
+                active.stop(stop_signal, shutdown_timeout)
+                standby.promote()
+                _logger.info('Process %d took over after %.3f s',
+                             standby.pid, time.monotonic() - start)
+                active = standby
+                standby = _StandbyChild(main, sigmask)
+            elif sig == signal.SIGCHLD:
+                code = active.wait(0)
+                if code is not None:
+                    _logger.info('Process %d exited with code %d, shutting down',
+                                 active.pid, code)
+                    standby.discard()
+                    return code
+                if standby.wait(0) is not None:
+                    _logger.warning('Standby process %d died, replacing it', standby.pid)
+                    standby = _StandbyChild(main, sigmask)
+            else:
+                _logger.info('Received signal %d, shutting down', sig)
+                standby.discard()
+                return active.stop(sig, shutdown_timeout)
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, sigmask)
@@ -0,0 +1,185 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Dump asyncio tasks and thread stacks to the log.
+
+:func:`setup_task_dump` installs a signal handler (SIGQUIT by default) that
+logs a single record describing every asyncio task of an event loop (name,
+state, age and coroutine stack) together with the stacks of all threads.
+This is useful for diagnosing deadlocks and stalls in production without
+opening a port for aiomonitor.
+
+The tasks are inspected on the event loop itself (scheduled with
+:meth:`~asyncio.AbstractEventLoop.call_soon_threadsafe`). If the loop does
+not respond within a timeout, which suggests that it is blocked, only the
+thread stacks are logged, which show where it is blocked.
+"""
+
+import asyncio
+import io
+import logging
+import signal
+import sys
+import threading
+import traceback
+import weakref
+
+
+_logger = logging.getLogger(__name__)
+_task_created = weakref.WeakKeyDictionary()
+"""Creation time (in loop time) of tasks created by the task factory."""
+
+
+def _install_task_factory(loop):
+    """Wrap the task factory of `loop` to record creation times."""
+    previous = loop.get_task_factory()
+    if getattr(previous, '_katsdp_task_dump', False):
+        return
+
+    def factory(loop, coro, **kwargs):
+        if previous is None:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        else:
+            task = previous(loop, coro, **kwargs)
+        _task_created[task] = loop.time()
+        return task
+
+    factory._katsdp_task_dump = True
+    loop.set_task_factory(factory)
+
+
+def format_tasks(loop):
+    """Describe all the tasks of `loop`.
+
+    This must be called from the event loop thread.
+
+    Returns
+    -------
+    text : str
+        Description of the tasks
+    count : int
+        Number of tasks
+    """
+    now = loop.time()
+    out = io.StringIO()
+    tasks = sorted(asyncio.all_tasks(loop), key=lambda task: task.get_name())
+    for task in tasks:
+        if task.cancelled():
+            state = 'cancelled'
+        elif task.done():
+            state = 'done'
+        else:
+            state = 'pending'
+        created = _task_created.get(task)
+        age = 'unknown age' if created is None else 'age {:.3f} s'.format(now - created)
+        print('Task {} ({}, {}): {!r}'.format(task.get_name(), state, age, task.get_coro()),
+              file=out)
+        frames = task.get_stack()
+        summary = traceback.StackSummary.extract((frame, frame.f_lineno) for frame in frames)
+        for line in summary.format():
+            out.write(line)
+    return out.getvalue(), len(tasks)
+
+
+def format_threads():
+    """Describe the stacks of all threads.
+
+    Returns
+    -------
+    text : str
+        Description of the thread stacks
+    count : int
+        Number of threads
+    """
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    out = io.StringIO()
+    frames = sys._current_frames()
+    for ident, frame in sorted(frames.items()):
+        print('Thread {} ({}):'.format(names.get(ident, 'unknown'), ident), file=out)
+        for line in traceback.format_stack(frame):
+            out.write(line)
+    return out.getvalue(), len(frames)
+
+
+def dump_tasks(loop):
+    """Log the tasks of `loop` and the stacks of all threads as a single record.
+
+    This must be called from the event loop thread. The record has extra
+    fields ``task_count`` and ``thread_count``.
+    """
+    tasks, task_count = format_tasks(loop)
+    threads, thread_count = format_threads()
+    _logger.warning('Dump of %d asyncio tasks and %d threads\n%s\n%s',
+                    task_count, thread_count, tasks, threads,
+                    extra={'task_count': task_count, 'thread_count': thread_count})
+
+
+def _dump_thread(loop, timeout):
+    done = threading.Event()
+    # Acquired by whichever of the callback and the fallback runs first, so
+    # that a loop that recovers after the timeout doesn't log a stale dump.
+    claim = threading.Lock()
+
+    def callback():
+        if not claim.acquire(blocking=False):
+            return
+        try:
+            dump_tasks(loop)
+        finally:
+            done.set()
+
+    try:
+        loop.call_soon_threadsafe(callback)
+    except RuntimeError:
+        pass     # Loop is closed
+    if not done.wait(timeout) and claim.acquire(blocking=False):
+        threads, thread_count = format_threads()
+        _logger.warning('Event loop did not respond within %.3f s; dump of %d threads\n%s',
+                        timeout, thread_count, threads,
+                        extra={'thread_count': thread_count})
+
+
+def setup_task_dump(loop, signum=signal.SIGQUIT, timeout=5.0):
+    """Install a signal handler that logs the asyncio tasks and thread stacks.
+
+    This also installs a task factory on `loop` to record when tasks are
+    created, so that their ages can be reported. Tasks created before this
+    is called are reported with unknown age.
+
+    Note that with the default signal, this replaces the default action of
+    SIGQUIT (typically sent with Ctrl-\\), which is to dump core. Pass a
+    different `signum` if that is needed.
+
+    Parameters
+    ----------
+    loop : :class:`asyncio.AbstractEventLoop`
+        Event loop whose tasks are dumped
+    signum : int, optional
+        Signal number for the signal handler to install
+    timeout : float, optional
+        Time in seconds to wait for the event loop to respond, after which
+        only the thread stacks are logged
+    """
+    _install_task_factory(loop)
+
+    def handler(signum, frame):
+        # It's not safe to log or to use the loop from a signal handler, so
+        # start a separate thread.
+        thread = threading.Thread(target=_dump_thread, args=(loop, timeout))
+        thread.daemon = True
+        thread.start()
+
+    signal.signal(signum, handler)
@@ -0,0 +1,254 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Read-through cache for immutable telescope state keys.
+
+See :class:`CachingTelescopeState` for details.
+"""
+
+import collections
+import concurrent.futures
+import threading
+
+try:
+    import katsdptelstate.encoding
+    import katsdptelstate.utils
+except ImportError:
+    pass
+
+
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+"""Cache statistics returned by :meth:`CachingTelescopeState.cache_info`."""
+
+
+class _Cache:
+    """State shared between a :class:`CachingTelescopeState` and its views."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.values = collections.OrderedDict()    # Encoded values by full key
+        self.inflight = {}                         # Futures by (prefixes, key)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, full_key):
+        """Get an encoded value from the cache. The caller must hold the lock."""
+        value = self.values.get(full_key)
+        if value is not None:
+            self.values.move_to_end(full_key)
+        return value
+
+    def store(self, full_key, value):
+        """Store an encoded value in the cache. The caller must hold the lock."""
+        self.values[full_key] = value
+        self.values.move_to_end(full_key)
+        while len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+
+class CachingTelescopeState:
+    """Wrapper around a :class:`katsdptelstate.TelescopeState` that caches
+    immutable keys.
+
+    Since immutable keys can never change once set, their (encoded) values
+    are kept in a bounded least-recently-used cache, so that repeated
+    lookups do not go to the database. Mutable and indexed keys are always
+    fetched from the database, as are keys that do not exist (since they
+    could be set later). Values are decoded on every lookup, so callers may
+    safely modify the returned objects.
+
+    A view has several prefixes, and a value cached for one of its less
+    specific prefixes is only used after checking that the key has not been
+    set under a more specific one (which costs a database query per prefix).
+
+    If several threads look up the same key at the same time and it is not
+    cached, only one of them queries the database and the others wait for
+    its result.
+
+    Views created with :meth:`view` and :meth:`root` share the cache. Other
+    methods and attributes (such as :meth:`~katsdptelstate.TelescopeState.add`
+    and :meth:`~katsdptelstate.TelescopeState.get_range`) are passed through
+    to the wrapped object.
+
+    This is normally created by :class:`~katsdpservices.ArgumentParser`
+    when it is constructed with `telstate_cache_size`.
+
+    Parameters
+    ----------
+    telstate : :class:`katsdptelstate.TelescopeState`
+        Telescope state to wrap
+    maxsize : int, optional
+        Maximum number of values to cache
+    """
+    def __init__(self, telstate, maxsize=1024, *, _cache=None):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+        object.__setattr__(self, '_telstate', telstate)
+        object.__setattr__(self, '_cache', _cache if _cache is not None else _Cache(maxsize))
+
+    @property
+    def wrapped(self):
+        """The wrapped :class:`katsdptelstate.TelescopeState`."""
+        return self._telstate
+
+    def cache_info(self):
+        """Get cache statistics, in the style of :func:`functools.lru_cache`.
+
+        Returns
+        -------
+        info : :class:`CacheInfo`
+        """
+        cache = self._cache
+        with cache.lock:
+            return CacheInfo(cache.hits, cache.misses, cache.maxsize, len(cache.values))
+
+    def cache_clear(self):
+        """Discard all cached values and reset the statistics."""
+        cache = self._cache
+        with cache.lock:
+            cache.values.clear()
+            cache.hits = 0
+            cache.misses = 0
+
+    def _full_keys(self, key):
+        key = katsdptelstate.utils.ensure_binary(key)
+        return [katsdptelstate.utils.ensure_binary(prefix) + key
+                for prefix in self._telstate.prefixes]
+
+    def _fetch(self, full_keys):
+        """Query the database, and cache the value if it is immutable.
+
+        Returns the raw value as returned by the backend, or ``None``.
+        """
+        backend = self._telstate.backend
+        for full_key in full_keys:
+            value, timestamp = backend.get(full_key)
+            if value is not None:
+                if isinstance(value, bytes) and timestamp is None:
+                    with self._cache.lock:
+                        self._cache.store(full_key, value)
+                return value
+        return None
+
+    def _get_raw(self, key):
+        full_keys = self._full_keys(key)
+        cache = self._cache
+        with cache.lock:
+            hit = None
+            for i, full_key in enumerate(full_keys):
+                value = cache.lookup(full_key)
+                if value is not None:
+                    hit = i
+                    break
+            if hit == 0:
+                cache.hits += 1
+                return value
+            if hit is None:
+                cache.misses += 1
+                inflight_key = tuple(full_keys)
+                future = cache.inflight.get(inflight_key)
+                owner = future is None
+                if owner:
+                    future = concurrent.futures.Future()
+                    cache.inflight[inflight_key] = future
+        if hit is not None:
+            # The value is for a less specific prefix. The key may since have
+            # been set under a more specific one, which takes precedence.
+            newer = self._fetch(full_keys[:hit])
+            with cache.lock:
+                if newer is None:
+                    cache.hits += 1
+                    return value
+                cache.misses += 1
+                return newer
+        if not owner:
+            return future.result()
+        try:
+            value = self._fetch(full_keys)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with cache.lock:
+                del cache.inflight[inflight_key]
+
+    def get(self, key, default=None, return_encoded=False):
+        """Get a single value (see :meth:`katsdptelstate.TelescopeState.get`)."""
+        value = self._get_raw(key)
+        if value is None:
+            return default
+        elif return_encoded:
+            return value
+        elif isinstance(value, dict):
+            # Indexed key
+            return {katsdptelstate.encoding.decode_value(sub_key):
+                    katsdptelstate.encoding.decode_value(sub_value)
+                    for sub_key, sub_value in value.items()}
+        else:
+            return katsdptelstate.encoding.decode_value(value)
+
+    def __getitem__(self, key):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError('{} not found'.format(key))
+        return value
+
+    def __getattr__(self, key):
+        # Only called for names not found on this class
+        if key.startswith('_') or hasattr(type(self._telstate), key):
+            return getattr(self._telstate, key)
+        try:
+            return self[key]
+        except KeyError as error:
+            raise AttributeError(str(error))
+
+    def __setattr__(self, key, value):
+        setattr(self._telstate, key, value)
+
+    def __setitem__(self, key, value):
+        self._telstate[key] = value
+
+    def __contains__(self, key):
+        return key in self._telstate
+
+    def delete(self, key):
+        """Remove a key (see :meth:`katsdptelstate.TelescopeState.delete`)."""
+        with self._cache.lock:
+            for full_key in self._full_keys(key):
+                self._cache.values.pop(full_key, None)
+        self._telstate.delete(key)
+
+    def clear(self):
+        """Remove all keys (see :meth:`katsdptelstate.TelescopeState.clear`)."""
+        with self._cache.lock:
+            self._cache.values.clear()
+        self._telstate.clear()
+
+    def view(self, name, add_separator=True, exclusive=False):
+        """Create a view that shares the cache (see :meth:`katsdptelstate.TelescopeState.view`)."""
+        return CachingTelescopeState(self._telstate.view(name, add_separator, exclusive),
+                                     _cache=self._cache)
+
+    def root(self):
+        """Create a root view that shares the cache."""
+        return CachingTelescopeState(self._telstate.root(), _cache=self._cache)
+
+    def __repr__(self):
+        return '<CachingTelescopeState {!r}>'.format(self._telstate)
@@ -0,0 +1,267 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Lightweight tracing of startup steps, with Chrome trace export.
+
+Tracing is enabled by setting ``KATSDP_TRACE_FILE`` to a path. Spans are
+then recorded in memory, and appended to that file at exit (and before
+:func:`~katsdpservices.restart_process` replaces the process image) in the
+Chrome trace event format, which can be loaded into Perfetto
+(https://ui.perfetto.dev) or ``chrome://tracing``. The file uses the JSON
+array format without the closing bracket, which those tools accept, so that
+a restarted process (or several processes sharing the file) can append to
+it.
+
+katsdpservices records spans for its own steps (importing the package,
+:func:`~katsdpservices.setup_logging`, connecting to the telescope state
+and fetching config in :class:`~katsdpservices.ArgumentParser`,
+:func:`~katsdpservices.start_aiomonitor` and restarts), as well as a span
+from the creation of the process (or the last exec) until katsdpservices
+is imported. Services can add their own::
+
+    from katsdpservices.tracing import span
+
+    with span('load model', path=path):
+        ...
+
+When tracing is disabled, :func:`span` costs a single branch and returns a
+shared object that does nothing.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+
+_EXEC_TIME_ENV = '_KATSDP_TRACE_EXEC_TIME'
+_path = None
+_enabled = False
+_events = []
+_thread_names = {}
+_lock = threading.Lock()
+_import_span = None
+"""Span for importing the katsdpservices package."""
+_offset = time.time() - time.perf_counter()
+"""Offset to convert :func:`time.perf_counter` values to Unix time."""
+
+
+def _now():
+    """Current time in microseconds since the Unix epoch."""
+    return (time.perf_counter() + _offset) * 1e6
+
+
+class Span:
+    """A traced interval of time, which starts when the span is created.
+
+    It is normally created by :func:`span` and used as a context manager,
+    but :meth:`end` can also be called explicitly.
+    """
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args, start=None):
+        self.name = name
+        self.args = args
+        self.start = _now() if start is None else start
+
+    def end(self):
+        """Finish the span and record it."""
+        thread = threading.current_thread()
+        event = {
+            'name': self.name,
+            'ph': 'X',
+            'ts': self.start,
+            'dur': _now() - self.start,
+            'pid': os.getpid(),
+            'tid': thread.ident
+        }
+        if self.args:
+            event['args'] = self.args
+        _thread_names[thread.ident] = thread.name
+        _events.append(event)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.args = dict(self.args, exception=exc_type.__name__)
+        self.end()
+
+
+class _NullSpan:
+    """Span returned when tracing is disabled."""
+    __slots__ = ()
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, /, **args):
+    """Start a span.
+
+    Parameters
+    ----------
+    name : str
+        Name of the span
+    **args
+        Extra values (which must be JSON-serialisable) to attach to the span
+
+    Returns
+    -------
+    span : :class:`Span`
+        The span, which should be ended with :meth:`Span.end` or by using it
+        as a context manager. If tracing is disabled, a dummy object with the
+        same interface is returned.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, args)
+
+
+def instant(name, /, **args):
+    """Record an instantaneous event."""
+    if not _enabled:
+        return
+    thread = threading.current_thread()
+    event = {
+        'name': name,
+        'ph': 'i',
+        's': 't',
+        'ts': _now(),
+        'pid': os.getpid(),
+        'tid': thread.ident
+    }
+    if args:
+        event['args'] = args
+    _thread_names[thread.ident] = thread.name
+    _events.append(event)
+
+
+def is_enabled():
+    """Whether tracing is enabled."""
+    return _enabled
+
+
+def flush_trace():
+    """Append the events recorded so far to the trace file.
+
+    This is called automatically at exit and before a restart. It does
+    nothing if tracing is disabled.
+    """
+    if not _enabled:
+        return
+    pid = os.getpid()
+    with _lock:
+        events = _events[:]
+        del _events[:len(events)]
+        names = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in _thread_names.items()
+        ]
+        names.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                      'args': {'name': os.path.basename(sys.argv[0]) or sys.executable}})
+        with open(_path, 'a') as f:
+            if f.tell() == 0:
+                f.write('[\n')
+            for event in names + events:
+                f.write(json.dumps(event, default=str))
+                f.write(',\n')
+
+
+def before_exec():
+    """Prepare for the process image to be replaced.
+
+    The recorded events are written out, and the time is passed to the new
+    process image through the environment, so that it can record a span
+    covering its startup.
+    """
+    if not _enabled:
+        return
+    instant('exec')
+    flush_trace()
+    os.environ[_EXEC_TIME_ENV] = repr(_now())
+
+
+def _process_start():
+    """Estimate when this process image started, in microseconds since the epoch.
+
+    Returns ``None`` if it cannot be determined.
+    """
+    exec_time = os.environ.pop(_EXEC_TIME_ENV, None)
+    if exec_time is not None:
+        return float(exec_time)
+    try:
+        with open('/proc/self/stat', 'rb') as f:
+            stat = f.read()
+        with open('/proc/uptime', 'rb') as f:
+            uptime = float(f.read().split()[0])
+        # Field 22 is the start time in clock ticks after boot. As in
+        # :mod:`.resources`, split after the command name.
+        start_ticks = int(stat[stat.rindex(b')') + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+    since_start = uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    return _now() - since_start * 1e6
+
+
+def _end_import():
+    """End the span for importing katsdpservices, started by :func:`_init`."""
+    global _import_span
+    _import_span.end()
+    _import_span = _NULL_SPAN
+
+
+def set_trace_file(path):
+    """Enable tracing to the given file, or disable it if `path` is ``None``.
+
+    This is normally configured by ``KATSDP_TRACE_FILE`` instead. Events
+    recorded while tracing was previously enabled are discarded.
+    """
+    global _path, _enabled
+    with _lock:
+        _events.clear()
+        _thread_names.clear()
+        _path = path
+        _enabled = path is not None
+
+
+def _init():
+    global _import_span
+    path = os.environ.get('KATSDP_TRACE_FILE')
+    if path:
+        set_trace_file(path)
+        start = _process_start()
+        if start is not None:
+            Span('process startup', {}, start=start).end()
+        atexit.register(flush_trace)
+    # This module is imported first by katsdpservices/__init__.py, which
+    # calls _end_import once the rest of the package has been imported.
+    _import_span = span('import katsdpservices')
+
+
+_init()
@@ -0,0 +1,77 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Benchmark :meth:`katsdpservices.ArgumentParser.parse_args` with a telescope state.
+
+An in-memory :class:`katsdptelstate.TelescopeState` is substituted for the
+Redis connection, and populated with a config of a realistic size: a root
+config with several dozen options, per-process sub-dictionaries embedded in
+it, and ``config.<name>`` keys. The time includes constructing the parser, since a
+parser can only be used once.
+"""
+
+from unittest import mock
+
+import katsdptelstate
+
+from katsdpservices import ArgumentParser
+
+from benchutil import Result, measure
+
+
+N_OPTIONS = 50
+N_PROCESSES = 20
+
+
+def _make_telstate():
+    telstate = katsdptelstate.TelescopeState()
+    options = {'option_{}'.format(i): i for i in range(N_OPTIONS)}
+    config = dict(options)
+    config['ingest'] = {str(j): dict(options) for j in range(N_PROCESSES)}
+    telstate['config'] = config
+    for j in range(N_PROCESSES):
+        telstate['config.ingest.{}'.format(j)] = {'option_0': j, 'option_1': -j}
+    return telstate
+
+
+def _make_parser():
+    parser = ArgumentParser()
+    for i in range(N_OPTIONS):
+        parser.add_argument('--option-{}'.format(i), type=int, default=0)
+    parser.add_argument('--unrelated', type=str, default='')
+    return parser
+
+
+def run(quick=False):
+    telstate = _make_telstate()
+    argv = ['--telstate=telstate.invalid', '--name=ingest.3', '--option-2=5']
+
+    def parse(n):
+        for i in range(n):
+            _make_parser().parse_args(argv)
+
+    def parse_no_telstate(n):
+        for i in range(n):
+            _make_parser().parse_args(['--option-2=5'])
+
+    n = 20 if quick else 200
+    repeat = 3 if quick else 5
+    with mock.patch('katsdptelstate.TelescopeState', return_value=telstate):
+        wall, cpu = measure(parse, n, repeat)
+    yield Result('argparse.telstate.latency', wall * 1e6, 'us', False)
+    wall, cpu = measure(parse_no_telstate, n, repeat)
+    yield Result('argparse.no_telstate.latency', wall * 1e6, 'us', False)
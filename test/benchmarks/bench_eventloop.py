@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Compare callback throughput of the asyncio and uvloop event loops.
+
+Three workloads are measured for each event loop implementation:
+
+call_soon
+    A chain of callbacks, each scheduling the next with ``call_soon``
+futures
+    A coroutine repeatedly awaiting a future resolved by a callback
+tasks
+    Creating and awaiting many short tasks
+"""
+
+import argparse
+import asyncio
+import time
+
+from katsdpservices.eventloop import new_event_loop
+
+from benchutil import Result
+
+
+def bench_call_soon(loop, n):
+    done = loop.create_future()
+    remaining = n
+
+    def callback():
+        nonlocal remaining
+        remaining -= 1
+        if remaining:
+            loop.call_soon(callback)
+        else:
+            done.set_result(None)
+
+    start = time.perf_counter()
+    loop.call_soon(callback)
+    loop.run_until_complete(done)
+    return time.perf_counter() - start
+
+
+def bench_futures(loop, n):
+    async def run():
+        for i in range(n):
+            future = loop.create_future()
+            loop.call_soon(future.set_result, i)
+            await future
+
+    start = time.perf_counter()
+    loop.run_until_complete(run())
+    return time.perf_counter() - start
+
+
+def bench_tasks(loop, n):
+    async def nothing():
+        pass
+
+    async def run():
+        for i in range(0, n, 100):
+            await asyncio.gather(*[nothing() for j in range(100)])
+
+    start = time.perf_counter()
+    loop.run_until_complete(run())
+    return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    'call_soon': bench_call_soon,
+    'futures': bench_futures,
+    'tasks': bench_tasks
+}
+
+
+def _kinds():
+    kinds = ['asyncio']
+    try:
+        import uvloop   # noqa: F401
+    except ImportError:
+        pass
+    else:
+        kinds.append('uvloop')
+    return kinds
+
+
+def _best(func, kind, n, repeat):
+    loop = new_event_loop(kind)
+    try:
+        return min(func(loop, n) for i in range(repeat))
+    finally:
+        loop.close()
+
+
+def run(quick=False):
+    n = 10000 if quick else 200000
+    repeat = 3 if quick else 5
+    for name, func in BENCHMARKS.items():
+        for kind in _kinds():
+            best = _best(func, kind, n, repeat)
+            yield Result('eventloop.{}.{}.ops_per_second'.format(kind, name), n / best,
+                         'ops/s', True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', type=int, default=200000, help='operations per run [%(default)s]')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark [%(default)s]')
+    args = parser.parse_args()
+
+    kinds = _kinds()
+    if 'uvloop' not in kinds:
+        print('uvloop is not installed; only measuring asyncio')
+
+    print('{:12} {:10} {:>14}'.format('benchmark', 'loop', 'ops/s'))
+    for name, func in BENCHMARKS.items():
+        for kind in kinds:
+            best = _best(func, kind, args.n, args.repeat)
+            print('{:12} {:10} {:14,.0f}'.format(name, kind, args.n / best))
+
+
+if __name__ == '__main__':
+    main()
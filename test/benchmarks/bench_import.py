@@ -0,0 +1,50 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Benchmark the time to import :mod:`katsdpservices`.
+
+Each measurement is made in a fresh interpreter. The total time to start
+an interpreter and exit is reported separately, for reference.
+"""
+
+import subprocess
+import sys
+import time
+
+from benchutil import Result
+
+
+_SCRIPT = '''
+import time
+start = time.perf_counter()
+import katsdpservices
+print(time.perf_counter() - start)
+'''
+
+
+def run(quick=False):
+    repeat = 3 if quick else 10
+    best_import = best_startup = float('inf')
+    for i in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _SCRIPT], check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout
+        best_import = min(best_import, float(output))
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        best_startup = min(best_startup, time.perf_counter() - start)
+    yield Result('import.katsdpservices.time', best_import * 1e3, 'ms', False)
+    yield Result('import.interpreter_startup.time', best_startup * 1e3, 'ms', False)
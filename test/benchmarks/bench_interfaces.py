@@ -0,0 +1,33 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Benchmark :func:`katsdpservices.get_interface_address`."""
+
+from katsdpservices import get_interface_address
+
+from benchutil import Result, measure
+
+
+def run(quick=False):
+    def lookup(n):
+        for i in range(n):
+            get_interface_address('lo')
+
+    n = 1000 if quick else 10000
+    repeat = 3 if quick else 5
+    wall, cpu = measure(lookup, n, repeat)
+    yield Result('interfaces.get_interface_address.latency', wall * 1e6, 'us', False)
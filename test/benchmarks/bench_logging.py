@@ -0,0 +1,115 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Benchmark the handlers installed by :func:`katsdpservices.setup_logging`.
+
+The configurations are the default (stderr), ``KATSDP_LOG_ONELINE``,
+``KATSDP_LOG_GELF_ADDRESS`` pointing at a local UDP socket and
+``KATSDP_LOG_FILE`` pointing at a temporary file (both of which, as in
+production, are in addition to stderr). Output to stderr is redirected to
+``/dev/null``. The UDP sink is drained by a separate thread, whose CPU time
+is not counted.
+"""
+
+import contextlib
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from katsdpservices import setup_logging
+
+from benchutil import Result, measure
+
+
+@contextlib.contextmanager
+def _udp_sink():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.settimeout(0.1)
+    stop = threading.Event()
+
+    def drain():
+        while not stop.is_set():
+            try:
+                sock.recv(65536)
+            except socket.timeout:
+                pass
+
+    thread = threading.Thread(target=drain, daemon=True)
+    thread.start()
+    try:
+        yield '127.0.0.1:{}'.format(sock.getsockname()[1])
+    finally:
+        stop.set()
+        thread.join()
+        sock.close()
+
+
+@contextlib.contextmanager
+def _configured(env):
+    root = logging.getLogger()
+    saved_handlers = root.handlers[:]
+    saved_level = root.level
+    with open(os.devnull, 'w') as devnull, \
+            mock.patch.dict(os.environ, env), \
+            mock.patch.object(sys, 'stderr', devnull):
+        root.handlers = []
+        try:
+            setup_logging(add_signal_handler=False, add_excepthook=False)
+            yield
+        finally:
+            for handler in root.handlers:
+                handler.close()
+            root.handlers = saved_handlers
+            root.setLevel(saved_level)
+
+
+def _log(n):
+    logger = logging.getLogger('katsdpservices.bench')
+    for i in range(n):
+        logger.info('Benchmark record %d with a value of %.3f', i, i * 0.5)
+
+
+def _log_filtered(n):
+    logger = logging.getLogger('katsdpservices.bench')
+    for i in range(n):
+        logger.debug('Benchmark record %d with a value of %.3f', i, i * 0.5)
+
+
+def run(quick=False):
+    n = 2000 if quick else 20000
+    repeat = 3 if quick else 5
+    with _udp_sink() as address, tempfile.TemporaryDirectory() as tmpdir:
+        configs = [
+            ('stderr', {}),
+            ('oneline', {'KATSDP_LOG_ONELINE': '1'}),
+            ('gelf', {'KATSDP_LOG_GELF_ADDRESS': address}),
+            ('file', {'KATSDP_LOG_FILE': os.path.join(tmpdir, 'bench.log')})
+        ]
+        for name, env in configs:
+            with _configured(env):
+                wall, cpu = measure(_log, n, repeat)
+            yield Result('logging.{}.records_per_second'.format(name), 1 / wall,
+                         'records/s', True)
+            yield Result('logging.{}.cpu_per_record'.format(name), cpu * 1e6, 'us', False)
+        with _configured({}):
+            wall, cpu = measure(_log_filtered, n * 10, repeat)
+        yield Result('logging.disabled_debug.cost', wall * 1e9, 'ns', False)
@@ -0,0 +1,47 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Benchmark updates to :mod:`katsdpservices.metrics`.
+
+Updates are made on hot paths, so they should cost well under a
+microsecond each.
+"""
+
+from katsdpservices.metrics import Counter, Histogram, Registry
+
+from benchutil import Result, measure
+
+
+def run(quick=False):
+    registry = Registry()
+    counter = Counter('bench_total', 'Benchmark counter', registry=registry)
+    hist = Histogram('bench_seconds', 'Benchmark histogram', registry=registry)
+
+    def inc(n):
+        for i in range(n):
+            counter.inc()
+
+    def observe(n):
+        for i in range(n):
+            hist.observe(0.01)
+
+    n = 100000 if quick else 1000000
+    repeat = 3 if quick else 5
+    wall, cpu = measure(inc, n, repeat)
+    yield Result('metrics.counter_inc.cost', wall * 1e9, 'ns', False)
+    wall, cpu = measure(observe, n, repeat)
+    yield Result('metrics.histogram_observe.cost', wall * 1e9, 'ns', False)
@@ -0,0 +1,59 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Benchmark the latency of :func:`katsdpservices.restart_process`.
+
+A child process restarts itself repeatedly, and the latency is the mean
+time from calling :func:`~katsdpservices.restart_process` until the new
+process image has imported :mod:`katsdpservices`, which is the earliest
+point at which a service could start its own setup.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchutil import Result
+
+
+_SCRIPT = '''
+import os
+import time
+import katsdpservices
+
+remaining = int(os.environ['BENCH_RESTART_REMAINING'])
+if 'BENCH_RESTART_START' not in os.environ:
+    os.environ['BENCH_RESTART_START'] = repr(time.time())
+if remaining > 0:
+    os.environ['BENCH_RESTART_REMAINING'] = str(remaining - 1)
+    katsdpservices.restart_process()
+else:
+    print(time.time() - float(os.environ['BENCH_RESTART_START']))
+'''
+
+
+def run(quick=False):
+    n = 5 if quick else 20
+    with tempfile.NamedTemporaryFile('w', suffix='.py') as script:
+        script.write(_SCRIPT)
+        script.flush()
+        env = dict(os.environ, BENCH_RESTART_REMAINING=str(n))
+        env.pop('BENCH_RESTART_START', None)
+        output = subprocess.run([sys.executable, script.name], env=env, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout
+    yield Result('restart.restart_process.latency', float(output) / n * 1e3, 'ms', False)
@@ -0,0 +1,63 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+
+"""Helpers shared by the benchmarks.
+
+Each benchmark module has a ``run(quick)`` function that yields
+:class:`Result` objects, so that it can be run by ``run.py``.
+"""
+
+import collections
+import time
+
+
+Result = collections.namedtuple('Result', ['name', 'value', 'unit', 'higher_is_better'])
+"""A single measurement.
+
+``higher_is_better`` indicates whether an increase in ``value`` is an
+improvement (e.g. for throughput) or a regression (e.g. for latency).
+"""
+
+
+def measure(func, n, repeat):
+    """Measure the cost of an operation.
+
+    Parameters
+    ----------
+    func : callable
+        Function that performs the operation `n` times
+    n : int
+        Number of operations per call
+    repeat : int
+        Number of times to call `func`. The fastest call is used, since
+        slower ones are most likely due to interference.
+
+    Returns
+    -------
+    wall : float
+        Wall-clock time per operation, in seconds
+    cpu : float
+        CPU time of the calling thread per operation, in seconds
+    """
+    best_wall = best_cpu = float('inf')
+    for i in range(repeat):
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        func(n)
+        best_cpu = min(best_cpu, time.thread_time() - start_cpu)
+        best_wall = min(best_wall, time.perf_counter() - start_wall)
+    return best_wall / n, best_cpu / n
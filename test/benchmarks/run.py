@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Run the katsdpservices benchmarks and compare them to a baseline.
+
+Usage::
+
+    python test/benchmarks/run.py                 # compare to baseline.json
+    python test/benchmarks/run.py --save          # update baseline.json
+    python test/benchmarks/run.py --quick logging # fewer iterations, one module
+
+The report lists each measurement with the baseline value and the relative
+change, and flags changes for the worse that exceed the threshold. The exit
+status is 1 if there are any such regressions. Baselines are only
+meaningful on the machine where they were recorded, so the baseline file
+should be regenerated with ``--save`` when comparing on a new machine.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+
+
+MODULES = ['import', 'logging', 'argparse', 'interfaces', 'restart', 'eventloop', 'metrics']
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def run_benchmarks(modules, quick):
+    results = {}
+    for module_name in modules:
+        module = importlib.import_module('bench_' + module_name)
+        for result in module.run(quick=quick):
+            print('  {:50} {:14.3f} {}'.format(result.name, result.value, result.unit),
+                  file=sys.stderr)
+            results[result.name] = {
+                'value': result.value,
+                'unit': result.unit,
+                'higher_is_better': result.higher_is_better
+            }
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison report.
+
+    Returns
+    -------
+    regressions : int
+        Number of measurements that are worse than the baseline by more
+        than `threshold` (as a fraction)
+    """
+    regressions = 0
+    print('{:50} {:>14} {:>14} {:>9}  {}'.format('benchmark', 'baseline', 'current', 'change',
+                                                 'unit'))
+    for name, result in results.items():
+        value = result['value']
+        base = baseline.get(name)
+        if base is None:
+            print('{:50} {:>14} {:14.3f} {:>9}  {}'.format(name, '-', value, 'new',
+                                                           result['unit']))
+            continue
+        change = (value - base['value']) / base['value'] if base['value'] else 0.0
+        worse = -change if result['higher_is_better'] else change
+        flag = ''
+        if worse > threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif worse < -threshold:
+            flag = '  improved'
+        print('{:50} {:14.3f} {:14.3f} {:+8.1%}  {}{}'.format(
+            name, base['value'], value, change, result['unit'], flag))
+    for name in baseline:
+        if name not in results:
+            print('{:50} {:14.3f} {:>14} {:>9}'.format(name, baseline[name]['value'], '-',
+                                                       'missing'))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the katsdpservices benchmarks')
+    parser.add_argument('modules', nargs='*', metavar='MODULE',
+                        help='benchmark modules to run [all of {}]'.format(', '.join(MODULES)))
+    parser.add_argument('--quick', action='store_true',
+                        help='run fewer iterations (less accurate)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='baseline file [%(default)s]')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results to the baseline file instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative change counted as a regression [%(default)s]')
+    args = parser.parse_args()
+    for module in args.modules:
+        if module not in MODULES:
+            parser.error('unknown benchmark module {!r}'.format(module))
+
+    modules = args.modules or MODULES
+    results = run_benchmarks(modules, args.quick)
+    if args.save:
+        data = {}
+        if args.modules and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                data = json.load(f)
+        data.setdefault('results', {}).update(results)
+        data['python'] = platform.python_version()
+        data['machine'] = platform.machine()
+        data['date'] = datetime.date.today().isoformat()
+        with open(args.baseline, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Saved {} results to {}'.format(len(results), args.baseline))
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+    except FileNotFoundError:
+        print('No baseline found at {}; use --save to create one'.format(args.baseline))
+        baseline = {}
+    if args.modules:
+        prefixes = tuple(name + '.' for name in modules)
+        baseline = {name: value for name, value in baseline.items() if name.startswith(prefixes)}
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print('{} regression(s) beyond {:.0%}'.format(regressions, args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
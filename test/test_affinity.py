@@ -0,0 +1,148 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.affinity`."""
+
+import concurrent.futures
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from katsdpservices import ArgumentParser
+from katsdpservices.affinity import (
+    add_affinity_arguments, apply_affinity, interface_numa_node, make_thread_pinner,
+    numa_node_cpus, parse_cpu_list, _set_preferred_node)
+
+
+class TestParseCpuList(unittest.TestCase):
+    def test_valid(self):
+        self.assertEqual([0, 1, 2, 3, 8, 10, 11], parse_cpu_list('0-3,8,11,10-11\n'))
+        self.assertEqual([], parse_cpu_list(''))
+
+    def test_invalid(self):
+        for text in ['a', '3-1', '1,,2', '-1', '1-']:
+            with self.assertRaises(ValueError):
+                parse_cpu_list(text)
+
+
+class TestSetPreferredNode(unittest.TestCase):
+    def test_no_libnuma(self):
+        with mock.patch('ctypes.util.find_library', return_value=None), \
+                self.assertLogs('katsdpservices.affinity', 'WARNING'):
+            self.assertFalse(_set_preferred_node(0))
+
+    def test_load_failure(self):
+        with mock.patch('ctypes.util.find_library', return_value='libnuma.so.1'), \
+                mock.patch('ctypes.CDLL', side_effect=OSError('cannot open shared object')), \
+                self.assertLogs('katsdpservices.affinity', 'WARNING') as cm:
+            self.assertFalse(_set_preferred_node(0))
+        self.assertIn('Could not load libnuma.so.1', cm.output[0])
+
+
+class TestFakeSysfs(unittest.TestCase):
+    def _write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        patcher = mock.patch('katsdpservices.affinity._SYS_ROOT', self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self._write('devices/system/node/node1/cpulist', '4-7,12-15\n')
+        self._write('class/net/eth0/device/numa_node', '1\n')
+        self._write('class/net/eth1/device/numa_node', '-1\n')
+        os.makedirs(os.path.join(self.root, 'class/net/lo'))
+
+    def test_numa_node_cpus(self):
+        self.assertEqual([4, 5, 6, 7, 12, 13, 14, 15], numa_node_cpus(1))
+        with self.assertRaises(ValueError):
+            numa_node_cpus(2)
+
+    def test_interface_numa_node(self):
+        self.assertEqual(1, interface_numa_node('eth0'))
+        self.assertIsNone(interface_numa_node('eth1'))
+        self.assertIsNone(interface_numa_node('lo'))
+        with self.assertRaises(ValueError):
+            interface_numa_node('eth2')
+
+    def test_apply_numa_interface(self):
+        parser = ArgumentParser()
+        add_affinity_arguments(parser)
+        args = parser.parse_args(['--numa-interface', 'eth0', '--cpus', '0-5'])
+        with mock.patch('os.sched_setaffinity') as setaffinity, \
+                mock.patch('katsdpservices.affinity._set_preferred_node') as set_preferred:
+            apply_affinity(args)
+        setaffinity.assert_called_with(mock.ANY, {4, 5})
+        set_preferred.assert_called_once_with(1)
+
+    def test_apply_disjoint(self):
+        parser = ArgumentParser()
+        add_affinity_arguments(parser)
+        args = parser.parse_args(['--numa-node', '1', '--cpus', '0-3'])
+        with self.assertRaises(ValueError):
+            apply_affinity(args)
+
+
+class TestLocalAffinity(unittest.TestCase):
+    """Tests that change the affinity of the test process (restored afterwards)."""
+    def setUp(self):
+        self.original = os.sched_getaffinity(0)
+        self.addCleanup(self._restore)
+        self.cpu = min(self.original)
+        self.parser = ArgumentParser()
+        add_affinity_arguments(self.parser)
+
+    def _restore(self):
+        for tid in os.listdir('/proc/self/task'):
+            try:
+                os.sched_setaffinity(int(tid), self.original)
+            except ProcessLookupError:
+                pass
+
+    def test_no_options(self):
+        self.assertIsNone(apply_affinity(self.parser.parse_args([])))
+        self.assertEqual(self.original, os.sched_getaffinity(0))
+
+    def test_cpus(self):
+        # Start a thread before applying, to check that it is updated too
+        event = threading.Event()
+        thread = threading.Thread(target=event.wait)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(event.set)
+        args = self.parser.parse_args(['--cpus', str(self.cpu)])
+        self.assertEqual({self.cpu}, apply_affinity(args))
+        self.assertEqual({self.cpu}, os.sched_getaffinity(0))
+        self.assertEqual({self.cpu}, os.sched_getaffinity(thread.native_id))
+
+    def test_thread_pinner(self):
+        cpus = sorted(self.original)[:2]
+        pinner = make_thread_pinner(cpus)
+        with concurrent.futures.ThreadPoolExecutor(4, initializer=pinner) as pool:
+            futures = [pool.submit(os.sched_getaffinity, 0) for i in range(16)]
+            masks = [future.result() for future in futures]
+        for mask in masks:
+            self.assertEqual(1, len(mask))
+            self.assertIn(min(mask), cpus)
+        # The calling thread is unaffected
+        self.assertEqual(self.original, os.sched_getaffinity(0))
@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, 2022, 2024 National Research Foundation (SARAO)
+# Copyright (c) 2017-2020, 2022, 2024, 2026 National Research Foundation (SARAO)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -17,12 +17,16 @@
 """Tests for :mod:`katsdpservices.aiomonitor`."""
 
 import asyncio
+import threading
 import unittest
 from unittest import mock
 
 import aiomonitor
+import click.testing
 
 from katsdpservices import ArgumentParser, start_aiomonitor, add_aiomonitor_arguments
+from katsdpservices import get_loop_monitor
+from katsdpservices.aiomonitor import register_monitor_command
 
 
 class TestStartAiomonitor(unittest.TestCase):
@@ -68,3 +72,49 @@ class TestStartAiomonitor(unittest.TestCase):
             console_port=2345,
             webui_port=4321,
             locals=locals_)
+
+    def test_with_loop_monitor(self):
+        args = self.parser.parse_args(['--aiomonitor', '--loop-monitor'])
+        with start_aiomonitor(self.loop, args, {}):
+            self.assertIsNotNone(get_loop_monitor(self.loop))
+        self.mock_start.assert_called_once()
+        self.mock_start.return_value.__exit__.assert_called_once()
+        self.assertIsNone(get_loop_monitor(self.loop))
+
+    def test_start_failure(self):
+        """If aiomonitor fails to start, the loop monitor is stopped."""
+        self.mock_start.side_effect = OSError('Address already in use')
+        args = self.parser.parse_args(['--aiomonitor', '--loop-monitor'])
+        with self.assertRaises(OSError):
+            start_aiomonitor(self.loop, args, {})
+        self.assertIsNone(get_loop_monitor(self.loop))
+        self.assertNotIn('loop-monitor', [thread.name for thread in threading.enumerate()])
+
+
+class TestMonitorCommands(unittest.TestCase):
+    def setUp(self):
+        self.parser = ArgumentParser()
+        add_aiomonitor_arguments(self.parser)
+        patcher = mock.patch('aiomonitor.start_monitor', autospec=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_custom_command(self):
+        from aiomonitor.context import command_done
+        from aiomonitor.termui.commands import monitor_cli
+
+        callback = mock.Mock(return_value='hello from test')
+        register_monitor_command('katsdp-test', callback, 'Test command')
+        args = self.parser.parse_args(['--aiomonitor'])
+        with start_aiomonitor(self.loop, args, {}):
+            pass
+        self.assertIn('katsdp-test', monitor_cli.commands)
+        token = command_done.set(threading.Event())
+        try:
+            result = click.testing.CliRunner().invoke(monitor_cli, ['katsdp-test'])
+        finally:
+            command_done.reset(token)
+        callback.assert_called_once_with()
+        self.assertEqual('hello from test\n', result.output)
@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -20,8 +20,10 @@ import unittest
 from unittest import mock
 
 from katsdptelstate.endpoint import Endpoint
+from katsdptelstate.telescope_state import TelescopeState
 
 from katsdpservices import ArgumentParser
+from katsdpservices.telstatecache import CachingTelescopeState
 
 
 class MockException(Exception):
@@ -177,3 +179,18 @@ class TestArgumentParser(unittest.TestCase):
             mock_exit.assert_called_once_with()
             # Make sure we did not try to construct a telescope state
             self.assertEqual([], self.TelescopeState.call_args_list)
+
+    def test_telstate_cache(self):
+        """The telescope state is wrapped in a cache when requested"""
+        # katsdptelstate.TelescopeState is mocked, but this is the real class
+        telstate = TelescopeState()
+        telstate['config'] = {'int_arg': 10}
+        self.TelescopeState.return_value = telstate
+        parser = ArgumentParser(telstate_cache_size=10)
+        parser.add_argument('--int-arg', type=int, default=5)
+        args = parser.parse_args(['--telstate=example.com'])
+        self.assertIsInstance(args.telstate, CachingTelescopeState)
+        self.assertIs(telstate, args.telstate.wrapped)
+        self.assertEqual(10, args.int_arg)
+        self.assertEqual({'int_arg': 10}, args.telstate['config'])
+        self.assertEqual(1, args.telstate.cache_info().hits)
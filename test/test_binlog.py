@@ -0,0 +1,224 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.binlog`."""
+
+import io
+import json
+import logging
+import os
+import tempfile
+import enum
+import fractions
+import time
+import unittest
+from unittest import mock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from katsdpservices.binlog import BinaryLogHandler, read_records, main
+
+
+class _Colour(enum.IntEnum):
+    RED = 1
+
+
+class _Thing:
+    def __str__(self):
+        return 'a thing'
+
+
+class TestBinaryLog(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, 'test.bin')
+        self.logger = logging.getLogger('katsdpservices.test.binlog')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+        self.addCleanup(setattr, self.logger, 'propagate', True)
+        self.addCleanup(self.logger.setLevel, logging.NOTSET)
+        self.handler = BinaryLogHandler(self.path)
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.handler.close)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+
+    def _records(self):
+        self.handler.flush()
+        with open(self.path, 'rb') as f:
+            return list(read_records(f.read()))
+
+    def test_round_trip(self):
+        for i in range(3):
+            self.logger.debug('Value %d of %s is %.2f', i, 'x', i * 0.5)
+        self.logger.info('Types: %s %s %s %s %r %s', None, True, b'\x01', 2**70, _Thing(), 'é')
+        self.logger.warning('Mapping %(a)s', {'a': 1})
+        self.logger.warning('100%')
+        records = self._records()
+        self.assertEqual(
+            ['Value 0 of x is 0.00', 'Value 1 of x is 0.50', 'Value 2 of x is 1.00',
+             "Types: None True b'\\x01' {} a thing é".format(2**70),
+             'Mapping 1', '100%'],
+            [record.getMessage() for record in records])
+        self.assertEqual('katsdpservices.test.binlog', records[0].name)
+        self.assertEqual(logging.DEBUG, records[0].levelno)
+        self.assertEqual('DEBUG', records[0].levelname)
+        self.assertEqual('test_binlog.py', records[0].filename)
+        self.assertEqual('test_round_trip', records[0].funcName)
+        self.assertEqual(os.getpid(), records[0].process)
+        self.assertEqual(records[0].lineno, records[1].lineno)
+        self.assertAlmostEqual(time.time(), records[0].created, delta=60)
+
+    def test_numbers(self):
+        """Integral and real numbers other than int and float can be formatted."""
+        self.logger.info('%d %.2f %d', _Colour.RED, fractions.Fraction(3, 2), 2**63 - 1)
+        self.assertEqual(['1 1.50 {}'.format(2**63 - 1)],
+                         [record.getMessage() for record in self._records()])
+
+    def test_big_int(self):
+        """Integers outside the i64 range can still be formatted as integers."""
+        values = [2**70, -2**63 - 1, 2**63, -2**70, 2**1000]
+        for value in values:
+            self.logger.info('big %d %x', value, value)
+        records = self._records()
+        self.assertEqual(['big {0:d} {0:x}'.format(value) for value in values],
+                         [record.getMessage() for record in records])
+        self.assertEqual((2**70, 2**70), records[0].args)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_numpy(self):
+        self.logger.info('heap %d size %.2f %s', np.int64(5), np.float32(1.5), np.uint8(7))
+        self.assertEqual(['heap 5 size 1.50 7'],
+                         [record.getMessage() for record in self._records()])
+
+    def test_sites_interned(self):
+        for i in range(100):
+            self.logger.debug('A fairly long format string for record number %d', i)
+        self.handler.flush()
+        # The format string must appear only once
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        self.assertEqual(1, data.count(b'A fairly long format string'))
+
+    def test_exception(self):
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.logger.exception('Failed')
+        record, = self._records()
+        self.assertEqual('Failed', record.getMessage())
+        self.assertIn('ZeroDivisionError', record.exc_text)
+
+    def test_flush_level(self):
+        self.logger.info('buffered')
+        self.assertEqual(0, os.path.getsize(self.path))
+        self.logger.error('immediate')
+        with open(self.path, 'rb') as f:
+            records = list(read_records(f.read()))
+        self.assertEqual(['buffered', 'immediate'], [r.getMessage() for r in records])
+
+    def test_append_sessions(self):
+        self.logger.info('first %d', 1)
+        self.handler.close()
+        self.logger.removeHandler(self.handler)
+        handler = BinaryLogHandler(self.path)
+        self.addCleanup(handler.close)
+        self.logger.addHandler(handler)
+        self.logger.info('second %s', 'session')
+        handler.flush()
+        with open(self.path, 'rb') as f:
+            records = list(read_records(f.read()))
+        self.assertEqual(['first 1', 'second session'], [r.getMessage() for r in records])
+        self.logger.removeHandler(handler)
+
+    def test_fork(self):
+        """A forked child writes its own session, interleaved with the parent's."""
+        self.logger.info('parent %d', 1)
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                self.logger.info('child %s', 'record')
+                self.handler.flush()
+                status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(0, os.waitstatus_to_exitcode(status))
+        self.logger.info('parent %s', 'again')
+        records = self._records()
+        self.assertEqual(['child record', 'parent 1', 'parent again'],
+                         [record.getMessage() for record in records])
+        self.assertEqual([pid, os.getpid(), os.getpid()],
+                         [record.process for record in records])
+
+    def test_truncated(self):
+        self.logger.info('complete')
+        self.logger.info('truncated %s', 'record')
+        self.handler.flush()
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        records = list(read_records(data[:-3]))
+        self.assertEqual(['complete'], [r.getMessage() for r in records])
+
+    def test_bad_magic(self):
+        with self.assertRaises(ValueError):
+            list(read_records(b'Hxxxxxxxx\0\0\0\0\0\0\0\0'))
+
+    def test_undefined_site(self):
+        self.logger.info('first')
+        self.logger.info('second')
+        self.handler.flush()
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        # Drop the header and site definitions, as if the start was truncated
+        pos = data.index(b'first') + len(b'first')
+        with self.assertRaisesRegex(ValueError, 'offset 0 refers to undefined site 0'):
+            list(read_records(data[pos:]))
+        with open(self.path, 'wb') as f:
+            f.write(data[pos:])
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            with self.assertRaises(SystemExit) as cm:
+                self._main()
+        self.assertEqual(1, cm.exception.code)
+        self.assertIn('undefined site 0', stderr.getvalue())
+
+    def _main(self, *args):
+        self.handler.flush()
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            main(list(args) + [self.path])
+        return stdout.getvalue()
+
+    def test_main_text(self):
+        self.logger.warning('Hello %s\nworld', 'there')
+        with mock.patch.dict(os.environ, {}, clear=True):
+            output = self._main()
+        self.assertRegex(
+            output,
+            r'\A\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}Z - test_binlog\.py:\d+ - WARNING - '
+            r'Hello there\nworld\n\Z')
+
+    def test_main_json(self):
+        self.logger.info('Hello %d', 42)
+        output = self._main('--json')
+        data = json.loads(output)
+        self.assertEqual('Hello 42', data['message'])
+        self.assertEqual('INFO', data['level'])
+        self.assertEqual('katsdpservices.test.binlog', data['logger'])
+        self.assertEqual('test_binlog.py', data['filename'])
@@ -0,0 +1,208 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.container`."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from katsdpservices import container
+
+
+DOCKER_ID = 'c5a1d26f2ee5c9a23bd4ac5f3c4d8ab8e6a6df3e2f2a2b6bd3c1b3ae4f7b9e10'
+OTHER_ID = '0123456789abcdef0123456789abcdef0123456789abcdef0123456789abcdef'
+
+MOUNTINFO_V1 = """\
+24 30 0:22 / /sys rw,nosuid,nodev,noexec,relatime shared:7 - sysfs sysfs rw
+33 24 0:28 / /sys/fs/cgroup ro,nosuid,nodev,noexec shared:9 - tmpfs tmpfs ro,mode=755
+36 33 0:31 / /sys/fs/cgroup/cpu,cpuacct rw,nosuid shared:13 - cgroup cgroup rw,cpu,cpuacct
+37 33 0:32 / /sys/fs/cgroup/memory rw,nosuid shared:14 - cgroup cgroup rw,memory
+38 33 0:33 / /sys/fs/cgroup/cpuset rw,nosuid shared:15 - cgroup cgroup rw,cpuset
+"""
+
+MOUNTINFO_V2 = """\
+24 30 0:22 / /sys rw,nosuid,nodev,noexec,relatime shared:7 - sysfs sysfs rw
+35 24 0:30 / /sys/fs/cgroup rw,nosuid,nodev,noexec shared:9 - cgroup2 cgroup2 rw,nsdelegate
+"""
+
+
+class TestContainer(unittest.TestCase):
+    def _write(self, path, content):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = tmpdir.name
+        patcher = mock.patch('katsdpservices.container._ROOT', self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        container.clear_cache()
+        self.addCleanup(container.clear_cache)
+
+    def _setup_v1(self, cgroup_path, mountinfo=MOUNTINFO_V1):
+        self._write('proc/self/cgroup',
+                    '12:memory:{0}\n11:cpuset:{0}\n4:cpu,cpuacct:{0}\n'
+                    '1:name=systemd:{0}\n'.format(cgroup_path))
+        if mountinfo is not None:
+            self._write('proc/self/mountinfo', mountinfo)
+
+    def _setup_v2(self, cgroup_path, mountinfo=MOUNTINFO_V2):
+        self._write('proc/self/cgroup', '0::{}\n'.format(cgroup_path))
+        if mountinfo is not None:
+            self._write('proc/self/mountinfo', mountinfo)
+
+    def test_no_cgroups(self):
+        self.assertIsNone(container.cgroup_version())
+        self.assertIsNone(container.container_id())
+        self.assertIsNone(container.cpu_quota())
+        self.assertIsNone(container.memory_limit())
+        self.assertIsNone(container.cpuset())
+
+    def test_v1(self):
+        path = '/docker/' + DOCKER_ID
+        self._setup_v1(path)
+        base = 'sys/fs/cgroup/'
+        self._write(base + 'cpu,cpuacct' + path + '/cpu.cfs_quota_us', '150000\n')
+        self._write(base + 'cpu,cpuacct' + path + '/cpu.cfs_period_us', '100000\n')
+        self._write(base + 'memory' + path + '/memory.limit_in_bytes', '1073741824\n')
+        self._write(base + 'memory/memory.limit_in_bytes', '9223372036854771712\n')
+        self._write(base + 'cpuset' + path + '/cpuset.effective_cpus', '2-5\n')
+        self.assertEqual(1, container.cgroup_version())
+        self.assertEqual(DOCKER_ID, container.container_id())
+        self.assertEqual(1.5, container.cpu_quota())
+        self.assertEqual(1073741824, container.memory_limit())
+        self.assertEqual([2, 3, 4, 5], container.cpuset())
+
+    def test_v1_unlimited(self):
+        path = '/docker/' + DOCKER_ID
+        self._setup_v1(path)
+        base = 'sys/fs/cgroup/'
+        self._write(base + 'cpu,cpuacct' + path + '/cpu.cfs_quota_us', '-1\n')
+        self._write(base + 'cpu,cpuacct' + path + '/cpu.cfs_period_us', '100000\n')
+        self._write(base + 'memory' + path + '/memory.limit_in_bytes', '9223372036854771712\n')
+        self.assertIsNone(container.cpu_quota())
+        self.assertIsNone(container.memory_limit())
+        self.assertIsNone(container.cpuset())
+
+    def test_v1_private_namespace(self):
+        """The container sees its own cgroup as the root."""
+        mountinfo = MOUNTINFO_V1.replace(' / /sys/fs/cgroup/memory',
+                                         ' /docker/{} /sys/fs/cgroup/memory'.format(DOCKER_ID))
+        self._setup_v1('/', mountinfo)
+        self._write('sys/fs/cgroup/memory/memory.limit_in_bytes', '2147483648\n')
+        self.assertEqual(2147483648, container.memory_limit())
+
+    def test_v1_no_mountinfo(self):
+        path = '/docker/' + DOCKER_ID
+        self._setup_v1(path, mountinfo=None)
+        self._write('sys/fs/cgroup/memory' + path + '/memory.limit_in_bytes', '1048576\n')
+        self.assertEqual(1048576, container.memory_limit())
+
+    def test_v2(self):
+        path = '/system.slice/docker-{}.scope'.format(DOCKER_ID)
+        self._setup_v2(path)
+        base = 'sys/fs/cgroup'
+        self._write(base + path + '/cpu.max', '250000 100000\n')
+        self._write(base + path + '/memory.max', '536870912\n')
+        self._write(base + path + '/cpuset.cpus.effective', '0-1,6\n')
+        self._write(base + '/system.slice/memory.max', 'max\n')
+        self.assertEqual(2, container.cgroup_version())
+        self.assertEqual(DOCKER_ID, container.container_id())
+        self.assertEqual(2.5, container.cpu_quota())
+        self.assertEqual(536870912, container.memory_limit())
+        self.assertEqual([0, 1, 6], container.cpuset())
+
+    def test_v2_nested(self):
+        """The most restrictive limit in the hierarchy applies."""
+        self._setup_v2('/outer/inner')
+        self._write('sys/fs/cgroup/outer/cpu.max', '100000 100000\n')
+        self._write('sys/fs/cgroup/outer/inner/cpu.max', 'max 100000\n')
+        self._write('sys/fs/cgroup/outer/memory.max', '1000000\n')
+        self._write('sys/fs/cgroup/outer/inner/memory.max', '2000000\n')
+        self.assertEqual(1.0, container.cpu_quota())
+        self.assertEqual(1000000, container.memory_limit())
+
+    def test_v2_unlimited(self):
+        self._setup_v2('/')
+        self._write('sys/fs/cgroup/cpu.max', 'max 100000\n')
+        self._write('sys/fs/cgroup/memory.max', 'max\n')
+        self.assertIsNone(container.cpu_quota())
+        self.assertIsNone(container.memory_limit())
+
+    def test_v2_no_mountinfo(self):
+        self._setup_v2('/foo', mountinfo=None)
+        self._write('sys/fs/cgroup/foo/memory.max', '4096\n')
+        self.assertEqual(4096, container.memory_limit())
+
+    def test_v2_nonstandard_mount(self):
+        mountinfo = MOUNTINFO_V2.replace(' /sys/fs/cgroup ', ' /mnt/cgroup2 ')
+        self._setup_v2('/foo', mountinfo)
+        self._write('mnt/cgroup2/foo/memory.max', '8192\n')
+        self.assertEqual(8192, container.memory_limit())
+
+    def test_container_id_formats(self):
+        for path in [
+            '/docker/' + OTHER_ID,
+            '/system.slice/docker-{}.scope'.format(OTHER_ID),
+            '/kubepods/besteffort/pod1234/' + OTHER_ID,
+            '/kubepods.slice/kubepods-pod1234.slice/cri-containerd-{}.scope'.format(OTHER_ID),
+            '/machine.slice/libpod-{}.scope/container'.format(OTHER_ID)
+        ]:
+            with self.subTest(path=path):
+                container.clear_cache()
+                self._setup_v2(path)
+                self.assertEqual(OTHER_ID, container.container_id())
+
+    def test_container_id_mountinfo(self):
+        """With a private cgroup namespace, the ID is found from the mounts."""
+        mountinfo = MOUNTINFO_V2 + (
+            '612 598 259:2 /var/lib/docker/containers/{}/hostname /etc/hostname '
+            'rw,relatime - ext4 /dev/nvme0n1p2 rw\n'.format(OTHER_ID))
+        self._setup_v2('/', mountinfo)
+        self.assertEqual(OTHER_ID, container.container_id())
+
+    def test_not_container(self):
+        self._setup_v2('/user.slice/user-1000.slice/session-2.scope')
+        self.assertIsNone(container.container_id())
+
+    def test_available_cpus(self):
+        self._setup_v2('/')
+        with mock.patch('os.sched_getaffinity', return_value={0, 1, 2, 3, 4, 5, 6, 7}):
+            self.assertEqual(8, container.available_cpus())
+            self._write('sys/fs/cgroup/cpuset.cpus.effective', '4-9\n')
+            container.clear_cache()
+            self.assertEqual(4, container.available_cpus())
+            self._write('sys/fs/cgroup/cpu.max', '150000 100000\n')
+            container.clear_cache()
+            self.assertEqual(2, container.available_cpus())
+            self._write('sys/fs/cgroup/cpu.max', '10000 100000\n')
+            container.clear_cache()
+            self.assertEqual(1, container.available_cpus())
+
+    def test_cached(self):
+        self._setup_v2('/')
+        self._write('sys/fs/cgroup/memory.max', '4096\n')
+        self.assertEqual(4096, container.memory_limit())
+        self._write('sys/fs/cgroup/memory.max', '8192\n')
+        self.assertEqual(4096, container.memory_limit())
+        container.clear_cache()
+        self.assertEqual(8192, container.memory_limit())
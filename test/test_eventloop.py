@@ -0,0 +1,105 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.eventloop`."""
+
+import argparse
+import asyncio
+import unittest
+from unittest import mock
+
+from katsdpservices import add_aiomonitor_arguments
+from katsdpservices.eventloop import (
+    add_event_loop_arguments, setup_event_loop, run_event_loop, new_event_loop,
+    default_executor_threads)
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def _executor_threads(loop):
+    """Get the maximum number of threads in the default executor of `loop`."""
+    return loop._default_executor._max_workers
+
+
+class TestEventLoop(unittest.TestCase):
+    def setUp(self):
+        self.parser = argparse.ArgumentParser()
+        add_event_loop_arguments(self.parser)
+        self.addCleanup(asyncio.set_event_loop, None)
+
+    def _setup(self, argv):
+        args = self.parser.parse_args(argv)
+        loop = setup_event_loop(args)
+        self.addCleanup(loop.close)
+        return loop
+
+    def test_defaults(self):
+        loop = self._setup(['--event-loop', 'asyncio'])
+        self.assertIsInstance(loop, asyncio.BaseEventLoop)
+        self.assertIs(loop, asyncio.get_event_loop_policy().get_event_loop())
+        self.assertFalse(loop.get_debug())
+        self.assertEqual(0.1, loop.slow_callback_duration)
+        threads = _executor_threads(loop)
+        self.assertEqual(default_executor_threads(), threads)
+
+    def test_explicit(self):
+        loop = self._setup(['--event-loop', 'asyncio', '--executor-threads', '3',
+                            '--asyncio-debug', '--slow-callback-duration', '0.25'])
+        self.assertTrue(loop.get_debug())
+        self.assertEqual(0.25, loop.slow_callback_duration)
+        threads = _executor_threads(loop)
+        self.assertEqual(3, threads)
+
+    def test_default_executor_threads(self):
+        with mock.patch('katsdpservices.container.available_cpus', return_value=2):
+            self.assertEqual(6, default_executor_threads())
+        with mock.patch('katsdpservices.container.available_cpus', return_value=64):
+            self.assertEqual(32, default_executor_threads())
+
+    @unittest.skipIf(uvloop is None, 'uvloop is not installed')
+    def test_uvloop(self):
+        loop = self._setup(['--event-loop', 'uvloop'])
+        self.assertIsInstance(loop, uvloop.Loop)
+        loop = self._setup([])
+        self.assertIsInstance(loop, uvloop.Loop)
+
+    def test_auto_without_uvloop(self):
+        with mock.patch.dict('sys.modules', {'uvloop': None}):
+            loop = new_event_loop('auto')
+            self.addCleanup(loop.close)
+            self.assertIsInstance(loop, asyncio.BaseEventLoop)
+            with self.assertRaises(ImportError):
+                new_event_loop('uvloop')
+
+    def test_bad_kind(self):
+        with self.assertRaises(ValueError):
+            new_event_loop('trio')
+
+    def test_run_event_loop(self):
+        add_aiomonitor_arguments(self.parser)
+        args = self.parser.parse_args(['--event-loop', 'asyncio', '--aiomonitor'])
+
+        async def main():
+            return asyncio.get_running_loop()
+
+        with mock.patch('aiomonitor.start_monitor', autospec=True) as mock_start:
+            loop = run_event_loop(main(), args, {'hello': 'world'})
+        self.assertTrue(loop.is_closed())
+        mock_start.assert_called_once()
+        self.assertIs(loop, mock_start.call_args[1]['loop'])
@@ -0,0 +1,104 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.gcmonitor`."""
+
+import gc
+import logging
+import unittest
+from unittest import mock
+
+from katsdpservices import ArgumentParser
+from katsdpservices.gcmonitor import (
+    GCMonitor, add_gc_arguments, apply_gc_options, get_gc_monitor, _monitor_command)
+from katsdpservices.metrics import REGISTRY, Registry
+
+
+class TestGCMonitor(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_pauses(self):
+        monitor = GCMonitor(slow_pause=10.0, registry=self.registry)
+        monitor.start()
+        self.addCleanup(monitor.close)
+        gc.collect(1)
+        gc.collect(2)
+        gc.collect(2)
+        stats = monitor.stats()
+        self.assertEqual(1, stats[1]['count'])
+        self.assertEqual(2, stats[2]['count'])
+        self.assertGreater(stats[2]['sum'], 0.0)
+        self.assertEqual(gc.get_threshold()[0], stats[0]['threshold'])
+        self.assertIn('katsdp_gc_pause_seconds_count{generation="2"} 2',
+                      self.registry.exposition())
+
+    def test_slow_pause(self):
+        monitor = GCMonitor(slow_pause=0.0, registry=self.registry)
+        monitor.start()
+        self.addCleanup(monitor.close)
+        with self.assertLogs('katsdpservices.gcmonitor', logging.WARNING) as cm:
+            gc.collect(0)
+        monitor.close()
+        self.assertRegex(cm.output[0], 'Garbage collection of generation 0 took')
+        self.assertGreaterEqual(monitor.slow_pauses, 1)
+
+    def test_close(self):
+        monitor = GCMonitor(registry=self.registry)
+        monitor.start()
+        monitor.close()
+        self.assertNotIn(monitor._callback, gc.callbacks)
+        self.assertEqual('', self.registry.exposition())
+        gc.collect()
+        self.assertEqual(0, monitor.stats()[2]['count'])
+
+
+class TestApplyGCOptions(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(gc.set_threshold, *gc.get_threshold())
+        self.addCleanup(gc.unfreeze)
+        patcher = mock.patch('katsdpservices.gcmonitor._monitor', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._cleanup_monitor)
+        self.parser = ArgumentParser()
+        add_gc_arguments(self.parser)
+
+    def _cleanup_monitor(self):
+        monitor = get_gc_monitor()
+        if monitor is not None:
+            monitor.close()
+
+    def test_apply(self):
+        args = self.parser.parse_args(['--gc-freeze', '--gc-thresholds', '1000,20',
+                                       '--gc-slow-pause', '0.5'])
+        with self.assertLogs('katsdpservices.gcmonitor', logging.INFO):
+            monitor = apply_gc_options(args)
+        self.assertIs(monitor, get_gc_monitor())
+        self.assertEqual(0.5, monitor.slow_pause)
+        self.assertEqual((1000, 20), gc.get_threshold()[:2])
+        self.assertGreater(gc.get_freeze_count(), 0)
+        self.assertIn('katsdp_gc_pause_seconds', REGISTRY.exposition())
+        self.assertIn('Generation 2: threshold', _monitor_command())
+        # Applying again replaces the monitor rather than failing to register
+        args = self.parser.parse_args([])
+        second = apply_gc_options(args)
+        self.assertIsNot(monitor, second)
+        self.assertNotIn(monitor._callback, gc.callbacks)
+
+    def test_bad_thresholds(self):
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args(['--gc-thresholds', '1,2,3,4'])
@@ -0,0 +1,377 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.gelf`."""
+
+import itertools
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+from katsdpservices.gelf import GelfUdpHandler, SpoolRing
+
+
+class TestSpoolRing(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, 'spool')
+
+    def _open(self, capacity):
+        ring = SpoolRing(self.path, capacity)
+        self.addCleanup(ring.close)
+        return ring
+
+    def _drain(self, ring):
+        out = []
+        while len(ring):
+            out.append(ring.peek())
+            ring.pop()
+        return out
+
+    def test_fifo(self):
+        ring = self._open(100)
+        self.assertIsNone(ring.peek())
+        for data in [b'first', b'', b'third']:
+            self.assertEqual(0, ring.append(data))
+        self.assertEqual(3, len(ring))
+        self.assertEqual([b'first', b'', b'third'], self._drain(ring))
+        self.assertIsNone(ring.peek())
+
+    def test_wrap(self):
+        ring = self._open(30)
+        ring.append(b'start')
+        expected = b'start'
+        for i in range(20):
+            data = '{:08d}'.format(i).encode()
+            self.assertEqual(0, ring.append(data))
+            self.assertEqual(expected, ring.peek())
+            ring.pop()
+            expected = data
+        self.assertEqual([expected], self._drain(ring))
+
+    def test_overflow(self):
+        ring = self._open(30)
+        self.assertEqual(0, ring.append(b'a' * 10))
+        self.assertEqual(0, ring.append(b'b' * 10))
+        self.assertEqual(1, ring.append(b'c' * 10))
+        self.assertEqual(2, ring.append(b'd' * 22))
+        self.assertEqual([b'd' * 22], self._drain(ring))
+        with self.assertRaises(ValueError):
+            ring.append(b'e' * 27)
+
+    def test_persistent(self):
+        ring = SpoolRing(self.path, 64)
+        ring.append(b'hello')
+        ring.append(b'world')
+        ring.pop()
+        ring.close()
+        ring = self._open(64)
+        self.assertEqual([b'world'], self._drain(ring))
+
+    def test_reset(self):
+        """A file with a different capacity or format is discarded."""
+        ring = SpoolRing(self.path, 64)
+        ring.append(b'hello')
+        ring.close()
+        ring = self._open(128)
+        self.assertEqual(0, len(ring))
+        ring.close()
+        with open(self.path, 'wb') as f:
+            f.write(b'garbage')
+        ring = self._open(128)
+        self.assertEqual(0, len(ring))
+
+
+class TestGelfUdpHandler(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, 'spool')
+        self.server = self._bind(0)
+        self.port = self.server.getsockname()[1]
+        self.logger = logging.getLogger('katsdpservices.test.gelf')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def _bind(self, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('127.0.0.1', port))
+        sock.settimeout(5)
+        self.addCleanup(sock.close)
+        return sock
+
+    def _handler(self, spool, **kwargs):
+        kwargs.setdefault('retry_interval', 0.02)
+        kwargs.setdefault('replay_rate', 1000.0)
+        handler = GelfUdpHandler(kwargs.pop('host', '127.0.0.1'), self.port, spool=spool,
+                                 compress=True, **kwargs)
+        self.addCleanup(self.logger.removeHandler, handler)
+        self.addCleanup(handler.close)
+        self.logger.addHandler(handler)
+        return handler
+
+    def _receive(self, server=None):
+        raw = (server or self.server).recv(65536)
+        return json.loads(zlib.decompress(raw))['short_message']
+
+    def _log_until(self, msg, condition):
+        """Log `msg` repeatedly until the outage has been noticed."""
+        deadline = time.monotonic() + 5
+        while True:
+            self.logger.info(msg)
+            if condition():
+                break
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def _wait_for(self, condition):
+        deadline = time.monotonic() + 5
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_spool_and_replay(self):
+        handler = self._handler(SpoolRing(self.path, 65536))
+        self.logger.info('before')
+        self.assertEqual('before', self._receive())
+        self.server.close()
+        # The first record provokes the ICMP reply that reveals the outage
+        self.logger.info('lost')
+        self._log_until('spooled', lambda: handler.spooled > 0)
+        self.logger.info('also spooled')
+        # Give the replayer a chance to probe the closed port
+        time.sleep(0.1)
+        self.assertEqual(0, handler.replayed)
+        self.server = self._bind(self.port)
+        received = [self._receive() for i in range(handler.spooled)]
+        self.assertEqual('spooled', received[0])
+        self.assertEqual('also spooled', received[-1])
+        self._wait_for(lambda: len(handler.spool) == 0)
+        self.assertEqual(handler.spooled, handler.replayed)
+        self.assertEqual(0, handler.discarded)
+        self.logger.info('after')
+        self.assertEqual('after', self._receive())
+
+    def test_replay_order(self):
+        """Records logged while the spool is replayed are sent after it."""
+        handler = self._handler(SpoolRing(self.path, 65536), replay_rate=20.0)
+        self.server.close()
+        self.logger.info('lost')
+        self._log_until('spooled', lambda: handler.spooled >= 5)
+        spooled = handler.spooled
+        self.server = self._bind(self.port)
+        # Wait until replay is under way, but far from finished
+        self._wait_for(lambda: handler.replayed > 0)
+        self.assertGreater(len(handler.spool), 0)
+        for i in range(3):
+            self.logger.info('live %d', i)
+        received = [self._receive() for i in range(spooled + 3)]
+        self.assertEqual(['spooled'] * spooled + ['live {}'.format(i) for i in range(3)],
+                         received)
+        self.assertEqual(0, handler.discarded)
+
+    def test_no_spool(self):
+        """Without a spool, the socket behaves like pygelf's and ignores ICMP errors."""
+        handler = self._handler(None)
+        self.server.close()
+        for i in range(5):
+            self.logger.info('lost')
+            time.sleep(0.01)
+        self.assertEqual(0, handler.discarded)
+        self.assertEqual(0, handler.spooled)
+        self.server = self._bind(self.port)
+        self.logger.info('after')
+        self.assertEqual('after', self._receive())
+
+    def _fork(self, child):
+        """Run `child` in a forked process and check that it succeeds."""
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                child()
+                status = 0
+            finally:
+                os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(0, os.waitstatus_to_exitcode(status))
+
+    def test_fork(self):
+        """The child sends directly, leaving the spool to the parent."""
+        handler = self._handler(SpoolRing(self.path, 65536))
+        self.logger.info('parent')
+        self.assertEqual('parent', self._receive())
+        spool = handler.spool
+
+        def child():
+            self.logger.info('child')
+            assert handler.spool is None
+            assert [thread.is_alive() for thread in handler._threads] == [True]
+            handler.close()
+
+        self._fork(child)
+        self.assertEqual('child', self._receive())
+        self.assertIs(spool, handler.spool)
+        self.assertEqual(0, len(spool))
+        self.logger.info('after')
+        self.assertEqual('after', self._receive())
+
+
+class TestResolution(TestGelfUdpHandler):
+    """Tests for the background resolution in :class:`~katsdpservices.gelf.GelfUdpHandler`."""
+    def setUp(self):
+        super().setUp()
+        self.resolved = ('127.0.0.1', self.port)
+        self.resolve_calls = 0
+
+    def _resolver(self, host, port):
+        self.assertEqual('graylog.invalid', host)
+        self.assertEqual(self.port, port)
+        self.resolve_calls += 1
+        if isinstance(self.resolved, Exception):
+            raise self.resolved
+        return self.resolved
+
+    def test_slow_resolve(self):
+        """Records logged before the name is resolved are sent afterwards."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def resolver(host, port):
+            release.wait()
+            return self._resolver(host, port)
+
+        start = time.monotonic()
+        handler = self._handler(None, host='graylog.invalid', resolver=resolver,
+                                resolve_timeout=0.05)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertIsNone(handler.address)
+        self.logger.info('early 1')
+        self.logger.info('early 2')
+        release.set()
+        self.assertEqual('early 1', self._receive())
+        self.assertEqual('early 2', self._receive())
+        self.logger.info('late')
+        self.assertEqual('late', self._receive())
+        self.assertEqual(0, handler.discarded)
+
+    def test_pending_size(self):
+        self.resolved = socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        with self.assertLogs('katsdpservices.gelf', 'WARNING') as cm:
+            handler = self._handler(None, host='graylog.invalid', resolver=self._resolver,
+                                    pending_size=2)
+        self.assertIn('Could not resolve GELF host graylog.invalid', cm.output[0])
+        for i in range(3):
+            self.logger.info('record %d', i)
+        self.assertEqual(1, handler.discarded)
+        self.resolved = ('127.0.0.1', self.port)
+        self.assertEqual('record 1', self._receive())
+        self.assertEqual('record 2', self._receive())
+        self.assertEqual(1, len(cm.output))    # Only the first failure is logged
+
+    def test_move(self):
+        """The server changes address, and is found by periodic resolution."""
+        handler = self._handler(None, host='graylog.invalid', resolver=self._resolver,
+                                resolve_interval=0.02)
+        self.logger.info('first')
+        self.assertEqual('first', self._receive())
+        server2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(server2.close)
+        server2.bind(('127.0.0.2', self.port))
+        server2.settimeout(5)
+        with self.assertLogs('katsdpservices.gelf', 'INFO') as cm:
+            self.resolved = ('127.0.0.2', self.port)
+            self._wait_for(lambda: handler.address == self.resolved)
+        self.assertEqual(
+            ['INFO:katsdpservices.gelf:GELF destination changed from '
+             '127.0.0.1:{0} to 127.0.0.2:{0}'.format(self.port)],
+            cm.output)
+        self.logger.info('second')
+        self.assertEqual('second', self._receive(server2))
+
+    def test_resolve_on_error(self):
+        """Send errors cause the name to be resolved again."""
+        handler = self._handler(SpoolRing(self.path, 65536), host='graylog.invalid',
+                                resolver=self._resolver, resolve_interval=3600.0)
+        self.logger.info('first')
+        self.assertEqual('first', self._receive())
+        self.assertEqual(1, self.resolve_calls)
+        self.server.close()
+        self._log_until('spooled', lambda: self.resolve_calls > 1)
+        self.assertGreater(handler.spooled, 0)
+        self.server = self._bind(self.port)
+        self.logger.info('found')
+        # 'found' may be sent directly, or spooled and replayed
+        received = []
+        while 'found' not in received:
+            received.append(self._receive())
+        self.assertLessEqual(len(received), handler.spooled + 1)
+
+    def test_fork_pending(self):
+        """Records held back before a fork are sent by the parent only."""
+        self.resolved = socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        with self.assertLogs('katsdpservices.gelf', 'WARNING'):
+            handler = self._handler(None, host='graylog.invalid', resolver=self._resolver)
+        self.logger.info('early')
+
+        def child():
+            self.resolved = ('127.0.0.1', self.port)
+            self.logger.info('child')
+            deadline = time.monotonic() + 5
+            while handler.address is None:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            handler.close()
+            assert handler.discarded == 0
+
+        self._fork(child)
+        self.assertEqual('child', self._receive())
+        self.resolved = ('127.0.0.1', self.port)
+        self.assertEqual('early', self._receive())
+        self.logger.info('after')
+        self.assertEqual('after', self._receive())
+
+    def test_move_during_replay(self):
+        """The address changes repeatedly while the spool is replayed."""
+        server2 = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(server2.close)
+        server2.bind(('127.0.0.2', self.port))
+        addresses = itertools.cycle([('127.0.0.1', self.port), ('127.0.0.2', self.port)])
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def resolver(host, port):
+            release.wait()
+            return next(addresses)
+
+        handler = self._handler(SpoolRing(self.path, 65536), host='graylog.invalid',
+                                resolver=resolver, resolve_timeout=0.0,
+                                resolve_interval=0.001, retry_interval=0.001)
+        # Until the name is resolved, records are spooled
+        for i in range(200):
+            self.logger.info('spooled')
+        release.set()
+        self._wait_for(lambda: len(handler.spool) == 0)
+        self.assertTrue(all(thread.is_alive() for thread in handler._threads))
+        self.assertEqual(200, handler.replayed)
@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -16,12 +16,13 @@
 
 """Tests for :mod:`katsdpservices.interfaces`."""
 
+import socket
 import unittest
 from unittest import mock
 
 import netifaces
 
-from katsdpservices import get_interface_address
+from katsdpservices import get_interface_address, create_receive_socket
 
 
 class TestGetInterfaceAddress(unittest.TestCase):
@@ -50,3 +51,72 @@ class TestGetInterfaceAddress(unittest.TestCase):
         }) as m:
             self.assertEqual('192.168.1.1', get_interface_address('eth1'))
             m.assert_called_with('eth1')
+
+
+class TestCreateReceiveSocket(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('katsdpservices.interfaces.get_interface_address',
+                             return_value='10.1.2.3')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sock = mock.create_autospec(socket.socket, instance=True)
+        self.sock.getsockopt.return_value = 2 * 1024 * 1024
+
+    def test_existing_socket(self):
+        sock = create_receive_socket('eth1', ['239.1.2.3', '239.1.2.4'],
+                                     buffer_size=1024 * 1024, busy_poll=50, sock=self.sock)
+        self.assertIs(sock, self.sock)
+        self.sock.setsockopt.assert_has_calls([
+            mock.call(socket.SOL_SOCKET, 33, 1024 * 1024),    # SO_RCVBUFFORCE
+            mock.call(socket.SOL_SOCKET, 46, 50),             # SO_BUSY_POLL
+            mock.call(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, b'\x0a\x01\x02\x03'),
+            mock.call(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                      b'\xef\x01\x02\x03\x0a\x01\x02\x03'),
+            mock.call(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                      b'\xef\x01\x02\x04\x0a\x01\x02\x03')
+        ])
+        self.sock.bind.assert_not_called()
+
+    def test_buffer_shortfall(self):
+        def setsockopt(level, option, value):
+            if option == 33:     # SO_RCVBUFFORCE
+                raise PermissionError('Operation not permitted')
+
+        self.sock.setsockopt.side_effect = setsockopt
+        self.sock.getsockopt.return_value = 425984
+        with mock.patch('katsdpservices.interfaces._RMEM_MAX_PATH', '/does/not/exist'), \
+                self.assertLogs('katsdpservices.interfaces', 'WARNING') as cm:
+            create_receive_socket('eth1', buffer_size=1024 * 1024, sock=self.sock)
+        self.sock.setsockopt.assert_any_call(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)
+        self.assertEqual(1, len(cm.records))
+        self.assertIn('only 212992 bytes', cm.records[0].getMessage())
+        self.assertIsNone(cm.records[0].rmem_max)
+
+    def test_busy_poll_not_permitted(self):
+        def setsockopt(level, option, value):
+            if option == 46:     # SO_BUSY_POLL
+                raise PermissionError('Operation not permitted')
+
+        self.sock.setsockopt.side_effect = setsockopt
+        with self.assertLogs('katsdpservices.interfaces', 'WARNING'):
+            create_receive_socket('eth1', busy_poll=50, sock=self.sock)
+
+    def test_loopback(self):
+        """Create a real socket and receive on it."""
+        with mock.patch('katsdpservices.interfaces.get_interface_address',
+                        return_value='127.0.0.1'):
+            sock = create_receive_socket('lo', buffer_size=65536)
+        with sock, socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            self.assertEqual('127.0.0.1', sock.getsockname()[0])
+            self.assertGreaterEqual(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF), 65536)
+            sender.sendto(b'hello', sock.getsockname())
+            self.assertEqual(b'hello', sock.recv(100))
+
+    def test_bind_failure(self):
+        """A socket that could not be bound is closed."""
+        with mock.patch('socket.socket', return_value=self.sock):
+            self.sock.bind.side_effect = OSError('Address in use')
+            with self.assertRaises(OSError):
+                create_receive_socket('eth1', ['239.1.2.3'], port=7148)
+        self.sock.bind.assert_called_once_with(('', 7148))
+        self.sock.close.assert_called_once_with()
@@ -0,0 +1,170 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.logfile`."""
+
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from katsdpservices.logfile import BufferedFileHandler
+from katsdpservices.restart import _flush_logging
+
+
+class TestBufferedFileHandler(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.dir = tmpdir.name
+        self.path = os.path.join(self.dir, 'test.log')
+        self.logger = logging.getLogger('katsdpservices.test.logfile')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.addCleanup(setattr, self.logger, 'propagate', True)
+        self.addCleanup(self.logger.setLevel, logging.NOTSET)
+
+    def _make_handler(self, **kwargs):
+        handler = BufferedFileHandler(self.path, **kwargs)
+        self.logger.addHandler(handler)
+        self.addCleanup(handler.close)
+        self.addCleanup(self.logger.removeHandler, handler)
+        return handler
+
+    def _read(self, path=None):
+        with open(path or self.path) as f:
+            return f.read()
+
+    def _wait_for(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                self.fail('Timed out')
+            time.sleep(0.01)
+
+    def test_buffered(self):
+        handler = self._make_handler(flush_interval=60)
+        self.logger.info('first')
+        self.logger.info('second')
+        self.assertEqual('', self._read())
+        handler.flush()
+        self.assertEqual('first\nsecond\n', self._read())
+
+    def test_flush_level(self):
+        self._make_handler(flush_interval=60)
+        self.logger.info('info')
+        self.logger.error('error')
+        self.assertEqual('info\nerror\n', self._read())
+
+    def test_flush_interval(self):
+        self._make_handler(flush_interval=0.01)
+        self.logger.info('hello')
+        self._wait_for(lambda: self._read() == 'hello\n')
+
+    def test_buffer_size(self):
+        self._make_handler(flush_interval=60, buffer_size=100)
+        self.logger.info('x' * 50)
+        time.sleep(0.05)
+        self.assertEqual('', self._read())
+        self.logger.info('y' * 50)
+        self._wait_for(lambda: self._read() == 'x' * 50 + '\n' + 'y' * 50 + '\n')
+
+    def test_many_records(self):
+        handler = self._make_handler(flush_interval=60, buffer_size=10**8)
+        for i in range(5000):
+            self.logger.info('record %d', i)
+        handler.flush()
+        lines = self._read().splitlines()
+        self.assertEqual(['record {}'.format(i) for i in range(5000)], lines)
+
+    def test_restart_flush(self):
+        self._make_handler(flush_interval=60)
+        self.logger.info('before restart')
+        _flush_logging()
+        self.assertEqual('before restart\n', self._read())
+
+    def _segments(self):
+        return sorted(name for name in os.listdir(self.dir) if name != 'test.log')
+
+    def test_rotate(self):
+        handler = self._make_handler(flush_interval=60, max_bytes=1000, backup_count=2)
+        for i in range(3):
+            self.logger.info('segment %d', i)
+            handler.rotate()
+        self.logger.info('current')
+        handler.close()
+        segments = self._segments()
+        self.assertEqual(2, len(segments))
+        for name in segments:
+            self.assertRegex(name, r'^test\.log\.\d{8}T\d{6}\.\d{6}(-\d+)?\.gz$')
+        contents = []
+        for name in segments:
+            with gzip.open(os.path.join(self.dir, name), 'rt') as f:
+                contents.append(f.read())
+        self.assertEqual(['segment 1\n', 'segment 2\n'], contents)
+        self.assertEqual('current\n', self._read())
+
+    def test_prune_queued(self):
+        """Segments waiting to be compressed are not pruned."""
+        handler = self._make_handler(flush_interval=60, backup_count=1)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        compress = handler._compress
+
+        def slow_compress(segment):
+            release.wait()
+            compress(segment)
+
+        with mock.patch.object(handler, '_compress', side_effect=slow_compress):
+            for i in range(3):
+                self.logger.info('segment %d', i)
+                handler.rotate()
+            release.set()
+            with self.assertNoLogs('katsdpservices.logfile', logging.WARNING):
+                handler.close()
+        name, = self._segments()
+        with gzip.open(os.path.join(self.dir, name), 'rt') as f:
+            self.assertEqual('segment 2\n', f.read())
+
+    def test_prune_order(self):
+        """Collision suffixes are ordered numerically."""
+        handler = self._make_handler(flush_interval=60, backup_count=3)
+        stamp = '20260101T000000.000000'
+        for suffix in ['', '-1', '-2', '-10']:
+            with open('{}.{}{}.gz'.format(self.path, stamp, suffix), 'wb'):
+                pass
+        handler._prune()
+        expected = {'test.log.{}{}.gz'.format(stamp, suffix) for suffix in ['-1', '-2', '-10']}
+        self.assertEqual(expected, set(self._segments()))
+
+    def test_rotate_on_size(self):
+        self._make_handler(flush_interval=0.01, max_bytes=100, backup_count=0,
+                           compress=False)
+        for i in range(20):
+            self.logger.info('record %02d %s', i, 'x' * 20)
+            time.sleep(0.005)
+        self._wait_for(lambda: len(self._segments()) >= 2)
+        self.logger.handlers[0].close()
+        lines = []
+        for name in self._segments():
+            self.assertFalse(name.endswith('.gz'))
+            lines.extend(self._read(os.path.join(self.dir, name)).splitlines())
+        lines.extend(self._read().splitlines())
+        self.assertEqual(['record {:02d} {}'.format(i, 'x' * 20) for i in range(20)], lines)
@@ -0,0 +1,133 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.logforward`."""
+
+import logging
+import multiprocessing
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+import katsdpservices
+from katsdpservices import logforward
+from katsdpservices.logforward import ForwardingHandler, start_log_forwarding
+
+
+CHILD_LOGGER = 'katsdpservices.test.child'
+
+
+def _child_main():
+    katsdpservices.setup_logging(add_signal_handler=False, add_excepthook=False)
+    assert len(logging.root.handlers) == 1
+    assert isinstance(logging.root.handlers[0], ForwardingHandler)
+    logger = logging.getLogger(CHILD_LOGGER)
+    # Undo the effects of assertLogs inherited from the parent
+    logger.handlers.clear()
+    logger.propagate = True
+    logger.setLevel(logging.NOTSET)
+    for i in range(500):
+        logger.info('message %d', i)
+    logger.debug('not shown')
+    try:
+        raise RuntimeError('test exception')
+    except RuntimeError:
+        logger.exception('exception', extra={'unpicklable': lambda: None})
+
+
+class TestLogForwarding(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(os.environ)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for name in list(os.environ):
+            if name.startswith('KATSDP_LOG_'):
+                del os.environ[name]
+
+    def test_forward(self):
+        server = start_log_forwarding()
+        self.addCleanup(server.close)
+        self.assertEqual(server.path, os.environ['KATSDP_LOG_FORWARD'])
+        ctx = multiprocessing.get_context('fork')
+        with self.assertLogs(CHILD_LOGGER, logging.DEBUG) as cm:
+            process = ctx.Process(target=_child_main)
+            process.start()
+            process.join()
+            self.assertEqual(0, process.exitcode)
+            server.close()
+        self.assertNotIn('KATSDP_LOG_FORWARD', os.environ)
+        messages = [record.getMessage() for record in cm.records]
+        self.assertEqual(['message {}'.format(i) for i in range(500)] + ['exception'],
+                         messages)
+        last = cm.records[-1]
+        self.assertEqual(process.pid, last.process)
+        self.assertIn('RuntimeError: test exception', last.exc_text)
+        self.assertIn('<function', last.unpicklable)
+
+    def test_permissions(self):
+        """A socket at an explicit path is only accessible to the owner."""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'log.sock')
+        old_umask = os.umask(0)
+        try:
+            server = start_log_forwarding(path)
+        finally:
+            os.umask(old_umask)
+        self.addCleanup(server.close)
+        self.addCleanup(logforward._servers.remove, server)
+        self.assertEqual(path, os.environ['KATSDP_LOG_FORWARD'])
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(path).st_mode))
+
+    def test_bounded_buffer(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            handler = ForwardingHandler(os.path.join(tmpdir, 'missing.sock'), capacity=10)
+            logger = logging.getLogger('katsdpservices.test.bounded')
+            logger.propagate = False
+            logger.addHandler(handler)
+            self.addCleanup(setattr, logger, 'propagate', True)
+            self.addCleanup(logger.removeHandler, handler)
+            for i in range(100):
+                logger.warning('message %d', i)
+            # At most one batch can be in flight, so everything beyond the
+            # capacity plus one batch is dropped.
+            self.assertGreaterEqual(handler.dropped, 100 - 10 - handler.batch_size)
+            self.assertGreater(handler.dropped, 0)
+            with mock.patch.object(handler, 'flush'):
+                handler.close()
+            # Records that were still queued when closed are dropped too
+            self.assertEqual(100, handler.dropped)
+
+    def test_before_exec(self):
+        """Servers are closed before exec, so that the new image does not use them."""
+        server = start_log_forwarding()
+        self.addCleanup(server.close)
+        logforward._before_exec()
+        self.assertNotIn('KATSDP_LOG_FORWARD', os.environ)
+        self.assertFalse(os.path.exists(server.path))
+        self.assertNotIn(server, logforward._servers)
+
+    def test_before_exec_inherited(self):
+        """A server inherited from the parent process is left alone."""
+        server = start_log_forwarding()
+        self.addCleanup(server.close)
+        self.addCleanup(logforward._servers.remove, server)
+        server._pid = os.getpid() + 1    # Pretend it belongs to the parent
+        logforward._before_exec()
+        self.assertEqual(server.path, os.environ['KATSDP_LOG_FORWARD'])
+        self.assertTrue(os.path.exists(server.path))
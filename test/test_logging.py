@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -24,6 +24,7 @@ import re
 import signal
 import socket
 import sys
+import tempfile
 import time
 import unittest
 import zlib
@@ -31,6 +32,9 @@ from contextlib import closing
 from unittest import mock
 
 import katsdpservices
+from katsdpservices.logging import SamplingFilter
+from katsdpservices.gelf import GelfUdpHandler
+from katsdpservices.logfile import BufferedFileHandler
 
 
 class TestLogging(unittest.TestCase):
@@ -163,6 +167,37 @@ class TestLogging(unittest.TestCase):
     def test_gelf_options(self):
         self._test_gelf(True, True)
 
+    def test_gelf_spool(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'spool')
+        os.environ['KATSDP_LOG_GELF_ADDRESS'] = '127.0.0.1:12201'
+        os.environ['KATSDP_LOG_GELF_SPOOL'] = path
+        os.environ['KATSDP_LOG_GELF_SPOOL_SIZE'] = '4096'
+        os.environ['KATSDP_LOG_GELF_SPOOL_RATE'] = '10'
+        katsdpservices.setup_logging()
+        handlers = [handler for handler in self.logger.handlers
+                    if isinstance(handler, GelfUdpHandler)]
+        self.assertEqual(1, len(handlers))
+        self.addCleanup(handlers[0].close)
+        self.assertEqual(path, handlers[0].spool.path)
+        self.assertEqual(4096, handlers[0].spool.capacity)
+        self.assertEqual(10.0, handlers[0].replay_rate)
+
+    def test_forward_unavailable(self):
+        """If the forwarding socket is gone, logging is local."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.environ['KATSDP_LOG_FORWARD'] = os.path.join(tmpdir, 'missing.sock')
+            katsdpservices.setup_logging()
+        self.assertNotIn('KATSDP_LOG_FORWARD', os.environ)
+        logging.error('error message')
+        self.assertRegex(
+            self.stderr.getvalue(),
+            re.compile(
+                "\\A2017-03-02T14:02:03.125Z - logging.py:\\d+ - WARNING - "
+                "Could not connect to log forwarding socket .*missing.sock .*, so logging locally\n"
+                "2017-03-02T14:02:03.125Z - test_logging.py:\\d+ - ERROR - error message\n\\Z"))
+
     def test_toggle_debug(self):
         self.assertEqual(logging.INFO, logging.root.level)
         os.kill(os.getpid(), signal.SIGUSR2)
@@ -173,3 +208,108 @@ class TestLogging(unittest.TestCase):
         os.kill(os.getpid(), signal.SIGUSR2)
         time.sleep(0.01)
         self.assertEqual(logging.INFO, logging.root.level)
+
+    def test_file(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        path = os.path.join(tmpdir.name, 'test.log')
+        os.environ['KATSDP_LOG_FILE'] = path
+        os.environ['KATSDP_LOG_FILE_MAX_BYTES'] = '1000000'
+        os.environ['KATSDP_LOG_FILE_BACKUPS'] = '3'
+        katsdpservices.setup_logging()
+        handlers = [handler for handler in logging.root.handlers
+                    if isinstance(handler, BufferedFileHandler)]
+        self.assertEqual(1, len(handlers))
+        handler = handlers[0]
+        self.addCleanup(handler.close)
+        self.assertEqual(1000000, handler.max_bytes)
+        self.assertEqual(3, handler.backup_count)
+        logging.info('info message')
+        handler.flush()
+        with open(path) as f:
+            contents = f.read()
+        self.assertRegex(
+            contents,
+            "\\A2017-03-02T14:02:03.125Z - test_logging.py:\\d+ - INFO - info message\n\\Z")
+        # Also still logs to stderr
+        self.assertEqual(contents, self.stderr.getvalue())
+
+    def test_resources(self):
+        os.environ['KATSDP_LOG_RESOURCES_INTERVAL'] = '2.5'
+        with mock.patch('katsdpservices.logging.ResourceSampler', autospec=True) as sampler, \
+                mock.patch('katsdpservices.logging._resource_sampler', None):
+            katsdpservices.setup_logging()
+            sampler.assert_called_once_with(2.5)
+            sampler.return_value.start.assert_called_once_with()
+            # Setting up again replaces the sampler
+            katsdpservices.setup_logging()
+            sampler.return_value.stop.assert_called_once_with()
+
+    def test_sampling(self):
+        os.environ['KATSDP_LOG_SAMPLE'] = json.dumps({
+            'katsdpservices.test.env1': {'every': 5},
+            'katsdpservices.test.env2': {'rate': 1.5, 'level': 'info'}
+        })
+        with mock.patch('katsdpservices.logging.add_log_sampling') as add:
+            katsdpservices.setup_logging()
+        add.assert_any_call('katsdpservices.test.env1', every=5)
+        add.assert_any_call('katsdpservices.test.env2', rate=1.5, level=logging.INFO)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    def _record(self, level=logging.DEBUG):
+        return logging.LogRecord('test', level, __file__, 1, 'message', None, None)
+
+    def test_every(self):
+        filter = SamplingFilter(every=3)
+        kept = [filter.filter(self._record()) for i in range(7)]
+        self.assertEqual([True, False, False, True, False, False, True], kept)
+        self.assertEqual(4, filter.suppressed)
+
+    def test_level(self):
+        filter = SamplingFilter(every=1000, level=logging.INFO)
+        self.assertTrue(filter.filter(self._record(logging.INFO)))
+        self.assertFalse(filter.filter(self._record(logging.INFO)))
+        self.assertFalse(filter.filter(self._record(logging.DEBUG)))
+        for i in range(10):
+            self.assertTrue(filter.filter(self._record(logging.WARNING)))
+        self.assertEqual(2, filter.suppressed)
+
+    def test_rate(self):
+        with mock.patch('time.monotonic', return_value=100.0) as monotonic:
+            filter = SamplingFilter(rate=2)
+            kept = [filter.filter(self._record()) for i in range(5)]
+            self.assertEqual([True, True, False, False, False], kept)
+            monotonic.return_value = 100.5
+            kept = [filter.filter(self._record()) for i in range(3)]
+            self.assertEqual([True, False, False], kept)
+            # Tokens are capped, so a long gap does not allow a big burst
+            monotonic.return_value = 200.0
+            kept = [filter.filter(self._record()) for i in range(3)]
+            self.assertEqual([True, True, False], kept)
+        self.assertEqual(6, filter.suppressed)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SamplingFilter()
+        with self.assertRaises(ValueError):
+            SamplingFilter(every=2, rate=2)
+        with self.assertRaises(ValueError):
+            SamplingFilter(every=0)
+
+    def test_formatting_skipped(self):
+        """Suppressed records are not formatted"""
+        logger = logging.getLogger('katsdpservices.test.sampled')
+        filter = katsdpservices.add_log_sampling(logger.name, every=2)
+        self.addCleanup(logger.removeFilter, filter)
+        arg = mock.MagicMock()
+        with self.assertLogs(logger, logging.DEBUG) as cm:
+            for i in range(4):
+                logger.debug('value %s', arg)
+        self.assertEqual(2, len(cm.records))
+        self.assertEqual(2, arg.__str__.call_count)
+        self.assertEqual(2, katsdpservices.logging.log_sampling_stats()[logger.name])
+        # Adding again replaces the filter
+        filter2 = katsdpservices.add_log_sampling(logger.name, rate=10)
+        self.addCleanup(logger.removeFilter, filter2)
+        self.assertEqual([filter2], logger.filters)
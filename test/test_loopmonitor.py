@@ -0,0 +1,104 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.loopmonitor`."""
+
+import asyncio
+import logging
+import time
+import unittest
+
+from katsdpservices import ArgumentParser, add_aiomonitor_arguments, start_aiomonitor
+from katsdpservices import LoopMonitor, get_loop_monitor
+
+
+def _block(duration):
+    time.sleep(duration)
+
+
+class TestLoopMonitor(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_lag(self):
+        with LoopMonitor(self.loop, interval=0.01, slow_threshold=1.0) as monitor:
+            monitor.start()
+            self.loop.run_until_complete(asyncio.sleep(0.1))
+            stats = monitor.stats()
+        self.assertGreater(stats['lag_count'], 2)
+        self.assertEqual(stats['lag_count'], stats['lag_buckets'][-1][1])
+        self.assertEqual(float('inf'), stats['lag_buckets'][-1][0])
+        self.assertLessEqual(stats['lag_sum'], stats['lag_count'] * stats['lag_max'])
+        self.assertEqual(0, stats['slow_callbacks_total'])
+
+    def test_slow_callback(self):
+        async def main():
+            await asyncio.sleep(0.03)
+            _block(0.2)
+            await asyncio.sleep(0.03)
+
+        with LoopMonitor(self.loop, interval=0.01, slow_threshold=0.05) as monitor:
+            monitor.start()
+            with self.assertLogs('katsdpservices.loopmonitor', logging.WARNING) as cm:
+                self.loop.run_until_complete(main())
+            stats = monitor.stats()
+        self.assertEqual(1, stats['slow_callbacks_total'])
+        report = stats['slow_callbacks'][0]
+        self.assertGreaterEqual(report.duration, 0.1)
+        self.assertIn('in _block', report.location)
+        self.assertIn('in main', report.stack[-2])
+        self.assertIn('_block', cm.output[0])
+        self.assertGreaterEqual(stats['lag_max'], 0.1)
+
+    def test_summary_log(self):
+        with LoopMonitor(self.loop, interval=0.01, log_interval=0.03) as monitor:
+            monitor.start()
+            with self.assertLogs('katsdpservices.loopmonitor', logging.INFO) as cm:
+                self.loop.run_until_complete(asyncio.sleep(0.1))
+        self.assertRegex(cm.output[0], 'Event loop lag: mean .* ms, max .* ms over [0-9]+ samples')
+
+    def test_get_loop_monitor(self):
+        self.assertIsNone(get_loop_monitor(self.loop))
+        monitor = LoopMonitor(self.loop)
+        monitor.start()
+        self.assertIs(monitor, get_loop_monitor(self.loop))
+        monitor.close()
+        self.assertIsNone(get_loop_monitor(self.loop))
+
+
+class TestStartLoopMonitor(unittest.TestCase):
+    def setUp(self):
+        self.parser = ArgumentParser()
+        add_aiomonitor_arguments(self.parser)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_disabled(self):
+        args = self.parser.parse_args([])
+        with start_aiomonitor(self.loop, args, locals()):
+            self.assertIsNone(get_loop_monitor(self.loop))
+
+    def test_enabled(self):
+        args = self.parser.parse_args(['--loop-monitor', '--loop-monitor-interval', '0.5',
+                                       '--loop-monitor-slow-threshold', '0.25',
+                                       '--loop-monitor-log-interval', '0'])
+        with start_aiomonitor(self.loop, args, locals()):
+            monitor = get_loop_monitor(self.loop)
+            self.assertEqual(0.5, monitor.interval)
+            self.assertEqual(0.25, monitor.slow_threshold)
+            self.assertEqual(0.0, monitor.log_interval)
+        self.assertIsNone(get_loop_monitor(self.loop))
@@ -0,0 +1,86 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.memory`."""
+
+import errno
+import logging
+import mmap
+import unittest
+from unittest import mock
+
+from katsdpservices import ArgumentParser
+from katsdpservices.memory import (
+    add_memory_arguments, allocate_buffer, apply_memory_options, lock_memory,
+    memory_status, prefault_buffer)
+
+
+class TestMemory(unittest.TestCase):
+    def test_memory_status(self):
+        status = memory_status()
+        self.assertGreater(status['resident'], 0)
+        self.assertGreaterEqual(status['locked'], 0)
+
+    def test_prefault_preserves_contents(self):
+        data = bytearray(b'x' * (3 * mmap.PAGESIZE + 5))
+        prefault_buffer(data)
+        self.assertEqual(b'x' * len(data), data)
+
+    def test_allocate_prefault(self):
+        size = 64 * 2**20
+        before = memory_status()['resident']
+        buffer = allocate_buffer(size, hugepages=False, prefault=True)
+        after = memory_status()['resident']
+        self.assertEqual(size, len(buffer))
+        self.assertGreaterEqual(after - before, size // 2)
+        buffer.close()
+
+    def test_allocate_hugepages(self):
+        with mock.patch('mmap.mmap') as mock_mmap:
+            allocate_buffer(2**21, hugepages=True, prefault=False)
+        mock_mmap.return_value.madvise.assert_called_once_with(mmap.MADV_HUGEPAGE)
+
+    def test_lock_memory(self):
+        with mock.patch('ctypes.CDLL') as cdll:
+            cdll.return_value.mlockall.return_value = 0
+            self.assertTrue(lock_memory())
+        cdll.return_value.mlockall.assert_called_once_with(3)
+
+    def test_lock_memory_rlimit(self):
+        with mock.patch('ctypes.CDLL') as cdll, \
+                mock.patch('ctypes.get_errno', return_value=errno.ENOMEM):
+            cdll.return_value.mlockall.return_value = -1
+            with self.assertLogs('katsdpservices.memory', logging.WARNING) as cm:
+                self.assertFalse(lock_memory(future=False))
+        cdll.return_value.mlockall.assert_called_once_with(1)
+        self.assertIn('RLIMIT_MEMLOCK', cm.output[0])
+
+    def test_apply_options(self):
+        parser = ArgumentParser()
+        add_memory_arguments(parser)
+        args = parser.parse_args(['--mlockall', '--hugepages', '--prefault'])
+        with mock.patch('katsdpservices.memory.lock_memory', return_value=True) as lock, \
+                mock.patch('katsdpservices.memory._default_hugepages'), \
+                mock.patch('katsdpservices.memory._default_prefault'):
+            with self.assertLogs('katsdpservices.memory', logging.INFO) as cm:
+                self.assertTrue(apply_memory_options(args))
+            lock.assert_called_once_with()
+            with mock.patch('mmap.mmap') as mock_mmap, \
+                    mock.patch('katsdpservices.memory.prefault_buffer') as mock_prefault:
+                allocate_buffer(4096)
+            mock_mmap.return_value.madvise.assert_called_once_with(mmap.MADV_HUGEPAGE)
+            mock_prefault.assert_called_once_with(mock_mmap.return_value)
+        self.assertRegex(cm.output[0], r'Memory: \d+ MiB locked, \d+ MiB resident')
@@ -0,0 +1,73 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.memtrace`."""
+
+import logging
+import os
+import signal
+import time
+import tracemalloc
+import unittest
+from unittest import mock
+
+from katsdpservices.memtrace import memory_snapshot, setup_memory_trace, stop_memory_trace
+
+
+def _allocate():
+    return [bytearray(1000) for i in range(1000)]
+
+
+class TestMemoryTrace(unittest.TestCase):
+    def setUp(self):
+        if tracemalloc.is_tracing():
+            self.skipTest('tracemalloc is already in use')
+        self.addCleanup(stop_memory_trace)
+
+    def test_snapshot(self):
+        with self.assertLogs('katsdpservices.memtrace', logging.INFO) as cm:
+            report = memory_snapshot()
+        self.assertEqual('Started tracing memory allocations', report)
+        self.assertTrue(tracemalloc.is_tracing())
+        data = _allocate()
+        with self.assertLogs('katsdpservices.memtrace', logging.INFO) as cm:
+            report = memory_snapshot(limit=3)
+        self.assertEqual(report, cm.records[0].getMessage())
+        lines = report.splitlines()
+        self.assertRegex(lines[0], r'^Traced memory: [0-9.]+ MiB current, [0-9.]+ MiB peak$')
+        self.assertEqual('Top 3 allocation sites:', lines[1])
+        self.assertEqual('Top 3 changes since previous snapshot:', lines[5])
+        self.assertIn('test_memtrace.py', lines[2])
+        self.assertIn('test_memtrace.py', lines[6])
+        self.assertIn('(+', lines[6])
+        del data
+
+    def test_signal(self):
+        self.addCleanup(signal.signal, signal.SIGRTMIN, signal.SIG_DFL)
+        for name in ['_limit', '_nframes']:
+            patcher = mock.patch('katsdpservices.memtrace.' + name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        setup_memory_trace(limit=2)
+        with self.assertLogs('katsdpservices.memtrace', logging.INFO) as cm:
+            os.kill(os.getpid(), signal.SIGRTMIN)
+            # Give it a bit of time, since it's done in a separate thread
+            time.sleep(0.05)
+            self.assertTrue(tracemalloc.is_tracing())
+            os.kill(os.getpid(), signal.SIGRTMIN)
+            time.sleep(0.2)
+        self.assertEqual(2, len(cm.records))
+        self.assertIn('Top 2 allocation sites:', cm.records[1].getMessage())
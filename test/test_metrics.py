@@ -0,0 +1,147 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.metrics`."""
+
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from katsdpservices import ArgumentParser, add_metrics_arguments, start_metrics_server
+from katsdpservices.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        counter = Counter('test_total', 'Test counter', registry=self.registry)
+        counter.inc()
+        counter.inc(3)
+        self.assertEqual(4, counter.value)
+
+    def test_counter_threads(self):
+        counter = Counter('test_total', 'Test counter', registry=self.registry)
+
+        def work():
+            for i in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        counter.inc()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(4001, counter.value)
+        # Cells from dead threads are folded into the base
+        self.assertEqual(4001, counter.value)
+        self.assertEqual(1, len(counter._cells))
+
+    def test_gauge(self):
+        gauge = Gauge('test', 'Test gauge', registry=self.registry)
+        gauge.set(5)
+        gauge.inc(2)
+        gauge.dec()
+        self.assertEqual(6, gauge.value)
+        gauge.set_function(lambda: 42)
+        self.assertEqual(42, gauge.value)
+
+    def test_histogram(self):
+        hist = Histogram('test_seconds', 'Test histogram', registry=self.registry,
+                         buckets=[1, 2, 5])
+        for value in [0.5, 1, 1.5, 10]:
+            hist.observe(value)
+        self.assertEqual(4, hist.count)
+        self.assertEqual(13.0, hist.sum)
+        self.assertEqual([(1, 2), (2, 3), (5, 3), (float('inf'), 4)],
+                         hist.cumulative_counts())
+
+    def test_bad_buckets(self):
+        with self.assertRaises(ValueError):
+            Histogram('test', 'Test', registry=self.registry, buckets=[2, 1])
+        with self.assertRaises(ValueError):
+            Histogram('test', 'Test', labels={'le': '1'}, registry=self.registry)
+
+    def test_bad_names(self):
+        with self.assertRaises(ValueError):
+            Counter('bad-name', 'Test', registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter('test', 'Test', labels={'bad-label': 'x'}, registry=self.registry)
+
+    def test_duplicate(self):
+        Counter('test', 'Test', labels={'a': '1'}, registry=self.registry)
+        Counter('test', 'Test', labels={'a': '2'}, registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter('test', 'Test', labels={'a': '1'}, registry=self.registry)
+        with self.assertRaises(ValueError):
+            Gauge('test', 'Test', labels={'a': '3'}, registry=self.registry)
+
+    def test_exposition(self):
+        Counter('c_total', 'A counter', labels={'x': 'a"b'}, registry=self.registry).inc(2)
+        Counter('c_total', 'A counter', labels={'x': 'c'}, registry=self.registry)
+        Gauge('g', 'A gauge\nwith newline', registry=self.registry).set(1.5)
+        hist = Histogram('h', 'A histogram', registry=self.registry, buckets=[0.5])
+        hist.observe(0.25)
+        self.assertEqual(
+            '# HELP c_total A counter\n'
+            '# TYPE c_total counter\n'
+            'c_total{x="a\\"b"} 2\n'
+            'c_total{x="c"} 0\n'
+            '# HELP g A gauge\\nwith newline\n'
+            '# TYPE g gauge\n'
+            'g 1.5\n'
+            '# HELP h A histogram\n'
+            '# TYPE h histogram\n'
+            'h_bucket{le="0.5"} 1\n'
+            'h_bucket{le="+Inf"} 1\n'
+            'h_sum 0.25\n'
+            'h_count 1\n',
+            self.registry.exposition())
+
+    def test_unregister(self):
+        counter = Counter('test', 'Test', registry=self.registry)
+        self.registry.unregister(counter)
+        self.assertEqual('', self.registry.exposition())
+
+
+class TestMetricsServer(unittest.TestCase):
+    def setUp(self):
+        self.parser = ArgumentParser()
+        add_metrics_arguments(self.parser)
+        self.registry = Registry()
+        Counter('requests_total', 'Requests', registry=self.registry).inc(7)
+
+    def test_disabled(self):
+        args = self.parser.parse_args([])
+        with start_metrics_server(args, self.registry) as server:
+            self.assertIsNone(server)
+
+    def test_serve(self):
+        args = self.parser.parse_args(['--metrics-host', '127.0.0.1', '--metrics-port', '0'])
+        with start_metrics_server(args, self.registry) as server:
+            url = 'http://127.0.0.1:{}/metrics'.format(server.port)
+            with urllib.request.urlopen(url) as response:
+                self.assertEqual(200, response.status)
+                self.assertIn('text/plain', response.headers['Content-Type'])
+                body = response.read().decode('utf-8')
+            self.assertIn('requests_total 7\n', body)
+            with self.assertRaises(urllib.error.HTTPError) as cm:
+                urllib.request.urlopen('http://127.0.0.1:{}/other'.format(server.port))
+            self.assertEqual(404, cm.exception.code)
+            cm.exception.close()
@@ -0,0 +1,104 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.profiler`."""
+
+import glob
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+
+import katsdpservices
+from katsdpservices.profiler import SamplingProfiler
+
+
+def _busy_wait(stop):
+    while not stop.is_set():
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def _run_busy(self, duration):
+        stop = threading.Event()
+        thread = threading.Thread(target=_busy_wait, args=(stop,), name='busy-thread')
+        thread.start()
+        time.sleep(duration)
+        stop.set()
+        thread.join()
+
+    def test_collapsed(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        self.assertTrue(profiler.running)
+        self._run_busy(0.1)
+        profiler.stop()
+        self.assertFalse(profiler.running)
+        self.assertGreater(profiler.samples, 0)
+        lines = profiler.collapsed().splitlines()
+        busy = [line for line in lines if line.startswith('busy-thread;')]
+        self.assertTrue(busy)
+        for line in busy:
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+            self.assertRegex(stack, r';_busy_wait \(.*test_profiler\.py:\d+\)(;|$)')
+        # The profiler must not sample itself
+        self.assertFalse([line for line in lines if line.startswith('sampling-profiler;')])
+
+    def test_double_start(self):
+        profiler = SamplingProfiler()
+        profiler.start()
+        self.addCleanup(profiler.stop)
+        with self.assertRaises(RuntimeError):
+            profiler.start()
+
+    def test_stop_not_running(self):
+        with self.assertRaises(RuntimeError):
+            SamplingProfiler().stop()
+
+
+class TestToggleProfiler(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = tmpdir.name
+
+    def _profiles(self):
+        return glob.glob(os.path.join(self.tmpdir, 'katsdp-profile-*.folded'))
+
+    def test_toggle(self):
+        message = katsdpservices.toggle_profiler(self.tmpdir)
+        self.assertEqual('Started sampling profiler', message)
+        time.sleep(0.02)
+        message = katsdpservices.toggle_profiler(self.tmpdir)
+        profiles = self._profiles()
+        self.assertEqual(1, len(profiles))
+        self.assertIn(profiles[0], message)
+        with open(profiles[0]) as f:
+            self.assertIn('MainThread;', f.read())
+
+    def test_signal(self):
+        self.addCleanup(signal.signal, signal.SIGUSR1, signal.SIG_DFL)
+        katsdpservices.setup_profiler(output_dir=self.tmpdir)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        # Give it a bit of time, since it's done in a separate thread
+        time.sleep(0.05)
+        self.assertEqual([], self._profiles())
+        os.kill(os.getpid(), signal.SIGUSR1)
+        time.sleep(0.05)
+        self.assertEqual(1, len(self._profiles()))
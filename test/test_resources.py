@@ -0,0 +1,68 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.resources`."""
+
+import logging
+import time
+import unittest
+
+from katsdpservices.resources import ResourceSampler, sample
+
+
+class TestSample(unittest.TestCase):
+    def test_sample(self):
+        usage = sample()
+        self.assertGreater(usage['rss_bytes'], 0)
+        self.assertGreaterEqual(usage['max_rss_bytes'], usage['rss_bytes'])
+        self.assertGreater(usage['cpu_user_seconds'] + usage['cpu_system_seconds'], 0)
+        self.assertGreaterEqual(usage['voluntary_context_switches'], 0)
+        self.assertGreaterEqual(usage['involuntary_context_switches'], 0)
+        self.assertGreaterEqual(usage['open_fds'], 3)
+        self.assertGreaterEqual(usage['threads'], 1)
+
+
+class TestResourceSampler(unittest.TestCase):
+    def test_invalid_interval(self):
+        with self.assertRaises(ValueError):
+            ResourceSampler(0)
+
+    def test_extra_fields(self):
+        sampler = ResourceSampler(60)
+        with self.assertLogs('katsdpservices.resources', logging.INFO) as cm:
+            sampler.log_sample()
+            sampler.log_sample()
+        first, second = cm.records
+        self.assertRegex(first.getMessage(), r'^Resource usage: RSS [0-9.]+ MiB')
+        self.assertGreater(first.rss_bytes, 0)
+        self.assertGreaterEqual(first.open_fds, 3)
+        self.assertFalse(hasattr(first, 'cpu_percent'))
+        self.assertGreaterEqual(second.cpu_percent, 0.0)
+
+    def test_thread(self):
+        sampler = ResourceSampler(0.01)
+        with self.assertLogs('katsdpservices.resources', logging.INFO) as cm:
+            sampler.start()
+            try:
+                for _ in range(500):
+                    if len(cm.records) >= 3:
+                        break
+                    time.sleep(0.01)
+                else:
+                    self.fail('Timed out waiting for samples')
+            finally:
+                sampler.stop()
+        self.assertGreaterEqual(len(cm.records), 3)
@@ -1,5 +1,5 @@
 ################################################################################
-# Copyright (c) 2017-2020, National Research Foundation (Square Kilometre Array)
+# Copyright (c) 2017-2020, 2026, National Research Foundation (Square Kilometre Array)
 #
 # Licensed under the BSD 3-Clause License (the "License"); you may not use
 # this file except in compliance with the License. You may obtain a copy
@@ -16,13 +16,24 @@
 
 """Tests for :mod:`katsdpservices.restart`"""
 
+import asyncio
+import json
+import logging
 import os
+import select
 import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
 import time
 import unittest
+import zlib
 from unittest import mock
 
 import katsdpservices
+from katsdpservices.restart import drain
 
 
 class TestRestart(unittest.TestCase):
@@ -41,6 +52,15 @@ class TestRestart(unittest.TestCase):
         # assert_called_once_with can't specify an unknown number of arguments
         self.assertEqual(1, len(self.execlp.mock_calls))
 
+    def test_restart_log_forwarding(self):
+        """The new image does not inherit the log forwarding socket."""
+        with mock.patch.dict(os.environ):
+            server = katsdpservices.start_log_forwarding()
+            self.addCleanup(server.close)
+            katsdpservices.restart_process()
+            self.assertNotIn('KATSDP_LOG_FORWARD', os.environ)
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
     def test_restart_signal(self):
         katsdpservices.setup_restart()
         os.kill(os.getpid(), signal.SIGHUP)
@@ -48,6 +68,14 @@ class TestRestart(unittest.TestCase):
         time.sleep(0.01)
         self.assertEqual(1, len(self.execlp.mock_calls))
 
+    def test_restart_other_signal(self):
+        self.addCleanup(signal.signal, signal.SIGUSR1, signal.SIG_DFL)
+        katsdpservices.setup_restart(signal.SIGUSR1)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        # Give time for asynchronous handling
+        time.sleep(0.01)
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
     def test_restart_signal_with_false_callback(self):
         callback = mock.MagicMock()
         callback.return_value = False
@@ -67,3 +95,302 @@ class TestRestart(unittest.TestCase):
         time.sleep(0.01)
         callback.assert_called_once_with()
         self.execlp.assert_not_called()
+
+
+class TestDrain(unittest.TestCase):
+    def _create_patch(self, *args, **kwargs):
+        patcher = mock.patch(*args, **kwargs)
+        mock_obj = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mock_obj
+
+    def _add_hook(self, hook, name=None):
+        katsdpservices.add_drain_hook(hook, name)
+        self.addCleanup(katsdpservices.remove_drain_hook, hook)
+
+    def setUp(self):
+        self.execlp = self._create_patch('os.execlp', spec=True)
+        self.addCleanup(signal.signal, signal.SIGHUP, signal.SIG_DFL)
+        self.calls = []
+
+    def _start_loop(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+
+        def cleanup():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+        self.addCleanup(cleanup)
+        return loop
+
+    def test_hooks_in_order(self):
+        self._add_hook(lambda: self.calls.append(1))
+        self._add_hook(lambda: self.calls.append(2))
+        self.assertTrue(drain())
+        self.assertEqual([1, 2], self.calls)
+
+    def test_coroutine_hook(self):
+        loop = self._start_loop()
+
+        async def hook():
+            self.calls.append(asyncio.get_running_loop())
+
+        self._add_hook(hook)
+        self.assertTrue(drain(loop=loop))
+        self.assertEqual([loop], self.calls)
+
+    def test_coroutine_hook_no_loop(self):
+        async def hook():
+            self.calls.append('ran')
+
+        self._add_hook(hook)
+        self.assertTrue(drain())
+        self.assertEqual(['ran'], self.calls)
+
+    def test_failing_hook(self):
+        def bad_hook():
+            raise RuntimeError('test exception')
+
+        self._add_hook(bad_hook)
+        self._add_hook(lambda: self.calls.append(1))
+        with self.assertLogs('katsdpservices.restart', logging.ERROR):
+            self.assertTrue(drain())
+        self.assertEqual([1], self.calls)
+
+    def test_deadline(self):
+        event = threading.Event()
+        self.addCleanup(event.set)
+        self._add_hook(event.wait, 'wait')
+        self._add_hook(lambda: self.calls.append(1))
+        start = time.monotonic()
+        with self.assertLogs('katsdpservices.restart', logging.WARNING):
+            self.assertFalse(drain(timeout=0.05))
+        self.assertLess(time.monotonic() - start, 1.0)
+        event.set()
+        time.sleep(0.01)
+        # The hook after the deadline must not be run
+        self.assertEqual([], self.calls)
+
+    def test_deadline_coroutine(self):
+        loop = self._start_loop()
+
+        async def hook():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.calls.append('cancelled')
+                raise
+
+        self._add_hook(hook)
+        with self.assertLogs('katsdpservices.restart', logging.WARNING):
+            self.assertFalse(drain(timeout=0.05, loop=loop))
+        time.sleep(0.05)
+        self.assertEqual(['cancelled'], self.calls)
+
+    def test_remove_missing(self):
+        with self.assertRaises(ValueError):
+            katsdpservices.remove_drain_hook(lambda: None)
+
+    def test_restart_signal(self):
+        event = threading.Event()
+        self.addCleanup(event.set)
+        self._add_hook(event.wait, 'wait')
+        katsdpservices.setup_restart(drain_timeout=0.05)
+        os.kill(os.getpid(), signal.SIGHUP)
+        time.sleep(0.01)
+        self.execlp.assert_not_called()
+        time.sleep(0.1)
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
+    def test_flush_logging(self):
+        handler = mock.create_autospec(logging.Handler, instance=True)
+        handler.level = logging.NOTSET
+        logger = logging.getLogger('katsdpservices.test.restart')
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        katsdpservices.restart_process()
+        handler.flush.assert_called_once_with()
+
+
+class TestRunWithStandby(unittest.TestCase):
+    SCRIPT = textwrap.dedent('''
+        import os, signal, sys
+        from katsdpservices.restart import run_with_standby
+
+        def main():
+            print(os.getpid(), flush=True)
+            signal.pause()
+
+        sys.exit(-run_with_standby(main))
+    ''')
+
+    def _env(self):
+        return None
+
+    def setUp(self):
+        self.proc = subprocess.Popen([sys.executable, '-c', self.SCRIPT],
+                                     stdout=subprocess.PIPE, env=self._env())
+        self.addCleanup(self.proc.wait)
+        self.addCleanup(self.proc.stdout.close)
+        self.addCleanup(self._kill)
+
+    def _kill(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+
+    def _read_pid(self, timeout=5.0):
+        ready, _, _ = select.select([self.proc.stdout], [], [], timeout)
+        self.assertTrue(ready, 'Timed out waiting for child')
+        return int(self.proc.stdout.readline())
+
+    def _assert_dead(self, pid):
+        # The supervisor should have reaped it, so it should no longer exist
+        with self.assertRaises(ProcessLookupError):
+            os.kill(pid, 0)
+
+    def test_handover(self):
+        first = self._read_pid()
+        self.proc.send_signal(signal.SIGHUP)
+        second = self._read_pid()
+        self.assertNotEqual(first, second)
+        self._assert_dead(first)
+        self.proc.send_signal(signal.SIGHUP)
+        third = self._read_pid()
+        self.assertNotIn(third, {first, second})
+        self.proc.send_signal(signal.SIGTERM)
+        self.assertEqual(signal.SIGTERM, self.proc.wait(timeout=5))
+        self._assert_dead(third)
+
+    def test_child_exit(self):
+        pid = self._read_pid()
+        os.kill(pid, signal.SIGINT)
+        # SIGINT raises KeyboardInterrupt in the child, which exits with 1,
+        # and the script negates it.
+        self.assertEqual(255, self.proc.wait(timeout=5))
+
+
+class TestRunWithStandbyGelf(TestRunWithStandby):
+    """GELF logging is set up in the supervisor, which starts threads before forking."""
+    SCRIPT = textwrap.dedent('''
+        import logging, os, signal, sys
+        import katsdpservices
+        from katsdpservices.restart import run_with_standby
+
+        def main():
+            logging.info('child %d', os.getpid())
+            print(os.getpid(), flush=True)
+            signal.pause()
+
+        katsdpservices.setup_logging()
+        sys.exit(-run_with_standby(main))
+    ''')
+
+    def _env(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(self.server.close)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(5)
+        env = dict(os.environ)
+        env['KATSDP_LOG_GELF_ADDRESS'] = '127.0.0.1:{}'.format(self.server.getsockname()[1])
+        env['KATSDP_LOG_LEVEL'] = 'INFO'
+        return env
+
+    def _assert_logged(self, pid):
+        msg = 'child {}'.format(pid)
+        while True:
+            record = json.loads(zlib.decompress(self.server.recv(65536)))
+            if record['short_message'] == msg:
+                break
+
+    def test_logging(self):
+        first = self._read_pid()
+        self._assert_logged(first)
+        self.proc.send_signal(signal.SIGHUP)
+        second = self._read_pid()
+        self._assert_logged(second)
+
+
+class TestRestartAsync(unittest.TestCase):
+    def _create_patch(self, *args, **kwargs):
+        patcher = mock.patch(*args, **kwargs)
+        mock_obj = patcher.start()
+        self.addCleanup(patcher.stop)
+        return mock_obj
+
+    def setUp(self):
+        self.execlp = self._create_patch('os.execlp', spec=True)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def _setup(self, signums=(signal.SIGHUP,), **kwargs):
+        katsdpservices.setup_restart_async(self.loop, signums, **kwargs)
+        for signum in signums:
+            self.addCleanup(self.loop.remove_signal_handler, signum)
+
+    def _run(self, signum=signal.SIGHUP):
+        async def send():
+            os.kill(os.getpid(), signum)
+            await asyncio.sleep(0.05)
+        self.loop.run_until_complete(send())
+
+    def test_restart_signal(self):
+        self._setup()
+        self._run()
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
+    def test_other_signal(self):
+        self._setup(signums=(signal.SIGUSR1, signal.SIGHUP))
+        self._run(signal.SIGUSR1)
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
+    def test_coroutine_callback(self):
+        calls = []
+
+        async def callback():
+            calls.append(asyncio.get_running_loop())
+            return True
+
+        self._setup(restart_callback=callback)
+        self._run()
+        self.assertEqual([self.loop], calls)
+        self.execlp.assert_not_called()
+
+    def test_drain(self):
+        calls = []
+
+        async def hook():
+            calls.append(threading.current_thread())
+
+        katsdpservices.add_drain_hook(hook)
+        self.addCleanup(katsdpservices.remove_drain_hook, hook)
+        self._setup()
+        self._run()
+        self.assertEqual([threading.current_thread()], calls)
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
+    def test_drain_deadline(self):
+        async def hook():
+            await asyncio.sleep(10)
+
+        katsdpservices.add_drain_hook(hook)
+        self.addCleanup(katsdpservices.remove_drain_hook, hook)
+        self._setup(drain_timeout=0.01)
+        with self.assertLogs('katsdpservices.restart', logging.WARNING):
+            self._run()
+        self.assertEqual(1, len(self.execlp.mock_calls))
+
+    def test_repeated_signal(self):
+        async def callback():
+            await asyncio.sleep(0.02)
+
+        self._setup(restart_callback=callback)
+
+        async def send():
+            os.kill(os.getpid(), signal.SIGHUP)
+            await asyncio.sleep(0.001)
+            os.kill(os.getpid(), signal.SIGHUP)
+            await asyncio.sleep(0.05)
+        self.loop.run_until_complete(send())
+        self.assertEqual(1, len(self.execlp.mock_calls))
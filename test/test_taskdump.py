@@ -0,0 +1,92 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.taskdump`."""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+import unittest
+
+from katsdpservices.taskdump import dump_tasks, setup_task_dump
+
+
+async def _sleeper(event):
+    await event.wait()
+
+
+class TestTaskDump(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.addCleanup(signal.signal, signal.SIGQUIT, signal.SIG_DFL)
+
+    def test_dump_tasks(self):
+        async def main():
+            event = asyncio.Event()
+            task = asyncio.get_running_loop().create_task(_sleeper(event), name='sleepy')
+            await asyncio.sleep(0)
+            with self.assertLogs('katsdpservices.taskdump', logging.WARNING) as cm:
+                dump_tasks(asyncio.get_running_loop())
+            event.set()
+            await task
+            return cm.records
+
+        records = self.loop.run_until_complete(main())
+        self.assertEqual(1, len(records))
+        record = records[0]
+        self.assertEqual(2, record.task_count)
+        self.assertGreaterEqual(record.thread_count, 1)
+        message = record.getMessage()
+        self.assertIn('Task sleepy (pending, unknown age)', message)
+        self.assertIn('in _sleeper', message)
+        self.assertIn('Thread MainThread', message)
+
+    def test_signal(self):
+        setup_task_dump(self.loop)
+
+        async def main():
+            event = asyncio.Event()
+            task = asyncio.get_running_loop().create_task(_sleeper(event), name='sleepy')
+            await asyncio.sleep(0.01)
+            os.kill(os.getpid(), signal.SIGQUIT)
+            # Give the dump thread time to schedule the callback
+            await asyncio.sleep(0.2)
+            event.set()
+            await task
+
+        with self.assertLogs('katsdpservices.taskdump', logging.WARNING) as cm:
+            self.loop.run_until_complete(main())
+        self.assertEqual(1, len(cm.records))
+        message = cm.records[0].getMessage()
+        self.assertRegex(message, r'Task sleepy \(pending, age [0-9.]+ s\)')
+        self.assertIn('in _sleeper', message)
+
+    def test_stalled(self):
+        setup_task_dump(self.loop, timeout=0.05)
+        with self.assertLogs('katsdpservices.taskdump', logging.WARNING) as cm:
+            # The loop is not running, so it cannot respond
+            os.kill(os.getpid(), signal.SIGQUIT)
+            time.sleep(0.3)
+            # Once the loop recovers, it must not log a second, stale dump
+            self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertEqual(1, len(cm.records))
+        message = cm.records[0].getMessage()
+        self.assertIn('Event loop did not respond within 0.050 s', message)
+        self.assertIn('Thread MainThread', message)
+        self.assertNotIn('task_count', cm.records[0].__dict__)
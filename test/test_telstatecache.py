@@ -0,0 +1,172 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.telstatecache`."""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+import katsdptelstate
+
+from katsdpservices.telstatecache import CachingTelescopeState, CacheInfo
+
+
+class TestCachingTelescopeState(unittest.TestCase):
+    def setUp(self):
+        self.raw = katsdptelstate.TelescopeState()
+        self.raw['immutable'] = {'a': 1}
+        self.raw.add('mutable', 1, immutable=False)
+        self.raw.set_indexed('indexed', 'x', 1)
+        self.real_get = self.raw.backend.get
+        self.backend_get = mock.patch.object(
+            self.raw.backend, 'get', wraps=self.real_get).start()
+        self.addCleanup(mock.patch.stopall)
+        self.telstate = CachingTelescopeState(self.raw, maxsize=3)
+
+    def test_immutable(self):
+        self.assertEqual({'a': 1}, self.telstate['immutable'])
+        self.assertEqual({'a': 1}, self.telstate.get('immutable'))
+        self.assertEqual({'a': 1}, self.telstate.immutable)
+        self.assertEqual(1, self.backend_get.call_count)
+        self.assertEqual(CacheInfo(hits=2, misses=1, maxsize=3, currsize=1),
+                         self.telstate.cache_info())
+
+    def test_copy(self):
+        """Modifying a returned value does not affect the cache"""
+        self.telstate['immutable']['a'] = 2
+        self.assertEqual({'a': 1}, self.telstate['immutable'])
+
+    def test_return_encoded(self):
+        encoded = self.raw.get('immutable', return_encoded=True)
+        self.assertEqual(encoded, self.telstate.get('immutable', return_encoded=True))
+
+    def test_mutable(self):
+        self.assertEqual(1, self.telstate['mutable'])
+        self.raw.add('mutable', 2, immutable=False)
+        self.assertEqual(2, self.telstate['mutable'])
+        self.assertEqual(0, self.telstate.cache_info().currsize)
+
+    def test_indexed(self):
+        self.assertEqual({'x': 1}, self.telstate['indexed'])
+        self.raw.set_indexed('indexed', 'y', 2)
+        self.assertEqual({'x': 1, 'y': 2}, self.telstate['indexed'])
+        self.assertEqual(0, self.telstate.cache_info().currsize)
+
+    def test_missing(self):
+        self.assertIsNone(self.telstate.get('later'))
+        with self.assertRaises(KeyError):
+            self.telstate['later']
+        with self.assertRaises(AttributeError):
+            self.telstate.later
+        self.raw['later'] = 3
+        self.assertEqual(3, self.telstate['later'])
+
+    def test_lru(self):
+        for i in range(4):
+            self.raw['key{}'.format(i)] = i
+        for i in range(3):
+            self.telstate['key{}'.format(i)]
+        self.telstate['key0']       # Makes key1 the least recently used
+        self.telstate['key3']
+        self.assertEqual(3, self.telstate.cache_info().currsize)
+        self.backend_get.reset_mock()
+        self.telstate['key0']
+        self.telstate['key1']
+        self.assertEqual([mock.call(b'key1')], self.backend_get.call_args_list)
+
+    def test_views(self):
+        self.raw['ns_key'] = 'in namespace'
+        self.raw['key'] = 'in root'
+        view = self.telstate.view('ns')
+        self.assertIsInstance(view, CachingTelescopeState)
+        self.assertEqual('in namespace', view['key'])
+        self.assertEqual('in root', view.root()['key'])
+        self.assertEqual('in namespace', self.telstate['ns_key'])
+        # All three lookups share the cache
+        self.assertEqual(CacheInfo(hits=1, misses=2, maxsize=3, currsize=2),
+                         self.telstate.cache_info())
+
+    def test_view_shadowed(self):
+        """A key set under a more specific prefix replaces a cached one."""
+        self.raw['x'] = 1
+        view = self.telstate.view('a')
+        self.assertEqual(1, view['x'])
+        self.assertEqual(1, view['x'])
+        self.raw.view('a')['x'] = 2
+        self.assertEqual(2, view['x'])
+        self.assertEqual(2, view['x'])
+        self.assertEqual(1, self.telstate['x'])
+
+    def test_passthrough(self):
+        self.telstate.add('mutable', 5, immutable=False)
+        self.assertEqual(5, self.raw['mutable'])
+        self.assertEqual([(5, mock.ANY)], self.telstate.get_range('mutable'))
+        self.telstate['new'] = 6
+        self.telstate.new_attr = 7
+        self.assertEqual(6, self.raw['new'])
+        self.assertEqual(7, self.raw['new_attr'])
+        self.assertIn('new', self.telstate)
+        self.assertEqual(katsdptelstate.KeyType.IMMUTABLE, self.telstate.key_type('new'))
+
+    def test_delete(self):
+        self.telstate['immutable']
+        self.telstate.delete('immutable')
+        self.assertIsNone(self.telstate.get('immutable'))
+        self.raw['immutable'] = 'replaced'
+        self.assertEqual('replaced', self.telstate['immutable'])
+        self.telstate.clear()
+        self.assertEqual(0, self.telstate.cache_info().currsize)
+        self.assertIsNone(self.telstate.get('immutable'))
+
+    def test_cache_clear(self):
+        self.telstate['immutable']
+        self.telstate.cache_clear()
+        self.assertEqual(CacheInfo(hits=0, misses=0, maxsize=3, currsize=0),
+                         self.telstate.cache_info())
+
+    def test_concurrent(self):
+        """Concurrent lookups of the same key result in a single query"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get(key):
+            started.set()
+            release.wait(5)
+            return self.real_get(key)
+
+        self.backend_get.side_effect = slow_get
+        results = []
+
+        def worker():
+            results.append(self.telstate['immutable'])
+
+        threads = [threading.Thread(target=worker) for i in range(5)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([{'a': 1}] * 5, results)
+        self.assertEqual(1, self.backend_get.call_count)
+
+    def test_bad_maxsize(self):
+        with self.assertRaises(ValueError):
+            CachingTelescopeState(self.raw, maxsize=0)
@@ -0,0 +1,136 @@
+################################################################################
+# Copyright (c) 2026, National Research Foundation (SARAO)
+#
+# Licensed under the BSD 3-Clause License (the "License"); you may not use
+# this file except in compliance with the License. You may obtain a copy
+# of the License at
+#
+#   https://opensource.org/licenses/BSD-3-Clause
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+################################################################################
+
+"""Tests for :mod:`katsdpservices.tracing`."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from katsdpservices import tracing
+
+
+def _load(path):
+    """Load a trace file, which lacks the closing bracket."""
+    with open(path) as f:
+        text = f.read()
+    return json.loads(text.rstrip().rstrip(',') + ']')
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.path = os.path.join(tmpdir.name, 'trace.json')
+        self.addCleanup(tracing.set_trace_file, None)
+
+    def test_disabled(self):
+        self.assertFalse(tracing.is_enabled())
+        span = tracing.span('nothing', value=1)
+        self.assertIs(tracing._NULL_SPAN, span)
+        with span:
+            pass
+        tracing.instant('nothing')
+        tracing.flush_trace()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_spans(self):
+        tracing.set_trace_file(self.path)
+        self.assertTrue(tracing.is_enabled())
+        with tracing.span('outer', name='value'):
+            span = tracing.span('inner')
+            span.end()
+            tracing.instant('point', x=1)
+        with self.assertRaises(ValueError):
+            with tracing.span('failing'):
+                raise ValueError('test')
+        thread = threading.Thread(target=lambda: tracing.span('threaded').end(),
+                                  name='worker')
+        thread.start()
+        thread.join()
+        tracing.flush_trace()
+        events = _load(self.path)
+        by_name = {event['name']: event for event in events}
+        self.assertEqual(['thread_name', 'thread_name', 'process_name',
+                          'inner', 'point', 'outer', 'failing', 'threaded'],
+                         [event['name'] for event in events])
+        outer = by_name['outer']
+        inner = by_name['inner']
+        self.assertEqual('X', outer['ph'])
+        self.assertEqual({'name': 'value'}, outer['args'])
+        self.assertEqual(os.getpid(), outer['pid'])
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner['ts'] + inner['dur'])
+        self.assertEqual('i', by_name['point']['ph'])
+        self.assertEqual({'x': 1}, by_name['point']['args'])
+        self.assertEqual({'exception': 'ValueError'}, by_name['failing']['args'])
+        thread_names = {event['args']['name'] for event in events
+                        if event['name'] == 'thread_name'}
+        self.assertEqual({threading.current_thread().name, 'worker'}, thread_names)
+
+    def test_append(self):
+        tracing.set_trace_file(self.path)
+        tracing.span('first').end()
+        tracing.flush_trace()
+        tracing.span('second').end()
+        tracing.flush_trace()
+        names = [event['name'] for event in _load(self.path) if event['ph'] == 'X']
+        self.assertEqual(['first', 'second'], names)
+
+    def test_before_exec(self):
+        tracing.set_trace_file(self.path)
+        with mock.patch.dict(os.environ):
+            tracing.before_exec()
+            exec_time = float(os.environ[tracing._EXEC_TIME_ENV])
+            self.assertEqual(exec_time, tracing._process_start())
+            self.assertNotIn(tracing._EXEC_TIME_ENV, os.environ)
+        self.assertIn('exec', [event['name'] for event in _load(self.path)])
+
+    def test_process_start(self):
+        start = tracing._process_start()
+        self.assertIsNotNone(start)
+        self.assertLess(start, tracing._now())
+
+    def test_startup(self):
+        """Spans are recorded for startup steps in a new process"""
+        env = dict(os.environ, KATSDP_TRACE_FILE=self.path)
+        env.pop(tracing._EXEC_TIME_ENV, None)
+        subprocess.run(
+            [sys.executable, '-c',
+             'import katsdpservices; '
+             'katsdpservices.setup_logging(add_signal_handler=False, add_excepthook=False)'],
+            env=env, check=True)
+        names = [event['name'] for event in _load(self.path) if event['ph'] == 'X']
+        self.assertEqual(['process startup', 'import katsdpservices', 'setup_logging'], names)
+
+    def test_startup_failure(self):
+        """A failing startup step is still recorded, with the exception"""
+        env = dict(os.environ, KATSDP_TRACE_FILE=self.path,
+                   KATSDP_LOG_GELF_ADDRESS='127.0.0.1:12201', KATSDP_LOG_GELF_EXTRA='[]')
+        env.pop(tracing._EXEC_TIME_ENV, None)
+        result = subprocess.run(
+            [sys.executable, '-c',
+             'import katsdpservices; '
+             'katsdpservices.setup_logging(add_signal_handler=False, add_excepthook=False)'],
+            env=env, stderr=subprocess.DEVNULL)
+        self.assertNotEqual(0, result.returncode)
+        spans = {event['name']: event for event in _load(self.path) if event['ph'] == 'X'}
+        self.assertEqual({'exception': 'ValueError'}, spans['setup_logging']['args'])